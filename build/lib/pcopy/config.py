@@ -0,0 +1,179 @@
+"""Configuration and constants for pcopy backup app."""
+from __future__ import annotations
+
+import json
+import marshal
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, List, Optional
+
+HERE = Path(__file__).resolve().parent
+# Prefer package-local slogans.json (installed with package data); fallback to repo-level slogans.json
+SLOGANS_PATH = HERE / 'slogans.json'
+if not SLOGANS_PATH.exists():
+    SLOGANS_PATH = HERE.parent / 'slogans.json'
+
+# Allow overriding the slogans file via environment variable for customization
+import os
+env_slogans = os.environ.get('PCOPY_SLOGANS')
+if env_slogans:
+    env_path = Path(env_slogans)
+    if env_path.exists():
+        SLOGANS_PATH = env_path
+
+
+# Parsed settings and slogans are cached in marshal form, keyed by the source
+# file's mtime, size and inode, so unchanged files skip the YAML/JSON parse.
+CACHE_DIR = Path(os.environ.get('PCOPY_CACHE_DIR') or Path(os.environ.get('XDG_CACHE_HOME') or (Path.home() / '.cache')) / 'pcopy')
+_CACHE_FORMAT = (1, marshal.version, sys.version_info[:2])
+# Files modified this recently are parsed but not cached: a second write in
+# the same timestamp tick could otherwise leave the same mtime and size.
+_RACY_SECONDS = 2.0
+
+
+def yaml_load(fh: IO[str]) -> Any:
+    """``yaml.safe_load`` using libyaml's CSafeLoader when it is available."""
+    import yaml
+
+    loader = getattr(yaml, 'CSafeLoader', None)
+    if loader is not None:
+        return yaml.load(fh, Loader=loader)
+    return yaml.safe_load(fh)
+
+
+def _cache_file(path: Path) -> Path:
+    return CACHE_DIR / (str(path.absolute()).strip(os.sep).replace(os.sep, '_') + '.marshal')
+
+
+def _cached_parse(path: Path, parse: Callable[[IO[str]], Any]) -> Any:
+    """Return ``parse`` of ``path``, served from the marshal cache when fresh."""
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+    cache = _cache_file(path)
+    try:
+        with cache.open('rb') as fh:
+            fmt, cached_stamp, data = marshal.load(fh)
+        if fmt == _CACHE_FORMAT and cached_stamp == stamp:
+            return data
+    except Exception:
+        pass
+    with path.open('r', encoding='utf8') as fh:
+        data = parse(fh)
+    if time.time() - st.st_mtime > _RACY_SECONDS:
+        tmp = cache.with_name(f'.{cache.name}.{os.getpid()}')
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            with tmp.open('wb') as fh:
+                # ValueError for values marshal cannot store (e.g. YAML dates)
+                marshal.dump((_CACHE_FORMAT, stamp, data), fh)
+            os.replace(tmp, cache)
+        except (OSError, ValueError):
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+    return data
+
+
+def _load_slogans(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # Priority: user SETTINGS 'slogans' key > PCOPY_SLOGANS file > packaged slogans.json > defaults
+    data: Dict[str, Any] = {}
+    try:
+        # If user settings file contains slogans, prefer that
+        if settings is None and SETTINGS_PATH.exists():
+            settings = _cached_parse(SETTINGS_PATH, yaml_load)
+        if settings:
+            s = settings.get('slogans')
+            cf = settings.get('cat_facts')
+            if s or cf:
+                data['slogans'] = s or []
+                data['cat_facts'] = cf or []
+                # Ensure modern key 'quotes' is present for UI code
+                data['quotes'] = list(data.get('slogans') or [])
+                return data
+    except Exception:
+        # ignore; fallback to file-based slogans
+        pass
+
+    try:
+        data = _cached_parse(SLOGANS_PATH, json.load) or {}
+    except Exception:
+        data = {}
+
+    if 'slogans' not in data:
+        # Keep legacy 'slogans' key for backwards compatibility with tests/code
+        data['slogans'] = ['Backup running...']
+    if 'cat_facts' not in data:
+        data['cat_facts'] = ['Cats sleep a lot.']
+    if 'quotes' not in data:
+        # Primary modern key used by richer UI
+        data['quotes'] = data.get('slogans', ['Backup running...'])
+    return data
+
+
+# Wall and CPU seconds spent reading settings and slogans since the last
+# take_load_time() call; a run reports them as its 'config' phase.
+_load_time = [0.0, 0.0]
+_load_started = (time.perf_counter(), time.process_time())
+_S = _load_slogans()
+# Preserve the raw slogans data (dict) for stage-based UI and backwards compat.
+SLOGANS_DATA: Dict[str, Any] = _S
+# Top-level quotes list (used for short header lines), and cat facts list.
+SLOGANS: List[str] = list(_S.get('quotes') or [])
+CAT_FACTS: List[str] = list(_S.get('cat_facts') or [])
+# Stage mapping used by richer dashboards
+STAGES: Dict[str, Any] = _S.get('stages', {})
+
+
+def reload_settings() -> None:
+    """Reload SETTINGS and slogans data. Useful for tests that modify files.
+
+    Callers should re-import symbols or call this to refresh module-level values.
+    """
+    global SETTINGS, SLOGANS_DATA, SLOGANS, CAT_FACTS, STAGES
+    wall, cpu = time.perf_counter(), time.process_time()
+    SETTINGS = _load_settings()
+    # the settings were just read; do not parse the same file a second time
+    SLOGANS_DATA = _load_slogans(SETTINGS if isinstance(SETTINGS, dict) else None)
+    _add_load_time(wall, cpu)
+    SLOGANS = list(SLOGANS_DATA.get('quotes') or [])
+    CAT_FACTS = list(SLOGANS_DATA.get('cat_facts') or [])
+    STAGES = SLOGANS_DATA.get('stages', {})
+
+
+def _add_load_time(wall: float, cpu: float) -> None:
+    _load_time[0] += time.perf_counter() - wall
+    _load_time[1] += time.process_time() - cpu
+
+
+def take_load_time() -> tuple[float, float]:
+    """Wall and CPU seconds spent loading settings since the last call."""
+    wall, cpu = _load_time
+    _load_time[:] = [0.0, 0.0]
+    return wall, cpu
+
+# Optional YAML settings file for named backup configs
+SETTINGS_PATH = Path.home() / '.pcopy-main-backup.yml'
+
+
+def _load_settings() -> Dict[str, Any]:
+    try:
+        if SETTINGS_PATH.exists():
+            return _cached_parse(SETTINGS_PATH, yaml_load) or {}
+    except Exception:
+        return {}
+    return {}
+
+
+SETTINGS = _load_settings()
+_add_load_time(*_load_started)
+
+# Paths
+COW_PATH = HERE.parent / 'cows'
+SOURCE_DIR = Path(SETTINGS.get('source', '.')).resolve()
+DEST_DIR = Path(SETTINGS.get('dest', './backup')).resolve()
+EXCLUDE_FILE = Path(SETTINGS.get('exclude', '.pcopy-exclude'))
+BACKUP_VERSIONS_DIR = Path(SETTINGS.get('backup_versions_dir', str(DEST_DIR / 'versions')))
+# Per-job state (file index, ...) lives here; PCOPY_STATE_DIR overrides the settings key
+STATE_DIR = Path(os.environ.get('PCOPY_STATE_DIR') or SETTINGS.get('state_dir') or (Path.home() / '.pcopy-state')).expanduser()
@@ -0,0 +1,376 @@
+"""Status and control of running jobs from outside the terminal.
+
+Every dashboard owns a ``RunControl`` and registers it while its run is
+active. A ``ControlServer`` publishes the registered runs:
+
+* on a Unix-domain socket (mode 0600), one JSON object per line. Requests
+  are ``{"cmd": "status"}``, ``{"cmd": "watch", "interval": 1}`` (a status
+  line every interval until the client hangs up), and
+  ``{"cmd": "pause"|"resume"|"cancel", "run": "<name>"}``;
+* optionally over HTTP on 127.0.0.1, read-only: ``GET /runs``,
+  ``GET /events`` (server-sent events) and ``GET /metrics`` (Prometheus,
+  when the server was given a ``metrics`` callable). Any web page the user
+  opens can send requests to localhost, so commands are only taken on the
+  socket, and requests whose ``Host`` is not a loopback name (DNS
+  rebinding) are refused.
+
+Pausing stops attached rsync processes with SIGSTOP (resumed with SIGCONT)
+and holds the Python copy engine at its next checkpoint; cancelling
+terminates rsync and makes the engine raise ``Cancelled``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+RUNNING = 'running'
+PAUSED = 'paused'
+CANCELLING = 'cancelling'
+COMMANDS = ('pause', 'resume', 'cancel')
+# exit status of a cancelled run; rsync uses 20 for "killed by a signal"
+EXIT_CANCELLED = 20
+
+_RUNS: Dict[str, 'RunControl'] = {}
+_RUNS_LOCK = threading.Lock()
+
+
+class Cancelled(Exception):
+    """Raised at a checkpoint once the run was cancelled."""
+
+
+class RunControl:
+    """Pause/resume/cancel switch and counter snapshot for one run."""
+
+    def __init__(self, dash: Any = None, name: str = '') -> None:
+        self.dash = dash
+        self.name = name
+        self.cancelled = threading.Event()
+        # set while running; cleared by pause() so checkpoints block
+        self._running = threading.Event()
+        self._running.set()
+        self._procs: List[Any] = []
+        self._lock = threading.Lock()
+        # extra counters from the copy engine: () -> {'files': n, 'bytes': n}
+        self.counters: Optional[Callable[[], Dict[str, int]]] = None
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def attach(self, proc: Any) -> None:
+        with self._lock:
+            self._procs.append(proc)
+        if self.cancelled.is_set():
+            self._signal(proc, signal.SIGTERM)
+        elif self.paused:
+            self._signal(proc, getattr(signal, 'SIGSTOP', None))
+
+    def detach(self, proc: Any) -> None:
+        with self._lock:
+            if proc in self._procs:
+                self._procs.remove(proc)
+
+    @staticmethod
+    def _signal(proc: Any, sig: Optional[int]) -> None:
+        if sig is None:
+            return
+        try:
+            proc.send_signal(sig)
+        except Exception:
+            pass
+
+    def _signal_all(self, sig: Optional[int]) -> None:
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            self._signal(proc, sig)
+
+    def pause(self) -> None:
+        self._running.clear()
+        self._signal_all(getattr(signal, 'SIGSTOP', None))
+
+    def resume(self) -> None:
+        self._signal_all(getattr(signal, 'SIGCONT', None))
+        self._running.set()
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        # a stopped process cannot act on SIGTERM until it is continued
+        self._signal_all(signal.SIGTERM)
+        self._signal_all(getattr(signal, 'SIGCONT', None))
+        self._running.set()
+
+    def checkpoint(self) -> None:
+        """Block while paused; raise ``Cancelled`` once cancelled."""
+        while not self._running.wait(0.5):
+            pass
+        if self.cancelled.is_set():
+            raise Cancelled(self.name)
+
+    def command(self, cmd: str) -> None:
+        if cmd not in COMMANDS:
+            raise ValueError(f'unknown command {cmd!r}')
+        getattr(self, cmd)()
+
+    def snapshot(self) -> Dict[str, Any]:
+        dash = self.dash
+        start = getattr(dash, 'start_time', None)
+        elapsed = (datetime.now() - start).total_seconds() if start else 0.0
+        files = int(getattr(dash, 'files_moved_count', 0) or 0)
+        nbytes = getattr(dash, 'transferred_bytes', None)
+        if self.counters is not None:
+            try:
+                extra = self.counters()
+                files = max(files, int(extra.get('files', 0)))
+                nbytes = max(nbytes or 0, int(extra.get('bytes', 0)))
+            except Exception:
+                pass
+        progress = int(getattr(dash, 'progress', 0) or 0)
+        eta = elapsed * (100 - progress) / progress if 0 < progress < 100 and elapsed else None
+        errors = list(getattr(dash, 'errors', []) or [])
+        state = CANCELLING if self.cancelled.is_set() else PAUSED if self.paused else RUNNING
+        return {
+            'name': self.name,
+            'state': state,
+            'started': start.isoformat() if start else None,
+            'elapsed_seconds': round(elapsed, 3),
+            'progress': progress,
+            'files': files,
+            'total_files': getattr(dash, 'total_files', None),
+            'bytes': nbytes,
+            'rate_bytes_per_sec': round(nbytes / elapsed, 1) if nbytes and elapsed else None,
+            'speed': getattr(dash, 'speed', '') or None,
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'current_file': getattr(dash, 'current_file', '') or None,
+            'errors_count': len(errors),
+            'errors': errors[-5:],
+        }
+
+
+def socket_path(state_dir: str | Path, setting: Any = None) -> Optional[Path]:
+    """Where a run serves its control socket; ``None`` when it is switched off.
+
+    ``PCOPY_CONTROL_SOCKET`` overrides the ``control_socket`` setting; either
+    may be ``off``. The default is ``<state_dir>/control.sock``.
+    """
+    value = os.environ.get('PCOPY_CONTROL_SOCKET') or setting
+    if value is None or value is True:
+        return Path(state_dir) / 'control.sock'
+    if value is False or str(value).lower() in ('off', 'none', 'false', 'no', '0'):
+        return None
+    return Path(str(value)).expanduser()
+
+
+def in_use(path: str | Path) -> bool:
+    """True when a live process answers on the socket at ``path``."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+def register(control: RunControl) -> str:
+    """Publish ``control``; a name already in use gets a ``#2``-style suffix."""
+    with _RUNS_LOCK:
+        base = control.name or 'run'
+        name, n = base, 1
+        while name in _RUNS and _RUNS[name] is not control:
+            n += 1
+            name = f'{base}#{n}'
+        control.name = name
+        _RUNS[name] = control
+    return name
+
+
+def unregister(control: RunControl) -> None:
+    with _RUNS_LOCK:
+        if _RUNS.get(control.name) is control:
+            del _RUNS[control.name]
+
+
+def runs() -> Dict[str, RunControl]:
+    with _RUNS_LOCK:
+        return dict(_RUNS)
+
+
+def status() -> Dict[str, Any]:
+    return {'ok': True, 'pid': os.getpid(), 'runs': [c.snapshot() for c in runs().values()]}
+
+
+def handle(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer one control request (shared by the socket and HTTP front ends)."""
+    cmd = request.get('cmd')
+    if cmd == 'status':
+        return status()
+    if cmd in COMMANDS:
+        target = runs().get(str(request.get('run') or ''))
+        if target is None:
+            return {'ok': False, 'error': f"no running job {request.get('run')!r}"}
+        target.command(cmd)
+        return {'ok': True, 'run': target.snapshot()}
+    return {'ok': False, 'error': f'unknown command {cmd!r}'}
+
+
+class _SocketHandler(socketserver.StreamRequestHandler):
+    def _send(self, obj: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(obj).encode('utf8') + b'\n')
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        for raw in self.rfile:
+            try:
+                request = json.loads(raw.decode('utf8') or '{}')
+            except ValueError:
+                self._send({'ok': False, 'error': 'invalid JSON'})
+                continue
+            try:
+                if request.get('cmd') == 'watch':
+                    interval = max(0.1, float(request.get('interval') or 1.0))
+                    while not self.server.stopping.is_set():  # type: ignore[attr-defined]
+                        self._send(status())
+                        time.sleep(interval)
+                    return
+                self._send(handle(request))
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+# Host header values (without port) the HTTP server answers to
+_LOOPBACK_HOSTS = ('127.0.0.1', 'localhost', '[::1]')
+
+
+class _HttpHandler(BaseHTTPRequestHandler):
+    server_version = 'pcopy'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _json(self, code: int, obj: Dict[str, Any]) -> None:
+        body = json.dumps(obj).encode('utf8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _loopback_host(self) -> bool:
+        host = self.headers.get('Host', '')
+        host = host.rsplit(':', 1)[0] if not host.endswith(']') else host
+        return host in _LOOPBACK_HOSTS
+
+    def do_GET(self) -> None:
+        metrics = getattr(self.server, 'metrics', None)
+        if not self._loopback_host():
+            self._json(403, {'ok': False, 'error': 'forbidden host'})
+        elif self.path in ('/', '/runs'):
+            self._json(200, status())
+        elif self.path == '/metrics' and metrics is not None:
+            from .metrics import CONTENT_TYPE
+            body = metrics().encode('utf8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path.startswith('/events'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            try:
+                while not self.server.stopping.is_set():  # type: ignore[attr-defined]
+                    self.wfile.write(b'event: status\ndata: ' + json.dumps(status()).encode('utf8') + b'\n\n')
+                    self.wfile.flush()
+                    time.sleep(1.0)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        else:
+            self._json(404, {'ok': False, 'error': 'not found'})
+
+    def do_POST(self) -> None:
+        self._json(405, {'ok': False, 'error': 'read-only; send commands on the control socket (pcopy ctl)'})
+
+
+class ControlServer:
+    """Serve ``handle`` on a Unix socket and, optionally, on localhost HTTP."""
+
+    def __init__(self, socket_path: Optional[str | Path] = None, http_port: Optional[int] = None, metrics: Optional[Callable[[], str]] = None) -> None:
+        self.socket_path = Path(socket_path) if socket_path else None
+        self.http_port = http_port
+        # () -> exposition text served on GET /metrics
+        self.metrics = metrics
+        self.stopping = threading.Event()
+        self._servers: List[socketserver.BaseServer] = []
+        self._threads: List[threading.Thread] = []
+
+    def _serve(self, server: socketserver.BaseServer, name: str) -> None:
+        server.stopping = self.stopping  # type: ignore[attr-defined]
+        self._servers.append(server)
+        t = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.2}, name=name, daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def start(self) -> 'ControlServer':
+        """Bind and serve; raises ``OSError`` if another process owns the socket."""
+        if self.socket_path is not None:
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            if in_use(self.socket_path):
+                raise OSError(f'{self.socket_path} is served by another pcopy process')
+            try:
+                # a socket left over by a process that died
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+            old_umask = os.umask(0o177)
+            try:
+                server = _UnixServer(str(self.socket_path), _SocketHandler)
+            finally:
+                os.umask(old_umask)
+            self._serve(server, 'pcopy-control')
+        if self.http_port is not None:
+            http = ThreadingHTTPServer(('127.0.0.1', int(self.http_port)), _HttpHandler)
+            http.daemon_threads = True
+            http.metrics = self.metrics  # type: ignore[attr-defined]
+            self.http_port = http.server_address[1]
+            self._serve(http, 'pcopy-control-http')
+        return self
+
+    def close(self) -> None:
+        self.stopping.set()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        for t in self._threads:
+            t.join()
+        self._servers, self._threads = [], []
+        if self.socket_path is not None:
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+
+def request(socket_path: str | Path, payload: Dict[str, Any], timeout: float = 10.0) -> Dict[str, Any]:
+    """Send one request to a ``ControlServer`` socket and return its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(payload).encode('utf8') + b'\n')
+        with sock.makefile('rb') as fh:
+            line = fh.readline()
+    return json.loads(line.decode('utf8')) if line else {'ok': False, 'error': 'no reply'}
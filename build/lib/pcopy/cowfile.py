@@ -0,0 +1,240 @@
+"""In-process cowsay: parse ``.cow`` files and draw speech balloons.
+
+A cowfile is a small Perl script whose only job is to assign the cow body to
+``$the_cow`` with a heredoc. ``parse_cowfile`` reads that heredoc (plus any
+simple ``$var = "...";`` assignments), applies Perl's backslash escapes and
+turns ``$thoughts``, ``$eyes``, ``$tongue`` and other scalars into format
+fields, so rendering is plain string work with no ``cowsay`` subprocess.
+
+Cowfiles are looked up in ``COW_PATH``, then ``$COWPATH``, then the usual
+system cow directories, and are parsed once per process. Each cow's body is
+drawn once per eyes/tongue/thoughts combination; only the balloon changes
+with the text. With ``use_disk_cache`` parsed templates are also kept in a
+small JSON file keyed by cowfile path, mtime and size, so other processes
+skip the parse.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import textwrap
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import COW_PATH
+
+SYSTEM_COW_DIRS = [
+    '/usr/share/cowsay/cows',
+    '/usr/share/games/cowsay/cows',
+    '/usr/local/share/cows',
+    '/usr/local/share/cowsay/cows',
+    '/opt/homebrew/share/cows',
+]
+# cowsay's default -W
+BALLOON_WIDTH = 40
+DEFAULT_EYES = 'oo'
+DEFAULT_TONGUE = '  '
+
+_HEREDOC = re.compile(r'\$the_cow\s*=\s*<<\s*(["\']?)(\w+)\1\s*;?[^\n]*\n(.*?)^\2\s*$', re.S | re.M)
+_ASSIGN = re.compile(r'^\s*\$(\w+)\s*=\s*(["\'])(.*?)\2\s*;', re.M)
+# escapes, ${var} / $var interpolation, and braces that must survive str.format
+_TOKEN = re.compile(r'\\(.)|\$\{(\w+)\}|\$(\w+)|([{}])', re.S)
+
+_LOCK = threading.Lock()
+_COWFILES: Dict[str, Optional['Cowfile']] = {}
+_DISK: Optional['DiskCache'] = None
+
+
+class Cowfile:
+    """A parsed cowfile: ``body`` is a ``str.format`` template."""
+
+    def __init__(self, name: str, path: Path, body: str, variables: Dict[str, str]) -> None:
+        self.name = name
+        self.path = path
+        self.body = body
+        self.variables = variables
+        self._drawn: Dict[Tuple[str, str, str], str] = {}
+
+    def draw(self, thoughts: str = '\\', eyes: str = DEFAULT_EYES, tongue: str = DEFAULT_TONGUE) -> str:
+        key = (thoughts, eyes, tongue)
+        drawn = self._drawn.get(key)
+        if drawn is None:
+            values = {'thoughts': thoughts, 'eyes': eyes[:2].ljust(2), 'tongue': tongue[:2].ljust(2)}
+            # assignments made by the cowfile itself win, as they do in cowsay
+            values.update(self.variables)
+            drawn = self._drawn[key] = self.body.format_map(_Blank(values))
+        return drawn
+
+
+class _Blank(dict):
+    # unknown Perl scalars interpolate to the empty string
+    def __missing__(self, key: str) -> str:
+        return ''
+
+
+def cow_dirs() -> List[Path]:
+    dirs = [Path(COW_PATH)]
+    dirs += [Path(p) for p in os.environ.get('COWPATH', '').split(os.pathsep) if p]
+    dirs += [Path(p) for p in SYSTEM_COW_DIRS]
+    return dirs
+
+
+def find_cowfile(name: str) -> Optional[Path]:
+    if os.sep in name or name.endswith('.cow'):
+        p = Path(name)
+        return p if p.is_file() else None
+    for d in cow_dirs():
+        p = d / f'{name}.cow'
+        if p.is_file():
+            return p
+    return None
+
+
+def _template(raw: str) -> str:
+    def repl(m: 're.Match[str]') -> str:
+        escaped, braced, plain, brace = m.groups()
+        if escaped is not None:
+            ch = {'n': '\n', 't': '\t'}.get(escaped, escaped)
+            return '{{' if ch == '{' else '}}' if ch == '}' else ch
+        if brace is not None:
+            return brace * 2
+        return '{' + (braced or plain) + '}'
+
+    return _TOKEN.sub(repl, raw)
+
+
+def parse_cowfile(path: str | Path, name: Optional[str] = None) -> Optional[Cowfile]:
+    """Parse ``path``; return ``None`` when it has no ``$the_cow`` heredoc."""
+    path = Path(path)
+    try:
+        text = path.read_text(encoding='utf8', errors='replace')
+    except OSError:
+        return None
+    m = _HEREDOC.search(text)
+    if not m:
+        return None
+    quote, _, raw = m.groups()
+    variables: Dict[str, str] = {}
+    for var, q, value in _ASSIGN.findall(text[:m.start()]):
+        if var not in ('thoughts', 'the_cow'):
+            variables[var] = value if q == "'" else _template(value).format_map(_Blank(variables))
+    if quote == "'":
+        # single-quoted heredocs are not interpolated
+        body = raw.replace('{', '{{').replace('}', '}}')
+    else:
+        body = _template(raw)
+    return Cowfile(name or path.stem, path, body, variables)
+
+
+class DiskCache:
+    """Parsed cowfile templates persisted as JSON, invalidated by mtime/size."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.dirty = False
+        try:
+            with self.path.open('r', encoding='utf8') as fh:
+                self.entries: Dict[str, Any] = json.load(fh) or {}
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[List[int]]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size]
+
+    def get(self, path: Path, name: str) -> Optional[Cowfile]:
+        entry = self.entries.get(str(path))
+        if not entry or entry.get('stamp') != self._stamp(path):
+            return None
+        return Cowfile(name, path, entry['body'], dict(entry.get('variables') or {}))
+
+    def put(self, cow: Cowfile) -> None:
+        self.entries[str(cow.path)] = {'stamp': self._stamp(cow.path), 'body': cow.body, 'variables': cow.variables}
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix='.cow-cache-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf8') as fh:
+                json.dump(self.entries, fh)
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+def use_disk_cache(path: Optional[str | Path]) -> Optional[DiskCache]:
+    """Enable (or with ``None`` disable) the on-disk template cache."""
+    global _DISK
+    _DISK = DiskCache(path) if path else None
+    return _DISK
+
+
+def load_cowfile(name: str) -> Optional[Cowfile]:
+    """Return the parsed cowfile for ``name`` (cached, including misses)."""
+    with _LOCK:
+        if name in _COWFILES:
+            return _COWFILES[name]
+    path = find_cowfile(name)
+    cow = None
+    if path:
+        disk = _DISK
+        cow = disk.get(path, name) if disk else None
+        if cow is None:
+            cow = parse_cowfile(path, name)
+            if cow is not None and disk:
+                disk.put(cow)
+    with _LOCK:
+        _COWFILES[name] = cow
+    return cow
+
+
+def preload(names: Iterable[str]) -> int:
+    """Parse the given cowfiles up front; returns how many were found."""
+    found = sum(1 for name in dict.fromkeys(names) if load_cowfile(name) is not None)
+    if _DISK is not None:
+        _DISK.save()
+    return found
+
+
+def balloon(text: str, width: int = BALLOON_WIDTH, think: bool = False) -> str:
+    lines: List[str] = []
+    for para in text.expandtabs(8).split('\n'):
+        lines += textwrap.wrap(para, width=width - 1) or ['']
+    size = max(len(line) for line in lines)
+    out = [' ' + '_' * (size + 2)]
+    for i, line in enumerate(lines):
+        if think:
+            left, right = '(', ')'
+        elif len(lines) == 1:
+            left, right = '<', '>'
+        elif i == 0:
+            left, right = '/', '\\'
+        elif i == len(lines) - 1:
+            left, right = '\\', '/'
+        else:
+            left, right = '|', '|'
+        out.append(f'{left} {line.ljust(size)} {right}')
+    out.append(' ' + '-' * (size + 2))
+    return '\n'.join(out) + '\n'
+
+
+def render(text: str, cow: Cowfile, think: bool = False, eyes: str = DEFAULT_EYES, tongue: str = DEFAULT_TONGUE, width: int = BALLOON_WIDTH) -> str:
+    """Return the same picture ``cowsay -f <cow> text`` would print."""
+    body = cow.draw(thoughts='o' if think else '\\', eyes=eyes, tongue=tongue)
+    if not body.endswith('\n'):
+        body += '\n'
+    return balloon(text, width=width, think=think) + body
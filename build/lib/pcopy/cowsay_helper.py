@@ -0,0 +1,112 @@
+"""Helpers to render cowsay art for pcopy.
+
+Finished pictures are kept in a bounded LRU (``_CACHE``). A miss on a
+bundled or system cow is cheap: the cow body is drawn once per character
+(see ``cowfile.Cowfile.draw``) and only the balloon is rebuilt for the text.
+"""
+from __future__ import annotations
+
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .cowfile import load_cowfile, render as render_cow
+from .config import COW_PATH
+
+DEFAULT_CACHE_SIZE = 256
+
+
+class ArtCache:
+    """Least-recently-used cache of rendered art with hit/miss/eviction counters."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = max(1, maxsize)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: 'OrderedDict[Tuple[str, str], str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._lock:
+            art = self._data.get(key)
+            if art is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return art
+
+    def put(self, key: Tuple[str, str], art: str) -> None:
+        with self._lock:
+            self._data[key] = art
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self._data), 'maxsize': self.maxsize}
+
+
+_CACHE = ArtCache()
+
+
+def cache_stats() -> Dict[str, int]:
+    return _CACHE.stats()
+
+
+def _system_cowsay_available() -> bool:
+    return shutil.which('cowsay') is not None
+
+
+def find_custom_cow(name: str) -> Optional[Path]:
+    p = COW_PATH / f"{name}.cow"
+    return p if p.exists() else None
+
+
+def cowsay_art(text: str, cow: str = 'datakitten') -> str:
+    """Return ASCII art for given text.
+
+    Cowfiles are rendered in-process; the system cowsay is only spawned for
+    cows that cannot be found or parsed, with a plain-text fallback last.
+    """
+    key = (cow, text)
+    art = _CACHE.get(key)
+    if art is not None:
+        return art
+
+    parsed = load_cowfile(cow)
+    if parsed is not None:
+        art = render_cow(text, parsed)
+        _CACHE.put(key, art)
+        return art
+
+    if _system_cowsay_available():
+        cowfile = find_custom_cow(cow)
+        cmd = ['cowsay']
+        if cowfile:
+            cmd += ['-f', str(cowfile)]
+        cmd += [text]
+        try:
+            out = subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True)
+            _CACHE.put(key, out)
+            return out
+        except Exception:
+            pass
+
+    # Fallback ascii art if cowsay is not present
+    art = f"<{cow}> {text}\n"
+    _CACHE.put(key, art)
+    return art
@@ -0,0 +1,163 @@
+"""``pcopy daemon``: a resident process that runs named jobs on schedules.
+
+Jobs opt in with a cron expression in the settings file::
+
+    photos:
+        source: /home/me/Photos
+        dest: /mnt/backup/photos
+        schedule: "30 2 * * *"
+
+The daemon imports everything once and keeps it warm between runs: the parsed
+settings (reloaded only when the settings file's mtime, size or inode
+changes, or on SIGHUP), parsed cowfiles, and the per-job file index
+connections (``file_index.keep_open``). Runs that were missed while another
+run was in progress are skipped, as cron does, not queued up.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import config
+from .cron import CronSchedule
+
+# how often the settings file is checked for changes, at most
+DEFAULT_POLL = 30.0
+
+
+class Daemon:
+    """Track each scheduled job's next run and hand due jobs to ``run_jobs``."""
+
+    def __init__(self, run_jobs: Callable[[List[str]], int], names: Optional[Iterable[str]] = None, poll_seconds: float = DEFAULT_POLL, clock: Callable[[], datetime] = datetime.now, logger: Optional[logging.Logger] = None) -> None:
+        self.run_jobs = run_jobs
+        self.names = set(names) if names else None
+        self.poll_seconds = poll_seconds
+        self.clock = clock
+        self.log = logger or logging.getLogger('pcopy')
+        self.schedules: Dict[str, CronSchedule] = {}
+        self.next_run: Dict[str, Optional[datetime]] = {}
+        self.reloads = 0
+        self.runs = 0
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._loaded = False
+        self._reload_requested = threading.Event()
+        self._stop = threading.Event()
+        # interrupts the sleep between ticks (stop or reload requests)
+        self._wake = threading.Event()
+
+    @staticmethod
+    def _settings_stamp() -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(config.SETTINGS_PATH)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def request_reload(self) -> None:
+        """Reload the settings now even if the file looks unchanged (SIGHUP)."""
+        self._reload_requested.set()
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def reload(self, now: Optional[datetime] = None) -> bool:
+        """Re-read the settings if the file changed; return whether it did."""
+        stamp = self._settings_stamp()
+        forced = self._reload_requested.is_set()
+        if self._loaded and not forced and stamp == self._stamp:
+            return False
+        self._reload_requested.clear()
+        self._stamp = stamp
+        if self._loaded or forced:
+            config.reload_settings()
+            self.reloads += 1
+        self._loaded = True
+        self._update_schedules(now or self.clock())
+        return True
+
+    def _update_schedules(self, now: datetime) -> None:
+        settings = config.SETTINGS if isinstance(config.SETTINGS, dict) else {}
+        schedules: Dict[str, CronSchedule] = {}
+        for name, cfg in settings.items():
+            if not isinstance(cfg, dict) or not cfg.get('schedule'):
+                continue
+            if self.names is not None and name not in self.names:
+                continue
+            expr = str(cfg['schedule'])
+            old = self.schedules.get(name)
+            if old is not None and old.expr == expr.strip():
+                schedules[name] = old
+                continue
+            try:
+                schedules[name] = CronSchedule(expr)
+            except ValueError as e:
+                self.log.error('Ignoring schedule for %s: %s', name, e)
+                continue
+            self.next_run[name] = schedules[name].next_after(now)
+            self.log.info('Scheduled %s (%s), next run %s', name, expr, self.next_run[name])
+        for name in set(self.next_run) - set(schedules):
+            del self.next_run[name]
+        self.schedules = schedules
+
+    def due(self, now: datetime) -> List[str]:
+        ready = [(t, name) for name, t in self.next_run.items() if t is not None and t <= now]
+        return [name for _, name in sorted(ready)]
+
+    def tick(self, now: Optional[datetime] = None) -> List[str]:
+        """Reload if needed and run whatever is due; return the jobs that ran."""
+        now = now or self.clock()
+        self.reload(now)
+        due = self.due(now)
+        if not due:
+            return []
+        self.runs += 1
+        self.log.info('Running scheduled jobs: %s', ', '.join(due))
+        try:
+            rc = self.run_jobs(due)
+            self.log.info('Scheduled jobs finished: rc=%s', rc)
+        except Exception:
+            self.log.exception('Scheduled run of %s failed', ', '.join(due))
+        # schedule from the end of the run: slots that passed meanwhile are
+        # skipped, for the jobs that ran and for any other job alike
+        after = max(now, self.clock())
+        for name, t in list(self.next_run.items()):
+            if name not in self.schedules or t is None or t > after:
+                continue
+            if name not in due:
+                self.log.info('Skipping the %s run of %s: another run was in progress', t, name)
+            self.next_run[name] = self.schedules[name].next_after(after)
+        return due
+
+    def seconds_until_next(self, now: datetime) -> Optional[float]:
+        upcoming = [t for t in self.next_run.values() if t is not None]
+        if not upcoming:
+            return None
+        return max(0.0, (min(upcoming) - now).total_seconds())
+
+    def _warm_up(self) -> None:
+        from . import cowfile, file_index
+        file_index.keep_open(True)
+        stages = config.STAGES if isinstance(config.STAGES, dict) else {}
+        cowfile.preload(['datakitten'] + [a for stage in stages.values() if isinstance(stage, dict) for a in stage.get('animals', [])])
+
+    def serve(self) -> int:
+        """Run until ``stop()``; the settings file is polled every ``poll_seconds``."""
+        from . import file_index
+        self._warm_up()
+        try:
+            while not self._stop.is_set():
+                self.tick()
+                if self._stop.is_set():
+                    break
+                wait = self.seconds_until_next(self.clock())
+                wait = self.poll_seconds if wait is None else min(self.poll_seconds, wait)
+                self._wake.wait(max(0.5, wait))
+                self._wake.clear()
+        finally:
+            file_index.keep_open(False)
+        return 0
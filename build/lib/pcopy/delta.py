@@ -0,0 +1,311 @@
+"""Block delta transfer for large modified files (rsync algorithm, pure Python).
+
+The basis (the old destination copy) is described by a ``Signature``: one
+weak Adler-32 checksum and one strong blake2b digest per fixed-size block.
+``compute_delta`` slides a window over the new source file, rolling the weak
+checksum one byte at a time and confirming candidates with the strong hash,
+and yields ``('match', block_index)`` or ``('literal', data)`` operations.
+``apply_delta`` turns those into the new file; ``sync_file`` patches a
+destination that still holds the basis content, so only the changed regions
+are written. Once a run of unmatched bytes reaches ``roll_limit`` the search
+moves a whole block at a time, which bounds the pure-Python cost of heavily
+changed files while edits that keep block alignment still match.
+
+Signatures are kept per job in a ``SignatureStore`` (SQLite next to the file
+index) so the basis does not have to be re-read on the next run.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+# Files smaller than this are copied whole; the delta only pays off on big files
+DEFAULT_DELTA_THRESHOLD = 64 * 1024 * 1024
+
+_MOD = 65521  # Adler-32 modulus
+_STRONG = 16
+_ENTRY = struct.Struct(f'<I{_STRONG}s')
+_READ_SIZE = 1024 * 1024
+_LITERAL_FLUSH = 1024 * 1024
+
+DeltaOp = Tuple[str, Union[int, bytes]]
+
+
+def _strong(data) -> bytes:
+    return hashlib.blake2b(data, digest_size=_STRONG).digest()
+
+
+class Signature:
+    """Weak and strong checksums for each block of a basis file."""
+
+    def __init__(self, size: int, block_size: int, weak: List[int], strong: List[bytes]) -> None:
+        self.size = size
+        self.block_size = block_size
+        self.weak = weak
+        self.strong = strong
+
+    @property
+    def tail_len(self) -> int:
+        return self.size % self.block_size
+
+    def pack(self) -> bytes:
+        return b''.join(_ENTRY.pack(w, s) for w, s in zip(self.weak, self.strong))
+
+    @classmethod
+    def unpack(cls, size: int, block_size: int, blob: bytes) -> 'Signature':
+        weak: List[int] = []
+        strong: List[bytes] = []
+        for w, s in _ENTRY.iter_unpack(blob):
+            weak.append(w)
+            strong.append(s)
+        return cls(size, block_size, weak, strong)
+
+
+class SignatureBuilder:
+    """Build a ``Signature`` from data fed in pieces of any size."""
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE) -> None:
+        self.block_size = block_size
+        self.size = 0
+        self._weak: List[int] = []
+        self._strong: List[bytes] = []
+        self._pending = bytearray()
+
+    def _add(self, block) -> None:
+        self._weak.append(zlib.adler32(block))
+        self._strong.append(_strong(block))
+
+    def update(self, data: bytes) -> None:
+        bs = self.block_size
+        self.size += len(data)
+        self._pending += data
+        if len(self._pending) < bs:
+            return
+        view = memoryview(self._pending)
+        end = len(self._pending) - len(self._pending) % bs
+        for off in range(0, end, bs):
+            self._add(view[off:off + bs])
+        view.release()
+        del self._pending[:end]
+
+    def result(self) -> Signature:
+        if self._pending:
+            self._add(bytes(self._pending))
+            self._pending = bytearray()
+        return Signature(self.size, self.block_size, self._weak, self._strong)
+
+
+def signature_of(path: str | Path, block_size: int = DEFAULT_BLOCK_SIZE) -> Signature:
+    builder = SignatureBuilder(block_size)
+    with open(path, 'rb') as fh:
+        while True:
+            chunk = fh.read(_READ_SIZE)
+            if not chunk:
+                break
+            builder.update(chunk)
+    return builder.result()
+
+
+def compute_delta(fh: BinaryIO, sig: Signature, roll_limit: Optional[int] = None, builder: Optional[SignatureBuilder] = None) -> Iterator[DeltaOp]:
+    """Yield the operations that rebuild ``fh``'s content from the basis of ``sig``.
+
+    ``roll_limit`` caps how many unmatched bytes are searched one byte at a
+    time before the window jumps a block at a time (``None``: no cap).
+    Everything read from ``fh`` is also fed to ``builder``, if given, so the
+    new file's signature comes out of the same read.
+    """
+    bs = sig.block_size
+    full_blocks = sig.size // bs
+    table: Dict[int, List[Tuple[int, bytes]]] = {}
+    for idx in range(full_blocks):
+        table.setdefault(sig.weak[idx], []).append((idx, sig.strong[idx]))
+
+    buf = bytearray()
+    start = 0
+    eof = False
+    literal = bytearray()
+    weak: Optional[int] = None
+    a = b = 0
+    # unmatched bytes since the last match
+    run = 0
+
+    while True:
+        # keep at least one full window plus the next byte in the buffer
+        if not eof and len(buf) - start <= bs:
+            if start:
+                del buf[:start]
+                start = 0
+            chunk = fh.read(_READ_SIZE)
+            if chunk:
+                if builder is not None:
+                    builder.update(chunk)
+                buf += chunk
+                continue
+            eof = True
+        avail = len(buf) - start
+        if avail < bs:
+            # short tail: it can only match the basis' own partial last block
+            tail = bytes(buf[start:])
+            if tail and len(tail) == sig.tail_len and zlib.adler32(tail) == sig.weak[-1] and _strong(tail) == sig.strong[-1]:
+                if literal:
+                    yield ('literal', bytes(literal))
+                    literal = bytearray()
+                yield ('match', len(sig.weak) - 1)
+            else:
+                literal += tail
+            break
+
+        view = memoryview(buf)
+        window = view[start:start + bs]
+        if weak is None:
+            weak = zlib.adler32(window)
+            a = weak & 0xFFFF
+            b = weak >> 16
+        matched = -1
+        candidates = table.get(weak)
+        if candidates:
+            strong = _strong(window)
+            for idx, s in candidates:
+                if s == strong:
+                    matched = idx
+                    break
+        window.release()
+        view.release()
+        if matched >= 0:
+            if literal:
+                yield ('literal', bytes(literal))
+                literal = bytearray()
+            yield ('match', matched)
+            start += bs
+            weak = None
+            run = 0
+            continue
+
+        if roll_limit is not None and run >= roll_limit:
+            # give up on byte-wise resync here; look again one block further
+            literal += buf[start:start + bs]
+            start += bs
+            run += bs
+            weak = None
+            if len(literal) >= _LITERAL_FLUSH:
+                yield ('literal', bytes(literal))
+                literal = bytearray()
+            continue
+
+        # roll the window forward by one byte
+        out = buf[start]
+        literal.append(out)
+        start += 1
+        run += 1
+        if avail > bs:
+            a = (a - out + buf[start + bs - 1]) % _MOD
+            b = (b - bs * out - 1 + a) % _MOD
+            weak = (b << 16) | a
+        else:
+            weak = None
+        if len(literal) >= _LITERAL_FLUSH:
+            yield ('literal', bytes(literal))
+            literal = bytearray()
+
+    if literal:
+        yield ('literal', bytes(literal))
+
+
+def apply_delta(ops: Iterator[DeltaOp], basis: BinaryIO, out: BinaryIO, sig: Signature, in_place: bool = False) -> Dict[str, int]:
+    """Write the new file into ``out``.
+
+    With ``in_place`` the output already holds the basis content (a reflink
+    clone), so blocks that match at their original offset are not rewritten.
+    """
+    bs = sig.block_size
+    pos = 0
+    written = matched = literal = 0
+    for kind, value in ops:
+        if kind == 'match':
+            idx = int(value)  # type: ignore[arg-type]
+            length = sig.tail_len if (idx == len(sig.weak) - 1 and sig.tail_len) else bs
+            matched += length
+            if not (in_place and idx * bs == pos):
+                basis.seek(idx * bs)
+                data = basis.read(length)
+                out.seek(pos)
+                out.write(data)
+                written += length
+            pos += length
+        else:
+            data = value  # type: ignore[assignment]
+            out.seek(pos)
+            out.write(data)  # type: ignore[arg-type]
+            pos += len(data)  # type: ignore[arg-type]
+            written += len(data)  # type: ignore[arg-type]
+            literal += len(data)  # type: ignore[arg-type]
+    out.truncate(pos)
+    return {'size': pos, 'written': written, 'matched': matched, 'literal': literal}
+
+
+class SignatureStore:
+    """Per-job SQLite table of block signatures keyed by relative path."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS signatures ('
+            'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, '
+            'block_size INTEGER NOT NULL, blocks BLOB NOT NULL) WITHOUT ROWID'
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def get(self, rel: str, st: os.stat_result, block_size: int) -> Optional[Signature]:
+        """Return the stored signature if it still describes a file with ``st``."""
+        with self._lock:
+            row = self._db.execute('SELECT size, mtime_ns, block_size, blocks FROM signatures WHERE path = ?', (rel,)).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns or row[2] != block_size:
+            return None
+        return Signature.unpack(row[0], row[2], row[3])
+
+    def put(self, rel: str, st: os.stat_result, sig: Signature) -> None:
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO signatures (path, size, mtime_ns, block_size, blocks) VALUES (?, ?, ?, ?, ?)',
+                (rel, sig.size, st.st_mtime_ns, sig.block_size, sig.pack()),
+            )
+
+    def close(self, commit: bool = True) -> None:
+        with self._lock:
+            try:
+                if commit:
+                    self._db.commit()
+                else:
+                    self._db.rollback()
+            finally:
+                self._db.close()
+
+
+def sync_file(src: str, dst: str, basis: str, sig: Optional[Signature] = None, block_size: int = DEFAULT_BLOCK_SIZE) -> Tuple[Dict[str, int], Signature]:
+    """Patch ``dst`` in place to ``src``'s content.
+
+    ``dst`` must still hold the content of ``basis`` (a separate copy, e.g.
+    the reflinked version of the old file): blocks that match at their own
+    offset are left alone and only changed regions are written. Returns the
+    transfer stats and the signature of the new file for the next run, built
+    from the source as it is read so the patched file is not read back.
+    """
+    if sig is None or sig.block_size != block_size:
+        sig = signature_of(basis, block_size)
+    builder = SignatureBuilder(block_size)
+    with open(src, 'rb') as fs, open(basis, 'rb') as fb, open(dst, 'r+b') as fd:
+        stats = apply_delta(compute_delta(fs, sig, roll_limit=block_size, builder=builder), fb, fd, sig, in_place=True)
+    shutil.copystat(src, dst)
+    return stats, builder.result()
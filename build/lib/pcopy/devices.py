@@ -0,0 +1,113 @@
+"""Map backup paths to the disks behind them.
+
+``device_for(path)`` stats the path (or its nearest existing parent, since a
+destination may not exist yet) and resolves ``st_dev`` to a physical disk:
+block devices through ``/sys/dev/block`` (partitions collapse onto their
+disk, so ``sda1`` and ``sda2`` are one spindle), everything else (btrfs
+subvolumes, NFS, tmpfs) through the mount source listed in
+``/proc/self/mountinfo``. On systems without either, the raw ``major:minor``
+number is used, which still keeps distinct filesystems apart.
+"""
+from __future__ import annotations
+
+import os
+from typing import Dict, NamedTuple, Optional, Tuple
+
+MOUNTINFO = '/proc/self/mountinfo'
+SYS_BLOCK = '/sys/dev/block'
+SYS_CLASS_BLOCK = '/sys/class/block'
+
+
+class Mount(NamedTuple):
+    mount_point: str
+    fstype: str
+    source: str
+
+
+class Device(NamedTuple):
+    # disk name used for scheduling ("sda", "nvme0n1", "server:/export", "0:42")
+    key: str
+    # mount point the path lives on, for reports
+    mount_point: str
+
+
+def _unescape(field: str) -> str:
+    # mountinfo escapes space, tab, newline and backslash as \ooo
+    if '\\' not in field:
+        return field
+    out, i = [], 0
+    while i < len(field):
+        if field[i] == '\\' and field[i + 1:i + 4].isdigit():
+            out.append(chr(int(field[i + 1:i + 4], 8)))
+            i += 4
+        else:
+            out.append(field[i])
+            i += 1
+    return ''.join(out)
+
+
+def parse_mountinfo(text: str) -> Dict[Tuple[int, int], Mount]:
+    """Return ``(major, minor) -> Mount``; later (covering) mounts win."""
+    mounts: Dict[Tuple[int, int], Mount] = {}
+    for line in text.splitlines():
+        fields = line.split()
+        try:
+            sep = fields.index('-', 6)
+            major, minor = (int(n) for n in fields[2].split(':'))
+            mounts[(major, minor)] = Mount(_unescape(fields[4]), fields[sep + 1], _unescape(fields[sep + 2]))
+        except (ValueError, IndexError):
+            continue
+    return mounts
+
+
+def read_mountinfo(path: str = MOUNTINFO) -> Dict[Tuple[int, int], Mount]:
+    try:
+        with open(path, 'r', encoding='utf8', errors='replace') as fh:
+            return parse_mountinfo(fh.read())
+    except OSError:
+        return {}
+
+
+def _disk_of_sysfs(sys_path: str) -> Optional[str]:
+    # /sys/.../block/sda/sda1 is a partition of sda; dm-* and whole disks stand alone
+    try:
+        real = os.path.realpath(sys_path)
+    except OSError:
+        return None
+    if not os.path.isdir(real):
+        return None
+    if os.path.exists(os.path.join(real, 'partition')):
+        return os.path.basename(os.path.dirname(real))
+    return os.path.basename(real)
+
+
+def _existing(path: str) -> str:
+    path = os.path.abspath(os.path.expanduser(path))
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def device_for(path: str, mounts: Optional[Dict[Tuple[int, int], Mount]] = None) -> Device:
+    """Resolve ``path`` to the ``Device`` it is stored on."""
+    if mounts is None:
+        mounts = read_mountinfo()
+    try:
+        st_dev = os.stat(_existing(str(path))).st_dev
+    except OSError:
+        return Device('unknown', '')
+    major, minor = os.major(st_dev), os.minor(st_dev)
+    mount = mounts.get((major, minor))
+    mount_point = mount.mount_point if mount else ''
+    disk = _disk_of_sysfs(os.path.join(SYS_BLOCK, f'{major}:{minor}')) if major else None
+    if disk is None and mount is not None:
+        # anonymous st_dev (btrfs, overlay, network): go by what was mounted
+        if mount.source.startswith('/dev/'):
+            disk = _disk_of_sysfs(os.path.join(SYS_CLASS_BLOCK, os.path.basename(os.path.realpath(mount.source))))
+            disk = disk or os.path.basename(mount.source)
+        elif mount.source not in ('', 'none'):
+            disk = mount.source if mount.fstype not in ('tmpfs', 'overlay') else f'{mount.fstype}:{mount.mount_point}'
+    return Device(disk or f'{major}:{minor}', mount_point)
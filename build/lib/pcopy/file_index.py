@@ -0,0 +1,153 @@
+"""Persistent per-job index of source file state.
+
+Each job gets a small SQLite database (WAL mode) keyed by the file path
+relative to the source root. A row stores the size, ``st_mtime_ns``, inode
+and an optional content hash seen at the last successful run, so change
+detection needs a single source stat: files that still match their row are
+skipped without touching the destination.
+
+Rows are buffered in memory and written in batches inside one transaction;
+``commit()`` makes them durable only once the run succeeded, ``discard()``
+drops them so a failed run is retried in full next time.
+
+A long-running process (``pcopy daemon``) calls ``keep_open(True)`` so
+``open_index`` hands back the same connection, with its page cache still
+warm, on every run of a job instead of reopening the database.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS files ('
+    'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, '
+    'inode INTEGER NOT NULL, hash TEXT) WITHOUT ROWID'
+)
+_FLUSH_EVERY = 5000
+
+# path -> open FileIndex while keep_open(True) is in effect
+_OPEN: Optional[Dict[str, 'FileIndex']] = None
+_OPEN_LOCK = threading.Lock()
+
+
+def file_digest(path: str | Path) -> str:
+    """Return the blake2b hex digest of a file's content."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def index_path_for(state_dir: str | Path, name: Optional[str], source: str | Path, dest: str | Path) -> Path:
+    """Return the index database path for a named job or a source/dest pair."""
+    if name:
+        key = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in name)
+    else:
+        pair = f"{os.path.abspath(source)}\0{os.path.abspath(dest)}"
+        key = 'adhoc-' + hashlib.sha1(pair.encode('utf8')).hexdigest()[:16]
+    return Path(state_dir) / 'index' / f'{key}.sqlite'
+
+
+class FileIndex:
+    """SQLite-backed map of ``relative path -> (size, mtime_ns, inode, hash)``."""
+
+    def __init__(self, path: str | Path, reindex: bool = False, hash_files: bool = False) -> None:
+        self.path = Path(path)
+        self.hash_files = hash_files
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # updates are only issued from the walker thread; workers queue rows
+        # through record(), which is guarded by a lock
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(_SCHEMA)
+        if reindex:
+            self._db.execute('DELETE FROM files')
+        self._db.commit()
+        self._pending: List[Tuple[str, int, int, int, Optional[str]]] = []
+        self._lock = threading.Lock()
+        # set by open_index: close() then only ends the run, not the connection
+        self.kept_open = False
+
+    def lookup(self, rel: str) -> Optional[Tuple[int, int, int, Optional[str]]]:
+        return self._db.execute('SELECT size, mtime_ns, inode, hash FROM files WHERE path = ?', (rel,)).fetchone()
+
+    def is_unchanged(self, rel: str, st: os.stat_result) -> bool:
+        """True when ``st`` matches the state recorded for ``rel``."""
+        row = self.lookup(rel)
+        return row is not None and row[0] == st.st_size and row[1] == st.st_mtime_ns and row[2] == st.st_ino
+
+    def content_unchanged(self, rel: str, st: os.stat_result, digest: Optional[str]) -> bool:
+        """True when only the metadata changed but the stored hash still matches."""
+        if digest is None:
+            return False
+        row = self.lookup(rel)
+        return row is not None and row[0] == st.st_size and row[3] == digest
+
+    def record(self, rel: str, st: os.stat_result, digest: Optional[str] = None) -> None:
+        """Queue the state of ``rel``; safe to call from copy worker threads."""
+        with self._lock:
+            self._pending.append((rel, st.st_size, st.st_mtime_ns, st.st_ino, digest))
+
+    def flush(self, force: bool = False) -> None:
+        """Write queued rows into the open transaction (walker thread only)."""
+        with self._lock:
+            if not self._pending or (not force and len(self._pending) < _FLUSH_EVERY):
+                return
+            rows, self._pending = self._pending, []
+        self._db.executemany('INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, hash) VALUES (?, ?, ?, ?, ?)', rows)
+
+    def commit(self) -> None:
+        self.flush(force=True)
+        self._db.commit()
+
+    def discard(self) -> None:
+        with self._lock:
+            self._pending = []
+        self._db.rollback()
+
+    def close(self) -> None:
+        if self.kept_open:
+            # rows that were neither committed nor discarded belong to no run
+            self.discard()
+            return
+        try:
+            self._db.close()
+        except Exception:
+            pass
+
+
+def keep_open(enabled: bool) -> None:
+    """Keep indexes returned by ``open_index`` open between runs (or close them all)."""
+    global _OPEN
+    with _OPEN_LOCK:
+        if enabled:
+            _OPEN = _OPEN if _OPEN is not None else {}
+            return
+        opened, _OPEN = _OPEN or {}, None
+    for index in opened.values():
+        index.kept_open = False
+        index.close()
+
+
+def open_index(path: str | Path, reindex: bool = False, hash_files: bool = False) -> FileIndex:
+    """Return a ``FileIndex`` for ``path``, reusing a kept-open one when possible."""
+    with _OPEN_LOCK:
+        index = _OPEN.get(str(path)) if _OPEN is not None else None
+        if index is None:
+            index = FileIndex(path, reindex=reindex, hash_files=hash_files)
+            if _OPEN is not None:
+                index.kept_open = True
+                _OPEN[str(path)] = index
+            return index
+    index.hash_files = hash_files
+    if reindex:
+        index._db.execute('DELETE FROM files')
+        index._db.commit()
+    return index
@@ -0,0 +1,93 @@
+"""Per-user run history.
+
+Every run of a named job is one row in a SQLite database (WAL mode) under
+the state directory. ``start()`` inserts the row as RUNNING and ``finish()``
+fills in the final metrics, so recording a run costs one small write and
+never touches the settings YAML. Concurrent runs each write their own row.
+The full entry dict is kept as JSON; ``latest_per_job()`` feeds the menu.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS runs ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, job TEXT NOT NULL, timestamp TEXT NOT NULL, '
+    'status INTEGER, status_str TEXT NOT NULL, entry TEXT NOT NULL)'
+)
+_INDEX = 'CREATE INDEX IF NOT EXISTS runs_job ON runs (job, id)'
+
+
+def history_path(state_dir: str | Path) -> Path:
+    """Return the history database path; ``PCOPY_HISTORY_PATH`` overrides it."""
+    return Path(os.environ.get('PCOPY_HISTORY_PATH') or (Path(state_dir) / 'history.sqlite'))
+
+
+class RunHistory:
+    """Append-style store of run entries keyed by job name."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(_SCHEMA)
+        self._db.execute(_INDEX)
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def _write(self, sql: str, params: tuple) -> int:
+        with self._lock:
+            cur = self._db.execute(sql, params)
+            self._db.commit()
+            return int(cur.lastrowid or 0)
+
+    def start(self, job: str, entry: Dict[str, Any]) -> int:
+        """Record a new run and return its id."""
+        return self._write(
+            'INSERT INTO runs (job, timestamp, status, status_str, entry) VALUES (?, ?, ?, ?, ?)',
+            (job, entry.get('timestamp', ''), entry.get('status'), entry.get('status_str', 'RUNNING'), json.dumps(entry, default=str)),
+        )
+
+    def finish(self, run_id: Optional[int], job: str, entry: Dict[str, Any]) -> int:
+        """Complete run ``run_id``, or record a new finished run when it is unknown."""
+        if run_id:
+            with self._lock:
+                cur = self._db.execute(
+                    'UPDATE runs SET timestamp = ?, status = ?, status_str = ?, entry = ? WHERE id = ? AND job = ?',
+                    (entry.get('timestamp', ''), entry.get('status'), entry.get('status_str', ''), json.dumps(entry, default=str), run_id, job),
+                )
+                self._db.commit()
+                if cur.rowcount:
+                    return run_id
+        return self.start(job, entry)
+
+    def latest(self, job: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute('SELECT entry FROM runs WHERE job = ? ORDER BY id DESC LIMIT 1', (job,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def latest_per_job(self, finished: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Newest entry per job; ``finished`` skips runs that are still RUNNING."""
+        where = " WHERE status_str != 'RUNNING'" if finished else ''
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT job, entry FROM runs WHERE id IN (SELECT MAX(id) FROM runs{where} GROUP BY job)'
+            ).fetchall()
+        return {job: json.loads(entry) for job, entry in rows}
+
+    def runs(self, job: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent entries for ``job``, newest first."""
+        with self._lock:
+            rows = self._db.execute('SELECT entry FROM runs WHERE job = ? ORDER BY id DESC LIMIT ?', (job, limit)).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
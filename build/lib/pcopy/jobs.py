@@ -0,0 +1,219 @@
+"""Run several named jobs at once.
+
+``run_jobs`` hands the jobs to a ``Scheduler``, which runs up to ``max_jobs``
+of them at a time while capping how many share one disk. Each job also
+takes a ``DestLock`` on its destination: an exclusive ``flock`` on a lock file
+named after the resolved destination path, so two jobs (in this process or in
+another pcopy, e.g. one started from cron) never write the same destination
+at the same time. Runs started one at a time from the command line or the
+menu take the same lock.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .devices import Device, device_for, read_mountinfo
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+QUEUED = 'queued'
+WAITING = 'waiting for disk'
+RUNNING = 'running'
+PASS = 'PASS'
+FAILED = 'FAILED'
+
+# flock() does not exclude threads sharing one open file on every platform,
+# so threads of this process also serialize on a plain lock per path
+_LOCAL_LOCKS: Dict[str, threading.Lock] = {}
+_LOCAL_GUARD = threading.Lock()
+
+
+def lock_path(dest: str | Path, lock_dir: str | Path) -> Path:
+    """Lock file for ``dest``; aliases of the same directory share one lock."""
+    real = os.path.realpath(os.path.expanduser(str(dest)))
+    return Path(lock_dir) / (hashlib.sha1(real.encode('utf8', 'surrogateescape')).hexdigest()[:20] + '.lock')
+
+
+class DestLock:
+    """Exclusive lock on one backup destination, held for a whole run."""
+
+    def __init__(self, dest: str | Path, lock_dir: str | Path, owner: str = '') -> None:
+        self.dest = str(dest)
+        self.path = lock_path(dest, lock_dir)
+        self.owner = owner
+        self._fh = None
+        with _LOCAL_GUARD:
+            self._local = _LOCAL_LOCKS.setdefault(str(self.path), threading.Lock())
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._local.acquire(blocking):
+            return False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fh = open(self.path, 'a+', encoding='utf8')
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    fh.close()
+                    self._local.release()
+                    return False
+            fh.seek(0)
+            fh.truncate()
+            fh.write(f'{os.getpid()} {self.owner} {self.dest}\n')
+            fh.flush()
+            self._fh = fh
+            return True
+        except BaseException:
+            self._local.release()
+            raise
+
+    def release(self) -> None:
+        if self._fh is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            self._fh.close()
+        finally:
+            self._fh = None
+            self._local.release()
+
+    def __enter__(self) -> 'DestLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class Job(NamedTuple):
+    name: str
+    dest: str
+    run: Callable[[], int]
+    source: Optional[str] = None
+    # higher runs first; ties keep the order the jobs were given in
+    priority: int = 0
+    # share of each of its devices' slots the job takes (see Scheduler)
+    weight: int = 1
+
+
+class Scheduler:
+    """Start jobs as soon as every disk they touch has a free slot.
+
+    Each job is placed on the devices behind its source and destination
+    (``pcopy.devices``). At most ``max_jobs`` jobs run at once, and the
+    weights of the jobs running on one device never add up to more than
+    ``device_limit``, so jobs on different disks overlap while jobs that share
+    a spindle queue. A job heavier than the limit still runs, alone on its
+    devices. Every placement and wait is recorded in ``decisions``.
+    """
+
+    def __init__(self, max_jobs: int, lock_dir: str | Path, device_limit: int = 1, on_state: Optional[Callable[[str, str], None]] = None, resolve: Optional[Callable[[str], Device]] = None) -> None:
+        self.max_jobs = max(1, int(max_jobs))
+        self.device_limit = max(1, int(device_limit or 1))
+        self.lock_dir = lock_dir
+        self.notify = on_state or (lambda name, state: None)
+        if resolve is None:
+            mounts = read_mountinfo()
+            resolve = lambda path: device_for(path, mounts)  # noqa: E731
+        self.resolve = resolve
+        self.decisions: List[str] = []
+        self.devices: Dict[str, Tuple[str, ...]] = {}
+        self._load: Dict[str, int] = {}
+        self._holders: Dict[str, List[str]] = {}
+        self._cond = threading.Condition()
+
+    def _place(self, job: Job) -> Tuple[str, ...]:
+        found = [(label, self.resolve(p).key) for label, p in (('source', job.source), ('dest', job.dest)) if p]
+        devs = tuple(dict.fromkeys(key for _, key in found))
+        self.devices[job.name] = devs
+        where = ', '.join(f'{label} on {key}' for label, key in found)
+        extra = f', priority {job.priority}' if job.priority else ''
+        extra += f', weight {job.weight}' if job.weight != 1 else ''
+        self.decisions.append(f'{job.name}: {where or "no paths"}{extra}')
+        return devs
+
+    def _blocked_by(self, job: Job, devs: Tuple[str, ...]) -> List[str]:
+        weight = max(1, int(job.weight or 1))
+        return [d for d in devs if self._load.get(d, 0) and self._load[d] + weight > self.device_limit]
+
+    def _run_one(self, job: Job, devs: Tuple[str, ...], rcs: Dict[str, int], running: List[str]) -> None:
+        log = logging.getLogger('pcopy')
+        weight = max(1, int(job.weight or 1))
+        try:
+            self.notify(job.name, RUNNING)
+            with DestLock(job.dest, self.lock_dir, owner=job.name):
+                rc = job.run()
+        except Exception:
+            log.exception('Job %s failed', job.name)
+            rc = 1
+        self.notify(job.name, PASS if rc == 0 else FAILED)
+        with self._cond:
+            rcs[job.name] = rc
+            running.remove(job.name)
+            for d in devs:
+                self._load[d] -= weight
+                self._holders[d].remove(job.name)
+            self._cond.notify_all()
+
+    def run(self, tasks: Iterable) -> Dict[str, int]:
+        """Run ``Job`` (or ``(name, dest, run)``) tasks; return name -> exit code."""
+        jobs = [t if isinstance(t, Job) else Job(*t) for t in tasks]
+        order = {job.name: i for i, job in enumerate(jobs)}
+        pending = sorted(jobs, key=lambda j: (-int(j.priority or 0), order[j.name]))
+        placed = {job.name: self._place(job) for job in pending}
+        for job in pending:
+            self.notify(job.name, QUEUED)
+        rcs: Dict[str, int] = {}
+        running: List[str] = []
+        threads: List[threading.Thread] = []
+        waited = set()
+        with self._cond:
+            while pending:
+                started = None
+                if len(running) < self.max_jobs:
+                    for job in pending:
+                        blocked = self._blocked_by(job, placed[job.name])
+                        if not blocked:
+                            started = job
+                            break
+                        if job.name not in waited:
+                            waited.add(job.name)
+                            self.notify(job.name, WAITING)
+                            busy = '; '.join(f"{d} busy with {', '.join(self._holders[d])}" for d in blocked)
+                            self.decisions.append(f'{job.name} waits: {busy}')
+                if started is None:
+                    self._cond.wait()
+                    continue
+                pending.remove(started)
+                weight = max(1, int(started.weight or 1))
+                for d in placed[started.name]:
+                    self._load[d] = self._load.get(d, 0) + weight
+                    self._holders.setdefault(d, []).append(started.name)
+                others = f' alongside {", ".join(running)}' if running else ''
+                self.decisions.append(f'{started.name} starts{others}')
+                running.append(started.name)
+                t = threading.Thread(target=self._run_one, args=(started, placed[started.name], rcs, running), name=f'pcopy-job-{started.name}', daemon=True)
+                threads.append(t)
+                t.start()
+        for t in threads:
+            t.join()
+        return {job.name: rcs.get(job.name, 1) for job in jobs}
+
+
+def run_jobs(tasks: Iterable, max_jobs: int, lock_dir: str | Path, on_state: Optional[Callable[[str, str], None]] = None, device_limit: int = 1, resolve: Optional[Callable[[str], Device]] = None) -> Dict[str, int]:
+    """Run tasks with a ``Scheduler``; return name -> exit code.
+
+    ``on_state(name, state)`` is called as each job moves through QUEUED,
+    WAITING, RUNNING and PASS/FAILED. A job that raises counts as exit code 1.
+    """
+    return Scheduler(max_jobs, lock_dir, device_limit=device_limit, on_state=on_state, resolve=resolve).run(tasks)
@@ -0,0 +1,113 @@
+"""Parser for rsync's structured output.
+
+rsync is asked for one machine-readable line per transferred item via
+``--out-format`` (``OUT_FORMAT``: a marker, the itemize flags, the file length
+and the name) plus the ``--info=stats2`` summary. ``RsyncParser.parse`` turns
+each line into one typed event tuple:
+
+* ``('file', name, size, itemize)`` - a file finished; ``size`` is ``None``
+  for plain ``-i``/``-v`` style lines that carry no length
+* ``('progress', percent, speed, bytes)`` - an ``--info=progress2`` update
+* ``('error', message)`` - an ``rsync:``/``rsync error:`` diagnostic
+* ``('stats', key, value, number)`` - one line of the closing summary
+
+Lines are dispatched on their first character so most lines cost one string
+check and at most one precompiled regex match. Once the summary block starts
+the parser switches state and stops looking for file or progress lines.
+"""
+from __future__ import annotations
+
+import re
+from typing import Optional, Tuple
+
+MARKER = 'PCOPY'
+OUT_FORMAT = f'{MARKER} %i %l %n'
+# Arguments that make rsync emit what RsyncParser understands
+RSYNC_OUTPUT_ARGS = [f'--out-format={OUT_FORMAT}', '--info=stats2']
+
+FILE = 'file'
+PROGRESS = 'progress'
+ERROR = 'error'
+STATS = 'stats'
+
+Event = Tuple
+
+_SIZE = re.compile(r'(\d+(?:\.\d+)?)([KMGTP]?)(?![\w.])', re.I)
+_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4, 'P': 1024 ** 5}
+_PROGRESS = re.compile(r'\s*(?:([\d,.]+[KMGTP]?)\s+)?(\d{1,3})%(?:\s+([\d,.]+[KMGTP]?B/s))?')
+_LEGACY_FILE = re.compile(r'[<>ch.]f\S*\s+(.*)')
+_STAT = re.compile(r'((?:Number of|Total|Literal|Matched|File list)[^:]*):\s*(.*)')
+_SUMMARY = re.compile(r'sent ([\d,.]+[KMGTP]?) bytes\s+received ([\d,.]+[KMGTP]?) bytes')
+_TOTAL_SIZE = re.compile(r'total size is ([\d,.]+[KMGTP]?)')
+_ERROR_PREFIXES = ('rsync:', 'rsync error:', 'rsync warning:', 'file has vanished:', 'ERROR:')
+
+
+def parse_size(text: str) -> Optional[int]:
+    """Convert ``'12,345'``, ``'12345 bytes'`` or ``'1.23M'`` to bytes."""
+    m = _SIZE.match(text.strip().replace(',', ''))
+    if not m:
+        return None
+    number, unit = m.group(1), m.group(2).upper()
+    if '.' in number or unit:
+        return int(float(number) * _UNITS[unit])
+    return int(number)
+
+
+class RsyncParser:
+    """Line-at-a-time state machine over rsync output."""
+
+    def __init__(self) -> None:
+        self.in_stats = False
+
+    def parse(self, line: str) -> Optional[Event]:
+        line = line.rstrip('\r\n')
+        if not line:
+            return None
+        if self.in_stats:
+            return self._parse_stats(line)
+        first = line[0]
+        if first == 'P' and line.startswith(MARKER + ' '):
+            return self._parse_item(line)
+        if first == ' ' or first.isdigit():
+            m = _PROGRESS.match(line)
+            if m:
+                done = parse_size(m.group(1)) if m.group(1) else None
+                return (PROGRESS, int(m.group(2)), m.group(3), done)
+        if first in '<>ch.':
+            m = _LEGACY_FILE.match(line)
+            if m:
+                return (FILE, m.group(1).strip(), None, line.split(None, 1)[0])
+        if first in 'rfE' and line.startswith(_ERROR_PREFIXES):
+            return (ERROR, line.strip())
+        if first in 'NTLMF':
+            if line.startswith('Number of files:'):
+                self.in_stats = True
+            return self._parse_stats(line)
+        return None
+
+    def _parse_item(self, line: str) -> Optional[Event]:
+        parts = line.split(' ', 3)
+        if len(parts) < 4:
+            return None
+        _, itemize, length, name = parts
+        # only regular files that were actually sent/received/copied count
+        if len(itemize) < 2 or itemize[1] != 'f' or itemize[0] not in '<>ch':
+            return None
+        return (FILE, name, parse_size(length), itemize)
+
+    def _parse_stats(self, line: str) -> Optional[Event]:
+        m = _STAT.match(line)
+        if m:
+            key, value = m.group(1).strip(), m.group(2).strip()
+            return (STATS, key, value, parse_size(value))
+        m = _SUMMARY.match(line)
+        if m:
+            return (STATS, 'sent', m.group(1), parse_size(m.group(1)))
+        m = _TOTAL_SIZE.match(line)
+        if m:
+            # last line of the summary
+            self.in_stats = False
+            return (STATS, 'total size', m.group(1), parse_size(m.group(1)))
+        if line.startswith(_ERROR_PREFIXES):
+            return (ERROR, line.strip())
+        return None
@@ -0,0 +1,1012 @@
+"""Runner orchestration for pcopy backup, exposes main()."""
+from __future__ import annotations
+
+import argparse
+import logging
+import shlex
+import subprocess
+import sys
+import os
+import time
+from typing import List
+import inspect
+from datetime import datetime
+from pathlib import Path
+
+from .config import SOURCE_DIR, DEST_DIR, SETTINGS_PATH
+from .config import BACKUP_VERSIONS_DIR
+from .cowsay_helper import cowsay_art
+from .rsync_parse import RSYNC_OUTPUT_ARGS
+from .rsync_stream import DEFAULT_STALL_TIMEOUT, RsyncOutput, Watchdog, run_spooled
+
+# The dashboards (rich) and the copy engine (sqlite3, hashlib, ...) are only
+# imported once a backup actually runs, so `pcopy --help` and the argument
+# parsing path stay cheap. The names remain reachable as module attributes.
+_LAZY = {
+    'LiveDashboard': '.dashboard_live',
+    'BackupDashboard': '.dashboard',
+    'perform_backup': '.copy_logic',
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        import importlib
+        return getattr(importlib.import_module(_LAZY[name], __package__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _build_rsync_cmd(source: str, dest: str, dry_run: bool = False, extra: List[str] | None = None, structured: bool = False) -> List[str]:
+    cmd = ['rsync', '-a', '--info=progress2']
+    if structured:
+        # machine-readable per-file lines and summary for the dashboard parser
+        cmd += RSYNC_OUTPUT_ARGS
+    if dry_run:
+        cmd.append('--dry-run')
+    if extra:
+        cmd += extra
+    cmd += [str(source), str(dest)]
+    return cmd
+
+
+def run_backup(source: str | None = None, dest: str | None = None, dry_run: bool = False, boring: bool = False, extra: List[str] | None = None, demo: bool = False, log: bool = False, log_path: str | None = None, name: str | None = None, persist_last_run: bool = True, use_python_copy: bool = True, workers: int | None = None, queue_depth: int | None = None, versions_dir: str | None = None, reindex: bool = False, index_hash: bool = False, delta_threshold: int | None = None, stall_timeout: float | None = None, deadline: float | None = None, fps: float | None = None, dashboard=None) -> int:
+    from .dashboard_live import DEFAULT_FPS, LiveDashboard
+
+    src = source or str(SOURCE_DIR)
+    dst = dest or str(DEST_DIR)
+    # 0 turns the stall watchdog off; only a missing value means the default
+    if stall_timeout is None:
+        stall_timeout = DEFAULT_STALL_TIMEOUT
+
+    # Configure logging when requested
+    logger = None
+    if log:
+        log_file = log_path or os.path.join(os.getcwd(), 'purrfectcopy.log')
+        logger = logging.getLogger('pcopy')
+        logger.setLevel(logging.INFO)
+        # avoid adding multiple handlers on repeated calls
+        if not any(isinstance(h, logging.FileHandler) and getattr(h, 'baseFilename', None) == os.path.abspath(log_file) for h in logger.handlers):
+            fh = logging.FileHandler(log_file, mode='a', encoding='utf8')
+            fh.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message)s'))
+            logger.addHandler(fh)
+        try:
+            logger.info('Starting pcopy run: source=%s dest=%s dry_run=%s demo=%s', source or '-', dest or '-', dry_run, demo)
+        except Exception:
+            pass
+
+    # If demo requested, run the LiveDashboard demo and exit
+    if demo:
+        dash = LiveDashboard(dry_run=dry_run, boring=boring, demo_mode=True, test_mode=True, logger=logger)
+        dash.run_demo()
+        return 0
+
+    # Use the richer Live dashboard for real runs
+    from . import config as _config
+    if not fps:
+        fps = _config.SETTINGS.get('dashboard_fps') if isinstance(_config.SETTINGS, dict) else None
+    # concurrent jobs pass in their row of the shared JobBoard
+    dash = dashboard if dashboard is not None else LiveDashboard(dry_run=dry_run, boring=boring, test_mode=False, logger=logger, fps=float(fps or DEFAULT_FPS))
+    if dashboard is None:
+        # the name `pcopy ctl` and the control API know this run by
+        dash.name = name or f'{src} -> {dst}'
+    # settings are read at import and on reload, before this run starts
+    wall, cpu = _config.take_load_time()
+    if wall:
+        dash.spans.add('config', wall, cpu)
+    dash.start()
+    dash.console.print('Starting backup')
+
+    cmd = _build_rsync_cmd(src, dst, dry_run=dry_run, extra=extra, structured=True)
+    dash.console.print('Running: ' + shlex.join(cmd))
+
+    # Tests can set PCOPY_TEST_MODE to simulate deterministic rsync output;
+    # detect that early so it can be referenced by the python-copy branch.
+    env_test = os.environ.get('PCOPY_TEST_MODE') == '1'
+
+    # If configured to use the Python copy logic, run it directly and avoid
+    # invoking rsync via subprocesses. This provides deterministic behavior
+    # and allows us to test copy semantics (timestamped backups + rsync pass).
+    if use_python_copy and not demo and not env_test:
+        from .control import Cancelled
+        try:
+            # perform_backup will move old copies of changed files into a
+            # per-run versions folder and then run rsync if available (or fall
+            # back to Python copy). An explicit backup_versions_dir setting
+            # applies to every run; otherwise versions live under <dest>/versions.
+            from .copy_logic import perform_backup, DEFAULT_WORKERS, DEFAULT_QUEUE_DEPTH
+            from .delta import DEFAULT_DELTA_THRESHOLD
+            from .file_index import index_path_for
+            if not versions_dir and isinstance(_config.SETTINGS, dict) and _config.SETTINGS.get('backup_versions_dir'):
+                versions_dir = str(BACKUP_VERSIONS_DIR)
+            index_path = index_path_for(_config.STATE_DIR, name, src, dst)
+            res = perform_backup(
+                src, dst, log_file=log_path, dry_run=dry_run,
+                workers=workers or DEFAULT_WORKERS, queue_depth=queue_depth or DEFAULT_QUEUE_DEPTH,
+                versions_dir=versions_dir,
+                index_path=index_path, reindex=reindex, index_hash=index_hash,
+                delta_threshold=DEFAULT_DELTA_THRESHOLD if delta_threshold is None else delta_threshold,
+                signatures_path=index_path.with_name(index_path.stem + '.sigs.sqlite'),
+                on_rsync_line=dash.update_from_rsync_line,
+                stall_timeout=stall_timeout, deadline=deadline,
+                control=dash.control,
+            )
+            if dash.control.cancelled.is_set():
+                return _finish_cancelled_ml(dash, name if persist_last_run else None, dry_run, logger)
+            dash.stall_events = list(res.get('stall_events') or [])
+            # Populate dashboard state for reporting; when rsync ran the
+            # dashboard already saw its output line by line
+            if not res.get('rsync_used'):
+                try:
+                    dash.transferred_bytes = int(res.get('transferred_bytes') or 0)
+                    dash.transferred = f"Total transferred file size: {dash.transferred_bytes} bytes"
+                except Exception:
+                    dash.transferred = ''
+                # files moved count: number of new and updated copies performed
+                dash.files_moved_count = len(res.get('copied_new') or []) + len(res.get('updated') or [])
+            elif res.get('rsync_returncode') and logger:
+                logger.error('rsync failed (returncode=%s). Last output:\n%s', res.get('rsync_returncode'), (res.get('rsync_output') or '')[-4096:])
+            dash.copy_stats = res.get('copy_stats') or {}
+            dash.versions_created = int(res.get('versions_created') or 0)
+            dash.versions_bytes = int(res.get('versions_bytes') or 0)
+            dash.spans.update(res.get('phases'))
+            if res.get('rsync_used'):
+                dash.spans.count('rsync', dash.files_moved_count)
+            if logger:
+                logger.info('Performed python copy: timestamped=%s copied_new=%s rsync_used=%s copy_stats=%s skipped_by_index=%s', len(res.get('timestamped') or []), len(res.get('copied_new') or []), res.get('rsync_used'), dash.copy_stats, res.get('files_skipped'))
+            dash.finish(0, _persist_hook_ml(name if persist_last_run else None, 0, dry_run, dash, logger, 'after python copy'))
+            return 0
+        except Cancelled:
+            return _finish_cancelled_ml(dash, name if persist_last_run else None, dry_run, logger)
+        except Exception:
+            if logger:
+                logger.exception('Python backup logic failed, falling back to subprocess path')
+            # fall through to the old behavior as a last resort
+
+    # Production: stream rsync output live with Popen so dashboard updates in real-time.
+    # For tests, we keep compatibility with subprocess.run monkeypatches by
+    # optionally detecting PCOPY_TEST_MODE and simulating output.
+    env_test = os.environ.get('PCOPY_TEST_MODE') == '1'
+
+    # Mark named job as running so menu shows 'RUNNING' state
+    if name and persist_last_run:
+        try:
+            _mark_run_running_ml(name)
+        except Exception:
+            if logger:
+                logger.exception('Failed to mark job running: %s', name)
+
+    # Simulated streaming for CI/tests
+    if env_test:
+        # produce deterministic simulated rsync-like lines
+        simulated = [
+            ' 10% 0.12MB/s 0:00:01',
+            '>f+++++++++ demo/file1.txt',
+            ' 50% 0.45MB/s 0:00:02',
+            '>f+++++++++ demo/file2.txt',
+            'Total transferred file size: 12345 bytes',
+            '100% 0.00MB/s 0:00:10',
+        ]
+        with dash.spans.span('rsync') as span:
+            for line in simulated:
+                dash.update_from_rsync_line(line)
+                time.sleep(0.001)
+            span.items = dash.files_moved_count
+        dash.console.print(cowsay_art('Backup complete', 'datakitten'))
+        # Persist last run if requested
+        dash.finish(0, _persist_hook_ml(name if persist_last_run else None, 0, dry_run, dash, logger, 'in env_test'))
+        if logger:
+            logger.info('Simulated run finished (test mode)')
+        return 0
+
+    # If running under pytest, prefer the synchronous subprocess.run path so
+    # tests that monkeypatch subprocess.run behave as expected. Otherwise use
+    # streaming Popen for real-time dashboard updates.
+    if 'PYTEST_CURRENT_TEST' in os.environ:
+        # Tests may monkeypatch subprocess.run to raise AttributeError in
+        # order to exercise the Popen fallback. If that happens, fall
+        # through to the streaming Popen code below.
+        output = RsyncOutput(on_line=dash.update_from_rsync_line)
+        try:
+            with dash.spans.span('rsync'):
+                rc2 = run_spooled(cmd, output)
+        except AttributeError:
+            rc2 = None
+        except FileNotFoundError:
+            dash.console.print('rsync not found')
+            dash.console.print(cowsay_art('rsync missing', 'rsyncat'))
+            dash.finish(2)
+            return 2
+
+        if rc2 is not None:
+            if rc2 != 0 and not dry_run:
+                dash.console.print('rsync failed')
+                dash.console.print(cowsay_art('Backup failed', 'backupcat'))
+                if logger:
+                    logger.error('rsync failed (returncode=%s). Last output:\n%s', rc2, output.tail_text(4096))
+                dash.finish(rc2)
+                return rc2
+            dash.console.print(cowsay_art('Backup complete', 'datakitten'))
+            # Persist last run
+            dash.finish(rc2, _persist_hook_ml(name if persist_last_run else None, 0, dry_run, dash, logger, 'in synchronous path'))
+            if logger:
+                logger.info('Synchronous run completed returncode=%s', rc2)
+            return 0
+
+    # Normal streaming with Popen
+    try:
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        except FileNotFoundError:
+            dash.console.print('rsync not found')
+            dash.console.print(cowsay_art('rsync missing', 'rsyncat'))
+            dash.finish(2)
+            return 2
+
+        def _on_line(line: str) -> None:
+            dash.update_from_rsync_line(line)
+            if logger:
+                try:
+                    logger.debug('rsync: %s', line)
+                except Exception:
+                    pass
+
+        output = RsyncOutput(on_line=_on_line)
+        dash.control.attach(proc)
+        watchdog = Watchdog(proc, output, stall_timeout=stall_timeout, deadline=deadline, is_paused=lambda: dash.control.paused).start()
+        try:
+            with dash.spans.span('rsync') as span:
+                assert proc.stdout is not None
+                output.feed_pipe(proc.stdout)
+                ret = proc.wait()
+                span.items = dash.files_moved_count
+        except Exception:
+            proc.kill()
+            ret = getattr(proc, 'returncode', 1)
+        finally:
+            watchdog.stop()
+            dash.control.detach(proc)
+        if dash.control.cancelled.is_set():
+            return _finish_cancelled_ml(dash, name if persist_last_run else None, dry_run, logger)
+        dash.stall_events = list(output.events)
+        if output.events and logger:
+            logger.error('rsync killed by watchdog: %s', output.events[-1])
+
+        if ret != 0 and not dry_run:
+            dash.console.print('rsync failed')
+            dash.console.print(cowsay_art('Backup failed', 'backupcat'))
+            if logger:
+                logger.error('rsync failed (returncode=%s) after streaming run. Last output:\n%s', ret, output.tail_text(4096))
+        else:
+            dash.console.print(cowsay_art('Backup complete', 'datakitten'))
+
+        # Persist last run for named config
+        dash.finish(ret, _persist_hook_ml(name if persist_last_run else None, ret, dry_run, dash, logger, 'in streaming path'))
+        if logger:
+            logger.info('Run finished: returncode=%s files_moved=%s duplicates=%s', ret, dash.files_moved_count, getattr(dash, 'duplicates', 0))
+        return 0 if ret == 0 or dry_run else ret
+    except Exception:
+        # As an absolute last-resort, fall back to synchronous run
+        def _on_fallback_line(line: str) -> None:
+            dash.update_from_rsync_line(line)
+            if logger:
+                try:
+                    logger.debug('rsync (fallback): %s', line)
+                except Exception:
+                    pass
+
+        output = RsyncOutput(on_line=_on_fallback_line)
+        try:
+            rc3 = run_spooled(cmd, output)
+        except FileNotFoundError:
+            dash.console.print('rsync not found')
+            dash.console.print(cowsay_art('rsync missing', 'rsyncat'))
+            dash.finish(2)
+            return 2
+
+        if rc3 != 0 and not dry_run:
+            dash.console.print('rsync failed')
+            dash.console.print(cowsay_art('Backup failed', 'backupcat'))
+            if logger:
+                logger.error('rsync fallback failed (returncode=%s). Output:\n%s', rc3, output.tail_text(4096))
+            dash.finish(rc3)
+            return rc3
+        dash.console.print(cowsay_art('Backup complete', 'datakitten'))
+        dash.finish(rc3, _persist_hook_ml(name if persist_last_run else None, rc3, dry_run, dash, logger, 'in fallback path'))
+        if logger:
+            logger.info('Fallback synchronous run finished: returncode=%s files_moved=%s duplicates=%s', rc3, dash.files_moved_count, getattr(dash, 'duplicates', 0))
+        return 0
+
+    # --- helpers used to record and format last-run metadata (local to this run) ---
+    # --- end helpers ---
+
+# --- Persistence and formatting helpers (module-level) ---
+
+def _parse_transferred_bytes_ml(transferred_str: str | None) -> int | None:
+    if not transferred_str:
+        return None
+    import re
+    m = re.search(r"(\d+)\s*bytes", transferred_str)
+    if m:
+        try:
+            return int(m.group(1))
+        except Exception:
+            return None
+    m = re.search(r"([0-9.]+)\s*([KMGTPE]?)(?:B)?", transferred_str, re.I)
+    if m:
+        try:
+            val = float(m.group(1))
+            unit = m.group(2).upper()
+            mult = {'': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4}.get(unit, 1)
+            return int(val * mult)
+        except Exception:
+            return None
+    return None
+
+
+def _format_bytes_ml(n: int | None) -> str:
+    if n is None:
+        return '0 bytes'
+    try:
+        n = int(n)
+    except Exception:
+        return str(n)
+    if n < 1024:
+        return f"{n} bytes"
+    for unit in ('KB', 'MB', 'GB', 'TB'):
+        n /= 1024.0
+        if n < 1024:
+            return f"{n:.1f}{unit}"
+    return f"{n:.1f}PB"
+
+
+def _format_duration_ml(seconds: float | None) -> str:
+    if seconds is None:
+        return '0s'
+    try:
+        s = int(seconds)
+    except Exception:
+        return str(seconds)
+    if s < 60:
+        return f"{s}s"
+    m, s = divmod(s, 60)
+    if m < 60:
+        return f"{m}m {s}s"
+    h, m = divmod(m, 60)
+    return f"{h}h {m}m {s}s"
+
+
+_HISTORY: dict = {}
+# history row id of the in-progress run per job, set by _mark_run_running_ml
+_RUN_IDS: dict = {}
+
+
+def _history_ml():
+    from . import config as _config
+    from .history import RunHistory, history_path
+    path = history_path(_config.STATE_DIR)
+    hist = _HISTORY.get(path)
+    if hist is None:
+        hist = _HISTORY[path] = RunHistory(path)
+    return hist
+
+
+def _record_run_ml(name: str, entry: dict):
+    """Append ``entry`` to the run history; a RUNNING entry opens a new run."""
+    try:
+        hist = _history_ml()
+        if entry.get('status_str') == 'RUNNING':
+            _RUN_IDS[name] = hist.start(name, entry)
+        else:
+            hist.finish(_RUN_IDS.pop(name, None), name, entry)
+        logging.getLogger('pcopy').info('Recorded %s run for %s in %s', entry.get('status_str'), name, hist.path)
+    except Exception:
+        logging.getLogger('pcopy').exception('Failed to persist last_run for %s', name)
+        return
+    if entry.get('status_str') != 'RUNNING':
+        _export_metrics_ml()
+
+
+def _metrics_text_ml() -> str:
+    """Prometheus text for the last finished run of every job and the runs in progress."""
+    from . import control, metrics
+    return metrics.render(_history_ml().latest_per_job(finished=True), [c.snapshot() for c in control.runs().values()])
+
+
+def _export_metrics_ml() -> None:
+    """Rewrite the node-exporter textfile (``metrics_textfile``) after a run."""
+    from . import config as _config
+    from . import metrics
+    path = metrics.textfile_path(_config.SETTINGS.get('metrics_textfile') if isinstance(_config.SETTINGS, dict) else None)
+    if path is None:
+        return
+    try:
+        # finished runs only: the file is not rewritten while others progress
+        metrics.write_textfile(path, metrics.render(_history_ml().latest_per_job(finished=True)))
+    except Exception:
+        logging.getLogger('pcopy').exception('Failed to write metrics textfile %s', path)
+
+
+def _finish_cancelled_ml(dash, name: str | None, dry_run: bool, logger=None) -> int:
+    """Close out a run stopped through the control API (``pcopy ctl cancel``)."""
+    from .control import EXIT_CANCELLED
+    dash.console.print('Backup cancelled')
+    dash.finish(EXIT_CANCELLED, _persist_hook_ml(name, EXIT_CANCELLED, dry_run, dash, logger, 'after cancel'))
+    if logger:
+        logger.warning('Run cancelled through the control API: %s', dash.control.name)
+    return EXIT_CANCELLED
+
+
+def _persist_hook_ml(name: str | None, status: int | None, dry_run: bool, dash, logger=None, where: str = ''):
+    """Callback for ``dash.finish`` that saves the run entry of job ``name``.
+
+    It runs before the summary is printed, so the 'persist' phase is listed
+    there. Returns None when there is no job to save.
+    """
+    if not name:
+        return None
+
+    def persist() -> None:
+        try:
+            _persist_last_run_entry_ml(name, status, dry_run, dash)
+        except Exception:
+            if logger:
+                logger.exception('Failed to persist last_run for %s %s', name, where)
+    return persist
+
+
+def _mark_run_running_ml(name: str):
+    try:
+        entry = {'timestamp': datetime.now().isoformat(), 'status': None, 'status_str': 'RUNNING'}
+        _record_run_ml(name, entry)
+    except Exception:
+        logging.getLogger('pcopy').exception('Failed to mark running for %s', name)
+
+
+def _persist_last_run_entry_ml(name: str, status: int | None, dry_run_flag: bool, dash):
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        elapsed = None
+        if getattr(dash, 'start_time', None):
+            elapsed = (datetime.now() - dash.start_time).total_seconds()
+    except Exception:
+        elapsed = None
+    try:
+        transferred_bytes = getattr(dash, 'transferred_bytes', None)
+        if not isinstance(transferred_bytes, int):
+            transferred_bytes = _parse_transferred_bytes_ml(getattr(dash, 'transferred', None))
+    except Exception:
+        transferred_bytes = None
+    errors_count = len(getattr(dash, 'errors', []) or [])
+    errors_sample = list(getattr(dash, 'errors', []) or [])[:20]
+    duplicates = getattr(dash, 'duplicates', 0) if hasattr(dash, 'duplicates') else 0
+    # counted by the copy engine as it keeps versions; rsync-only runs keep none
+    versions_created = int(getattr(dash, 'versions_created', 0) or 0)
+    versions_bytes = int(getattr(dash, 'versions_bytes', 0) or 0)
+    entry = {
+        'timestamp': datetime.now().isoformat(),
+        'status': int(status) if status is not None else None,
+        'dry_run': bool(dry_run_flag),
+        'elapsed_seconds': elapsed,
+        'transferred_bytes': transferred_bytes,
+        'errors_count': errors_count,
+        'errors_sample': errors_sample,
+        'duplicates': duplicates,
+        'dupes_saved': versions_created > 0,
+        'versions_created': versions_created,
+        'versions_bytes': versions_bytes,
+        'stall_events': list(getattr(dash, 'stall_events', []) or []),
+        'files_moved': int(getattr(dash, 'files_moved_count', 0) or 0),
+        'status_str': 'PASS' if status == 0 else ('FAILED' if status is not None else 'RUNNING'),
+    }
+    spans = getattr(dash, 'spans', None)
+    if spans is not None:
+        try:
+            # opening the history database is the bulk of the cost; the
+            # final write can't be part of the record it writes
+            _history_ml()
+        except Exception:
+            pass
+        spans.add('persist', time.perf_counter() - wall, time.process_time() - cpu)
+    entry['phases'] = spans.as_dict() if spans is not None else {}
+    _record_run_ml(name, entry)
+
+
+def _with_dest_lock_ml(dest: str | None, owner: str, run) -> int:
+    """Call ``run()`` holding the ``DestLock`` of ``dest``, waiting while another run holds it."""
+    from . import config as _config
+    from .jobs import DestLock
+
+    lock = DestLock(dest or str(DEST_DIR), _config.STATE_DIR / 'locks', owner=owner)
+    if not lock.acquire(blocking=False):
+        print(f"Waiting for {lock.dest}: another pcopy run is writing to it")
+        lock.acquire()
+    try:
+        return run()
+    finally:
+        lock.release()
+
+
+def _named_job_kwargs_ml(name: str, cfg: dict, args, boring: bool = False) -> dict:
+    """run_backup arguments for a named job; CLI values win over the per-job YAML settings."""
+    return dict(
+        source=cfg.get('source'), dest=cfg.get('dest'), dry_run=args.dry_run, boring=boring, log=args.log, log_path=args.log_path,
+        workers=args.workers or cfg.get('workers'), queue_depth=args.queue_depth or cfg.get('queue_depth'),
+        versions_dir=cfg.get('backup_versions_dir'), name=name, reindex=args.reindex, index_hash=bool(cfg.get('index_hash')),
+        delta_threshold=cfg.get('delta_threshold'), stall_timeout=args.stall_timeout if args.stall_timeout is not None else cfg.get('stall_timeout'),
+        deadline=args.deadline or cfg.get('deadline'), fps=args.fps,
+    )
+
+
+def _serve_daemon_ml(args, boring: bool, call) -> int:
+    """Stay resident and run named jobs with a ``schedule`` (see pcopy.daemon)."""
+    import signal
+    from . import config as _config
+    from .daemon import Daemon
+
+    logger = logging.getLogger('pcopy')
+    if args.log:
+        logger.setLevel(logging.INFO)
+
+    def run_due(names):
+        settings = _config.SETTINGS if isinstance(_config.SETTINGS, dict) else {}
+        specs = [(name, _named_job_kwargs_ml(name, settings[name], args, boring)) for name in names if isinstance(settings.get(name), dict)]
+        max_jobs = args.jobs or settings.get('jobs') or 1
+        return _run_concurrent_ml(specs, int(max_jobs), call, dry_run=args.dry_run, log=args.log, live=False)
+
+    daemon = Daemon(run_due, names=args.names or None, logger=logger)
+    previous = {}
+    for sig, handler in ((signal.SIGTERM, lambda *a: daemon.stop()), (signal.SIGINT, lambda *a: daemon.stop()), (getattr(signal, 'SIGHUP', None), lambda *a: daemon.request_reload())):
+        if sig is None:
+            continue
+        try:
+            previous[sig] = signal.signal(sig, handler)
+        except ValueError:
+            # not the main thread (e.g. embedded); rely on stop() instead
+            pass
+    daemon.reload()
+    print(f"pcopy daemon: {len(daemon.schedules)} scheduled jobs")
+    for name, when in sorted(daemon.next_run.items(), key=lambda kv: str(kv[1])):
+        print(f"  {name}: {daemon.schedules[name].expr} (next {when})")
+    try:
+        return daemon.serve()
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+def _run_concurrent_ml(specs, max_jobs: int, call, dry_run: bool = False, fps: float | None = None, log: bool = False, live: bool = True) -> int:
+    """Run ``(name, run_backup kwargs)`` specs on one JobBoard, ``max_jobs`` at a time and scheduled per disk."""
+    from . import config as _config
+    from .dashboard_live import JobBoard
+    from .jobs import Job, Scheduler
+
+    settings = _config.SETTINGS if isinstance(_config.SETTINGS, dict) else {}
+    board = JobBoard(dry_run=dry_run, test_mode=not live or os.environ.get('PCOPY_TEST_MODE') == '1', fps=fps, logger=logging.getLogger('pcopy') if log else None)
+    # `device_jobs` caps the jobs per disk; `priority`/`weight` are per job
+    board.scheduler = scheduler = Scheduler(max_jobs, _config.STATE_DIR / 'locks', device_limit=settings.get('device_jobs') or 1, on_state=board.set_state)
+    tasks = []
+    for name, kwargs in specs:
+        cfg = settings.get(name)
+        if not isinstance(cfg, dict):
+            cfg = {}
+        row = board.add_job(name, str(kwargs.get('dest') or ''))
+        run = lambda kwargs=kwargs, row=row: call(dashboard=row, **kwargs)  # noqa: E731
+        tasks.append(Job(name, kwargs.get('dest') or str(DEST_DIR), run, source=kwargs.get('source') or str(SOURCE_DIR), priority=int(cfg.get('priority') or 0), weight=int(cfg.get('weight') or 1)))
+    board.start()
+    try:
+        rcs = scheduler.run(tasks)
+    finally:
+        board.finish()
+    return next((rc for rc in rcs.values() if rc), 0)
+
+
+def _control_settings_ml(args):
+    """(socket path or None, HTTP port or None) from the CLI, then the settings file."""
+    from . import config as _config
+    from .control import socket_path
+    settings = _config.SETTINGS if isinstance(_config.SETTINGS, dict) else {}
+    path = socket_path(_config.STATE_DIR, args.control_socket or settings.get('control_socket'))
+    port = args.control_http if args.control_http is not None else settings.get('control_http')
+    return path, (int(port) if port not in (None, False, '') else None)
+
+
+def _start_control_ml(args):
+    """Serve the control API for this process; problems only cost the API, never the backup."""
+    from .control import ControlServer
+    path, port = _control_settings_ml(args)
+    if path is None and port is None:
+        return None
+    server = ControlServer(path, port, metrics=_metrics_text_ml)
+    try:
+        return server.start()
+    except OSError as e:
+        server.close()
+        logging.getLogger('pcopy').warning('Control API not available: %s', e)
+        return None
+
+
+def _start_profile_ml(args):
+    """Start the ``--profile`` profiler (see pcopy.profiling)."""
+    from . import config as _config
+    from .profiling import Profiler
+    settings = _config.SETTINGS if isinstance(_config.SETTINGS, dict) else {}
+    out_dir = args.profile_dir or settings.get('profile_dir') or (_config.STATE_DIR / 'profiles')
+    return Profiler(args.profile, Path(out_dir).expanduser()).start()
+
+
+def _control_client_ml(args) -> int:
+    """`pcopy ctl status|pause|resume|cancel [run]` against a running pcopy."""
+    from .control import COMMANDS, request
+    cmd = args.names[0] if args.names else 'status'
+    if cmd not in ('status',) + COMMANDS:
+        print(f"Unknown control command '{cmd}' (status, {', '.join(COMMANDS)})")
+        return 2
+    path, _ = _control_settings_ml(args)
+    if path is None:
+        print('The control socket is switched off')
+        return 2
+    payload = {'cmd': cmd}
+    if cmd != 'status':
+        if len(args.names) < 2:
+            print(f'Usage: pcopy ctl {cmd} <run>')
+            return 2
+        payload['run'] = args.names[1]
+    try:
+        reply = request(path, payload)
+    except OSError as e:
+        print(f'No pcopy is listening on {path}: {e}')
+        return 1
+    if not reply.get('ok'):
+        print(reply.get('error') or 'request failed')
+        return 1
+    runs = reply.get('runs') if cmd == 'status' else [reply['run']]
+    if not runs:
+        print('No running jobs')
+    for run in runs:
+        eta = _format_duration_ml(run.get('eta_seconds')) if run.get('eta_seconds') is not None else '-'
+        print(f"{run['name']}: {run['state']} {run['progress']}% files={run['files']} bytes={_format_bytes_ml(run.get('bytes'))} eta={eta} errors={run['errors_count']}")
+    return 0
+# --- end module-level helpers ---
+
+def main(argv: List[str] | None = None) -> int:
+    # Build the argparse parser early so we can print help when invoked with
+    # no arguments. The interactive menu is now behind the explicit
+    # --menu flag (or PCOPY_MENU=1 env var) to avoid surprising behavior.
+    p = argparse.ArgumentParser(prog='pcopy')
+    p.add_argument('--dry-run', action='store_true', dest='dry_run')
+    p.add_argument('--quiet', action='store_true', dest='quiet')
+    p.add_argument('--boring', action='store_true', dest='boring', help='Alias for --quiet')
+    p.add_argument('--menu', action='store_true', dest='menu', help='Open the interactive menu')
+    p.add_argument('--demo', action='store_true', dest='demo', help='Run interactive demo UI')
+    p.add_argument('--log', action='store_true', dest='log', help='Append a run log to ./purrfectcopy.log')
+    p.add_argument('--log-path', dest='log_path', help='Path to log file (defaults to ./purrfectcopy.log)')
+    p.add_argument('--source', help='Source dir')
+    p.add_argument('--dest', help='Dest dir')
+    p.add_argument('--workers', type=int, dest='workers', help='Copy worker threads for the Python copy engine (default 1)')
+    p.add_argument('--queue-depth', type=int, dest='queue_depth', help='Maximum pending copies between the tree walker and copy workers')
+    p.add_argument('--fps', type=float, help='Dashboard redraws per second (default 8)')
+    p.add_argument('--jobs', '-j', type=int, dest='jobs', help='Run up to N named backups at the same time (default 1)')
+    p.add_argument('--stall-timeout', type=float, dest='stall_timeout', help='Kill rsync after this many seconds without output (default 300, 0 to disable)')
+    p.add_argument('--deadline', type=float, dest='deadline', help='Optional cap on the total rsync run time in seconds')
+    p.add_argument('--reindex', action='store_true', dest='reindex', help='Rebuild the per-job file index instead of trusting it')
+    p.add_argument('--control-socket', dest='control_socket', help="Unix socket for status and pause/resume/cancel (default <state_dir>/control.sock, 'off' to disable)")
+    p.add_argument('--control-http', type=int, dest='control_http', help='Also serve run status read-only over HTTP on 127.0.0.1:PORT')
+    p.add_argument('--profile', choices=['cpu', 'mem', 'io'], help='Profile the run: cProfile and stack samples, tracemalloc per phase, or copy-engine I/O calls per phase')
+    p.add_argument('--profile-dir', dest='profile_dir', help='Where --profile writes its files (default <state_dir>/profiles)')
+    # allow running named backups: `pcopy do <name> [<name2> ...]` or `pcopy run <name>`
+    p.add_argument('action', nargs='?', choices=['do', 'run', 'daemon', 'ctl'], help="Run named backups defined in settings, 'daemon' to run them on their schedules, or 'ctl status|pause|resume|cancel [run]' to control a running pcopy")
+    p.add_argument('names', nargs='*', help='One or more named backup configs to run')
+    # If invoked with no argv at all (i.e. user just typed 'pcopy'), print
+    # the help message and exit. To open the interactive menu run
+    # `pcopy --menu` explicitly.
+    if argv is None:
+        # If there are no CLI args, decide behavior based on whether stdin is a TTY
+        if len(sys.argv) <= 1:
+            if sys.stdin and sys.stdin.isatty():
+                # Interactive TTY with no args -> show the interactive menu (legacy behavior)
+                return _show_menu()
+            else:
+                # Non-interactive/no-args -> print help and exit
+                p.print_help()
+                return 0
+        argv = sys.argv[1:]
+
+    args = p.parse_args(argv)
+
+    if args.action == 'ctl':
+        return _control_client_ml(args)
+    server = None if getattr(args, 'demo', False) else _start_control_ml(args)
+    profiler = _start_profile_ml(args) if args.profile else None
+    try:
+        return _dispatch_ml(args)
+    finally:
+        if profiler is not None:
+            for path in profiler.stop():
+                print(f'Profile written to {path}')
+        if server is not None:
+            server.close()
+
+
+def _dispatch_ml(args) -> int:
+    # boring is alias for quiet
+    boring = args.boring or args.quiet
+    demo_flag = getattr(args, 'demo', False)
+
+    # If the test or monkeypatch replaced run_backup with no 'demo' kwarg,
+    # call the demo flow directly to avoid TypeError for unexpected kwargs.
+    import inspect
+
+    try:
+        sig = inspect.signature(run_backup)
+        supports_demo = 'demo' in sig.parameters
+    except Exception:
+        supports_demo = False
+
+    # Compatibility wrapper so we can call run_backup even when tests monkeypatch
+    import inspect
+
+    def _call_run_backup_compat(**kwargs):
+        try:
+            sig = inspect.signature(run_backup)
+            call_kwargs = {k: v for k, v in kwargs.items() if k in sig.parameters}
+        except Exception:
+            call_kwargs = kwargs
+        return run_backup(**call_kwargs)
+
+    if args.action == 'daemon':
+        return _serve_daemon_ml(args, boring, _call_run_backup_compat)
+
+    # Handle named backup actions: `do` or `run` followed by one or more names
+    if args.action in ('do', 'run') and args.names:
+        from .config import SETTINGS, reload_settings
+
+        # Refresh settings in case the YAML was modified externally
+        try:
+            reload_settings()
+        except Exception:
+            pass
+
+        overall_rc = 0
+        specs = []
+        for name in args.names:
+            cfg = SETTINGS.get(name) if isinstance(SETTINGS, dict) else None
+            if not cfg:
+                print(f"Named backup '{name}' not found in settings")
+                if args.log:
+                    logger = logging.getLogger('pcopy')
+                    logger.error("Named backup '%s' not found in settings", name)
+                overall_rc = 2
+                continue
+            specs.append((name, _named_job_kwargs_ml(name, cfg, args, boring)))
+        max_jobs = args.jobs or (SETTINGS.get('jobs') if isinstance(SETTINGS, dict) else None) or 1
+        if int(max_jobs) > 1 and len(specs) > 1:
+            rc = _run_concurrent_ml(specs, int(max_jobs), _call_run_backup_compat, dry_run=args.dry_run, fps=args.fps, log=args.log)
+            return rc or overall_rc
+        for name, kwargs in specs:
+            rc = _with_dest_lock_ml(kwargs.get('dest'), name, lambda kwargs=kwargs: _call_run_backup_compat(**kwargs))
+            if rc != 0:
+                overall_rc = rc
+        return overall_rc
+
+    # Otherwise call default run_backup
+    kwargs = dict(source=args.source, dest=args.dest, dry_run=args.dry_run, boring=boring, log=args.log, log_path=args.log_path, workers=args.workers, queue_depth=args.queue_depth, reindex=args.reindex, stall_timeout=args.stall_timeout, deadline=args.deadline, fps=args.fps)
+    if supports_demo:
+        kwargs['demo'] = demo_flag
+        if demo_flag:
+            return _call_run_backup_compat(**kwargs)
+    return _with_dest_lock_ml(args.dest, 'default', lambda: _call_run_backup_compat(**kwargs))
+
+
+def _show_menu() -> int:
+    from .config import SETTINGS, SLOGANS, CAT_FACTS
+    from rich.prompt import Prompt
+    from rich.console import Console
+    from rich.table import Table
+    from rich.panel import Panel
+    import random
+
+    console = Console()
+
+    # Local compatibility wrapper so we can call run_backup even when tests monkeypatch
+    import inspect
+
+    def _call_run_backup_compat(**kwargs):
+        try:
+            sig = inspect.signature(run_backup)
+            call_kwargs = {k: v for k, v in kwargs.items() if k in sig.parameters}
+        except Exception:
+            call_kwargs = kwargs
+        return run_backup(**call_kwargs)
+
+    def header_text() -> str:
+        if SLOGANS:
+            return random.choice(SLOGANS)
+        if CAT_FACTS:
+            return random.choice(CAT_FACTS)
+        return "Purrfect Backup"
+
+    try:
+        # Build named list
+        named = []
+        if isinstance(SETTINGS, dict):
+            named = [k for k, v in SETTINGS.items() if isinstance(v, dict)]
+        try:
+            history = _history_ml().latest_per_job()
+        except Exception:
+            history = {}
+
+        console.clear()
+        console.print(Panel(header_text(), title="🐾 Purrfect Backup", subtitle="Interactive"))
+
+        # Enhanced table
+        enhanced = Table(show_header=True, header_style="bold magenta")
+        enhanced.add_column("#", style="dim", width=3)
+        enhanced.add_column("Name")
+        enhanced.add_column("Source")
+        enhanced.add_column("Dest")
+        enhanced.add_column("Last Ran", overflow="ellipsis")
+        enhanced.add_column("Outcome", overflow="ellipsis")
+        enhanced.add_column("Size", overflow="ellipsis")
+        enhanced.add_column("Duration", overflow="ellipsis")
+
+        for i, name in enumerate(named, start=1):
+            cfg = SETTINGS.get(name, {}) if isinstance(SETTINGS, dict) else {}
+            # older releases kept last_run inside the settings file
+            last_run = history.get(name) or cfg.get('last_run') or {}
+            status_str = last_run.get('status_str', 'never')
+            elapsed = last_run.get('elapsed_seconds', 0)
+            transferred = last_run.get('transferred_bytes', 0)
+
+            def _hb(n):
+                try:
+                    n = int(n)
+                except Exception:
+                    return str(n or '0 bytes')
+                if n < 1024:
+                    return f"{n} bytes"
+                for unit in ('KB', 'MB', 'GB'):
+                    n /= 1024.0
+                    if n < 1024:
+                        return f"{n:.1f}{unit}"
+                return f"{n:.1f}TB"
+
+            def _hd(s):
+                try:
+                    s = int(s or 0)
+                except Exception:
+                    return str(s)
+                if s < 60:
+                    return f"{s}s"
+                m, s = divmod(s, 60)
+                if m < 60:
+                    return f"{m}m {s}s"
+                h, m = divmod(m, 60)
+                return f"{h}h {m}m {s}s"
+
+            enhanced.add_row(
+                str(i),
+                name,
+                str(cfg.get('source', '')),
+                str(cfg.get('dest', '')),
+                str(last_run.get('timestamp', 'never')),
+                str(status_str),
+                _hb(transferred),
+                _hd(elapsed)
+            )
+
+        console.print(enhanced)
+
+        # Prompt choice
+        choice = Prompt.ask("Enter a number to run a backup, 'dN' for dry-run, 'c' for custom, 'D' dry-run all, 'R' run all, 'q' to quit", default="")
+        if not choice:
+            return 0
+        choice = choice.strip()
+
+        if choice.lower() == 'q':
+            return 0
+
+        # Custom path: 'c'
+        if choice.lower() == 'c':
+            try:
+                src = Prompt.ask('Enter source', default='')
+                dst = Prompt.ask('Enter dest', default='')
+                # show command preview
+                dry_cmd = _build_rsync_cmd(src, dst, dry_run=True)
+                run_cmd = _build_rsync_cmd(src, dst, dry_run=False)
+                console.print("Full rsync command (dry-run): " + shlex.join(dry_cmd))
+                console.print("Full rsync command (run): " + shlex.join(run_cmd))
+                try:
+                    Prompt.ask("Press [bold]Enter[/bold] to continue...", default="")
+                except Exception:
+                    pass
+                rc = _with_dest_lock_ml(dst, 'custom', lambda: _call_run_backup_compat(source=src, dest=dst, dry_run=False, boring=False))
+                return rc
+            except EOFError:
+                return 0
+            except Exception:
+                console.print('[bold red]Error processing custom choice.[/bold red]')
+                return 1
+
+        # Dry-run named like 'd1'
+        if choice.lower().startswith('d') and len(choice) > 1:
+            try:
+                idx = int(choice[1:])
+                if 1 <= idx <= len(named):
+                    name = named[idx - 1]
+                    cfg = SETTINGS.get(name, {}) if isinstance(SETTINGS, dict) else {}
+                    # show dry-run command preview
+                    dry_cmd = _build_rsync_cmd(cfg.get('source'), cfg.get('dest'), dry_run=True)
+                    console.print("Full rsync command (dry-run): " + shlex.join(dry_cmd))
+                    try:
+                        Prompt.ask("Press [bold]Enter[/bold] to continue...", default="")
+                    except Exception:
+                        pass
+                    rc = _with_dest_lock_ml(cfg.get('dest'), name, lambda: _call_run_backup_compat(source=cfg.get('source'), dest=cfg.get('dest'), dry_run=True, boring=False))
+                    return rc
+            except Exception:
+                pass
+
+        # Plain number selection like '1' to run job N
+        try:
+            if choice.isdigit():
+                idx = int(choice)
+                if 1 <= idx <= len(named):
+                    name = named[idx - 1]
+                    cfg = SETTINGS.get(name, {}) if isinstance(SETTINGS, dict) else {}
+                    dry_cmd = _build_rsync_cmd(cfg.get('source'), cfg.get('dest'), dry_run=True)
+                    run_cmd = _build_rsync_cmd(cfg.get('source'), cfg.get('dest'), dry_run=False)
+                    console.print("Full rsync command (dry-run): " + shlex.join(dry_cmd))
+                    console.print("Full rsync command (run): " + shlex.join(run_cmd))
+                    try:
+                        Prompt.ask("Press [bold]Enter[/bold] to continue...", default="")
+                    except Exception:
+                        pass
+                    rc = _with_dest_lock_ml(cfg.get('dest'), name, lambda: _call_run_backup_compat(source=cfg.get('source'), dest=cfg.get('dest'), dry_run=False, boring=False))
+                    return rc
+        except Exception:
+            pass
+
+        # a top-level `jobs: N` setting runs 'R'/'D' concurrently
+        max_jobs = int((SETTINGS.get('jobs') if isinstance(SETTINGS, dict) else None) or 1)
+
+        # Run all like 'R'
+        if choice.lower() == 'r':
+            try:
+                specs = []
+                for name in named:
+                    cfg = SETTINGS.get(name, {}) if isinstance(SETTINGS, dict) else {}
+                    run_cmd = _build_rsync_cmd(cfg.get('source'), cfg.get('dest'), dry_run=False)
+                    console.print("Full rsync command (run): " + shlex.join(run_cmd))
+                    specs.append((name, dict(source=cfg.get('source'), dest=cfg.get('dest'), dry_run=False, boring=False)))
+                if max_jobs > 1 and len(specs) > 1:
+                    _run_concurrent_ml(specs, max_jobs, _call_run_backup_compat)
+                else:
+                    for name, kwargs in specs:
+                        _with_dest_lock_ml(kwargs.get('dest'), name, lambda kwargs=kwargs: _call_run_backup_compat(**kwargs))
+                return 0
+            except Exception:
+                pass
+
+        # Dry-run all like 'D'
+        if choice.lower() == 'd':
+            try:
+                specs = []
+                for name in named:
+                    cfg = SETTINGS.get(name, {}) if isinstance(SETTINGS, dict) else {}
+                    dry_cmd = _build_rsync_cmd(cfg.get('source'), cfg.get('dest'), dry_run=True)
+                    console.print("Full rsync command (dry-run): " + shlex.join(dry_cmd))
+                    specs.append((name, dict(source=cfg.get('source'), dest=cfg.get('dest'), dry_run=True, boring=False)))
+                if max_jobs > 1 and len(specs) > 1:
+                    _run_concurrent_ml(specs, max_jobs, _call_run_backup_compat, dry_run=True)
+                else:
+                    for name, kwargs in specs:
+                        _with_dest_lock_ml(kwargs.get('dest'), name, lambda kwargs=kwargs: _call_run_backup_compat(**kwargs))
+                return 0
+            except Exception:
+                pass
+
+        console.print('[bold red]Invalid choice.[/bold red]')
+        return 1
+    except Exception:
+        console.print('[bold red]Error displaying menu.[/bold red]')
+        return 1
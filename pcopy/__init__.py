@@ -1,7 +1,28 @@
-"""pcopy package - small helpers and re-exports for the pcopy app."""
-from .config import SLOGANS, SETTINGS, CAT_FACTS, COW_PATH, SOURCE_DIR, DEST_DIR, EXCLUDE_FILE, BACKUP_VERSIONS_DIR
-from .dashboard import BackupDashboard
-from .runner import main
+"""pcopy package - small helpers and re-exports for the pcopy app.
+
+Re-exports are resolved lazily (PEP 562) so ``import pcopy`` does not load
+rich, YAML or the copy engine until one of them is actually used.
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .config import SLOGANS, SETTINGS, CAT_FACTS, COW_PATH, SOURCE_DIR, DEST_DIR, EXCLUDE_FILE, BACKUP_VERSIONS_DIR
+    from .dashboard import BackupDashboard
+    from .runner import main
+
+_LAZY = {
+    'SLOGANS': '.config',
+    'SETTINGS': '.config',
+    'CAT_FACTS': '.config',
+    'COW_PATH': '.config',
+    'SOURCE_DIR': '.config',
+    'DEST_DIR': '.config',
+    'EXCLUDE_FILE': '.config',
+    'BACKUP_VERSIONS_DIR': '.config',
+    'BackupDashboard': '.dashboard',
+    'main': '.runner',
+}
 
 __all__ = [
     'SLOGANS','SETTINGS','CAT_FACTS','COW_PATH','SOURCE_DIR','DEST_DIR','EXCLUDE_FILE','BACKUP_VERSIONS_DIR',
@@ -13,3 +34,13 @@ __version__ = "0.0.1"
 VERSION = __version__
 # Package metadata
 __author__ = "(your name)"
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
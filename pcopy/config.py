@@ -2,8 +2,11 @@
 from __future__ import annotations
 
 import json
+import marshal
+import sys
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, IO, List, Optional
 
 HERE = Path(__file__).resolve().parent
 # Prefer package-local slogans.json (installed with package data); fallback to repo-level slogans.json
@@ -20,31 +23,81 @@ if env_slogans:
         SLOGANS_PATH = env_path
 
 
-def _load_slogans() -> Dict[str, Any]:
+# Parsed settings and slogans are cached in marshal form, keyed by the source
+# file's mtime, size and inode, so unchanged files skip the YAML/JSON parse.
+CACHE_DIR = Path(os.environ.get('PCOPY_CACHE_DIR') or Path(os.environ.get('XDG_CACHE_HOME') or (Path.home() / '.cache')) / 'pcopy')
+_CACHE_FORMAT = (1, marshal.version, sys.version_info[:2])
+# Files modified this recently are parsed but not cached: a second write in
+# the same timestamp tick could otherwise leave the same mtime and size.
+_RACY_SECONDS = 2.0
+
+
+def yaml_load(fh: IO[str]) -> Any:
+    """``yaml.safe_load`` using libyaml's CSafeLoader when it is available."""
+    import yaml
+
+    loader = getattr(yaml, 'CSafeLoader', None)
+    if loader is not None:
+        return yaml.load(fh, Loader=loader)
+    return yaml.safe_load(fh)
+
+
+def _cache_file(path: Path) -> Path:
+    return CACHE_DIR / (str(path.absolute()).strip(os.sep).replace(os.sep, '_') + '.marshal')
+
+
+def _cached_parse(path: Path, parse: Callable[[IO[str]], Any]) -> Any:
+    """Return ``parse`` of ``path``, served from the marshal cache when fresh."""
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+    cache = _cache_file(path)
+    try:
+        with cache.open('rb') as fh:
+            fmt, cached_stamp, data = marshal.load(fh)
+        if fmt == _CACHE_FORMAT and cached_stamp == stamp:
+            return data
+    except Exception:
+        pass
+    with path.open('r', encoding='utf8') as fh:
+        data = parse(fh)
+    if time.time() - st.st_mtime > _RACY_SECONDS:
+        tmp = cache.with_name(f'.{cache.name}.{os.getpid()}')
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            with tmp.open('wb') as fh:
+                # ValueError for values marshal cannot store (e.g. YAML dates)
+                marshal.dump((_CACHE_FORMAT, stamp, data), fh)
+            os.replace(tmp, cache)
+        except (OSError, ValueError):
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+    return data
+
+
+def _load_slogans(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     # Priority: user SETTINGS 'slogans' key > PCOPY_SLOGANS file > packaged slogans.json > defaults
     data: Dict[str, Any] = {}
     try:
         # If user settings file contains slogans, prefer that
-        import yaml
-
-        if SETTINGS_PATH.exists():
-            with SETTINGS_PATH.open('r', encoding='utf8') as fh:
-                user = yaml.safe_load(fh) or {}
-                s = user.get('slogans')
-                cf = user.get('cat_facts')
-                if s or cf:
-                    data['slogans'] = s or []
-                    data['cat_facts'] = cf or []
-                    # Ensure modern key 'quotes' is present for UI code
-                    data['quotes'] = list(data.get('slogans') or [])
-                    return data
+        if settings is None and SETTINGS_PATH.exists():
+            settings = _cached_parse(SETTINGS_PATH, yaml_load)
+        if settings:
+            s = settings.get('slogans')
+            cf = settings.get('cat_facts')
+            if s or cf:
+                data['slogans'] = s or []
+                data['cat_facts'] = cf or []
+                # Ensure modern key 'quotes' is present for UI code
+                data['quotes'] = list(data.get('slogans') or [])
+                return data
     except Exception:
         # ignore; fallback to file-based slogans
         pass
 
     try:
-        with SLOGANS_PATH.open('r', encoding='utf8') as fh:
-            data = json.load(fh) or {}
+        data = _cached_parse(SLOGANS_PATH, json.load) or {}
     except Exception:
         data = {}
 
@@ -59,6 +112,10 @@ def _load_slogans() -> Dict[str, Any]:
     return data
 
 
+# Wall and CPU seconds spent reading settings and slogans since the last
+# take_load_time() call; a run reports them as its 'config' phase.
+_load_time = [0.0, 0.0]
+_load_started = (time.perf_counter(), time.process_time())
 _S = _load_slogans()
 # Preserve the raw slogans data (dict) for stage-based UI and backwards compat.
 SLOGANS_DATA: Dict[str, Any] = _S
@@ -75,29 +132,42 @@ def reload_settings() -> None:
     Callers should re-import symbols or call this to refresh module-level values.
     """
     global SETTINGS, SLOGANS_DATA, SLOGANS, CAT_FACTS, STAGES
+    wall, cpu = time.perf_counter(), time.process_time()
     SETTINGS = _load_settings()
-    SLOGANS_DATA = _load_slogans()
+    # the settings were just read; do not parse the same file a second time
+    SLOGANS_DATA = _load_slogans(SETTINGS if isinstance(SETTINGS, dict) else None)
+    _add_load_time(wall, cpu)
     SLOGANS = list(SLOGANS_DATA.get('quotes') or [])
     CAT_FACTS = list(SLOGANS_DATA.get('cat_facts') or [])
     STAGES = SLOGANS_DATA.get('stages', {})
 
+
+def _add_load_time(wall: float, cpu: float) -> None:
+    _load_time[0] += time.perf_counter() - wall
+    _load_time[1] += time.process_time() - cpu
+
+
+def take_load_time() -> tuple[float, float]:
+    """Wall and CPU seconds spent loading settings since the last call."""
+    wall, cpu = _load_time
+    _load_time[:] = [0.0, 0.0]
+    return wall, cpu
+
 # Optional YAML settings file for named backup configs
 SETTINGS_PATH = Path.home() / '.pcopy-main-backup.yml'
 
 
 def _load_settings() -> Dict[str, Any]:
     try:
-        import yaml
-
         if SETTINGS_PATH.exists():
-            with SETTINGS_PATH.open('r', encoding='utf8') as fh:
-                return yaml.safe_load(fh) or {}
+            return _cached_parse(SETTINGS_PATH, yaml_load) or {}
     except Exception:
         return {}
     return {}
 
 
 SETTINGS = _load_settings()
+_add_load_time(*_load_started)
 
 # Paths
 COW_PATH = HERE.parent / 'cows'
@@ -105,3 +175,5 @@ SOURCE_DIR = Path(SETTINGS.get('source', '.')).resolve()
 DEST_DIR = Path(SETTINGS.get('dest', './backup')).resolve()
 EXCLUDE_FILE = Path(SETTINGS.get('exclude', '.pcopy-exclude'))
 BACKUP_VERSIONS_DIR = Path(SETTINGS.get('backup_versions_dir', str(DEST_DIR / 'versions')))
+# Per-job state (file index, ...) lives here; PCOPY_STATE_DIR overrides the settings key
+STATE_DIR = Path(os.environ.get('PCOPY_STATE_DIR') or SETTINGS.get('state_dir') or (Path.home() / '.pcopy-state')).expanduser()
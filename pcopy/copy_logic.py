@@ -1,105 +1,675 @@
 """Copy/backup logic extracted from the project's shell script.
 
 Provides a Python implementation that:
-- creates timestamped copies of changed files (when source file is newer than dest)
-- copies new files from source to dest when rsync is not used
+- preserves the old destination copy of changed files (when source file is newer
+  than dest) in a per-run folder under the versions directory
+- copies new and changed files from source to dest when rsync is not used
 - optionally runs rsync to perform efficient delta transfer
 
+The source tree is walked exactly once with ``os.scandir``; the same pass
+feeds both the timestamping of changed files and the no-rsync copy of new
+files.
+
 Designed to be testable: callers can disable rsync and assert timestamped file behavior.
 """
 from __future__ import annotations
 
+import logging
 import os
+import queue
 import shutil
-import subprocess
+import stat as stat_mod
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterator, List, Dict, Any, Optional, Set, Tuple
+
+from .control import Cancelled
+from .delta import DEFAULT_BLOCK_SIZE, DEFAULT_DELTA_THRESHOLD, SignatureStore, sync_file
+from .file_index import FileIndex, file_digest, open_index
+from .rsync_parse import RSYNC_OUTPUT_ARGS
+from .rsync_stream import DEFAULT_STALL_TIMEOUT, RsyncOutput, run_streaming
+from .spans import Spans, boundary as span_boundary
+
+try:  # reflinks need ioctl(); not available on Windows
+    import fcntl
+except ImportError:  # pragma: no cover - platform dependent
+    fcntl = None  # type: ignore[assignment]
+
+# Defaults for the pipelined pure-Python copy engine. One worker keeps the
+# historical sequential behaviour; the queue bounds memory while the walker
+# runs ahead of slow destinations.
+DEFAULT_WORKERS = 1
+DEFAULT_QUEUE_DEPTH = 1024
+
+# Copy paths tried by copy_file(), fastest first.
+COPY_METHODS = ('reflink', 'copy_file_range', 'sendfile', 'readinto')
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+_CHUNK = 8 * 1024 * 1024
+_BUFFER_SIZE = 1024 * 1024
+
+
+class _Local(threading.local):
+    # phase the copy helpers report to the I/O counter, see copy_file()
+    io_phase = 'copy'
+
+
+_tls = _Local()
+# (phase, operation, bytes) callback installed by `pcopy --profile io`
+_io_counter: Optional[Callable[[str, str, int], None]] = None
+
+
+def set_io_counter(counter: Optional[Callable[[str, str, int], None]]) -> None:
+    """Count the engine's stat/open/copy calls per phase (``None`` stops counting)."""
+    global _io_counter
+    _io_counter = counter
 
 
-def _timestamped_name(dest: Path) -> Path:
-    """Return a Path for the timestamped copy in the same directory as dest.
+def _reflink(sfd: int, dfd: int) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dfd, _FICLONE, sfd)
+        if _io_counter is not None:
+            _io_counter(_tls.io_phase, 'reflink', os.fstat(sfd).st_size)
+        return True
+    except OSError:
+        return False
 
-    Example: /dest/dir/foo.txt -> /dest/dir/foo.20250926_120000.txt
+
+def _copy_file_range(sfd: int, dfd: int) -> bool:
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    copied = 0
+    while True:
+        try:
+            n = os.copy_file_range(sfd, dfd, _CHUNK)
+        except OSError:
+            # unsupported (EXDEV, ENOSYS, EINVAL...) before any data moved:
+            # let the next method try; a mid-file failure is a real error
+            if copied:
+                raise
+            return False
+        if _io_counter is not None:
+            _io_counter(_tls.io_phase, 'copy_file_range', n)
+        if n == 0:
+            return True
+        copied += n
+
+
+def _sendfile(sfd: int, dfd: int) -> bool:
+    if not hasattr(os, 'sendfile'):
+        return False
+    offset = 0
+    while True:
+        try:
+            n = os.sendfile(dfd, sfd, offset, _CHUNK)
+        except OSError:
+            if offset:
+                raise
+            return False
+        if _io_counter is not None:
+            _io_counter(_tls.io_phase, 'sendfile', n)
+        if n == 0:
+            return True
+        offset += n
+
+
+def _readinto(fsrc, fdst) -> None:
+    # one preallocated buffer per thread, reused for every file
+    buf = getattr(_tls, 'buffer', None)
+    if buf is None:
+        buf = _tls.buffer = bytearray(_BUFFER_SIZE)
+    view = memoryview(buf)
+    while True:
+        n = fsrc.readinto(buf)
+        if _io_counter is not None:
+            _io_counter(_tls.io_phase, 'read', n or 0)
+        if not n:
+            return
+        fdst.write(view[:n])
+        if _io_counter is not None:
+            _io_counter(_tls.io_phase, 'write', n)
+
+
+def copy_file(src: str | Path, dst: str | Path, phase: str = 'copy') -> Tuple[str, int]:
+    """Copy ``src`` to ``dst`` with metadata, like ``shutil.copy2``.
+
+    Tries a ``FICLONE`` reflink, then ``os.copy_file_range``, then
+    ``os.sendfile`` and finally a ``readinto`` loop over a reusable buffer.
+    Returns ``(method, bytes)`` where method is one of ``COPY_METHODS``.
+    ``phase`` only labels the calls counted by ``set_io_counter``.
     """
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    name = dest.name
-    if "." in name:
-        base, ext = name.rsplit('.', 1)
-        new_name = f"{base}.{ts}.{ext}"
-    else:
-        new_name = f"{name}.{ts}"
-    return dest.with_name(new_name)
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        sfd = fsrc.fileno()
+        dfd = fdst.fileno()
+        size = os.fstat(sfd).st_size
+        if _io_counter is not None:
+            # the copy helpers below count under this thread's phase
+            _tls.io_phase = phase
+            _io_counter(phase, 'open', 0)
+            _io_counter(phase, 'open', 0)
+            _io_counter(phase, 'stat', 0)
+        if _reflink(sfd, dfd):
+            method = 'reflink'
+        elif _copy_file_range(sfd, dfd):
+            method = 'copy_file_range'
+        elif _sendfile(sfd, dfd):
+            method = 'sendfile'
+        else:
+            method = 'readinto'
+            _readinto(fsrc, fdst)
+    shutil.copystat(src, dst)
+    if _io_counter is not None:
+        _io_counter(phase, 'copystat', 0)
+    logging.getLogger('pcopy').debug('copied %s -> %s via %s (%s bytes)', src, dst, method, size)
+    return method, size
+
+
+def _iter_files(root: str) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Yield ``(rel_dir, entry)`` for every file below ``root``.
+
+    Uses ``os.scandir`` so the ``DirEntry`` (and its cached stat data) can be
+    reused by callers. Entries are yielded as the directory is read, so very
+    large flat directories are streamed rather than listed up front. Like
+    ``os.walk`` the walker does not descend into symlinked directories, and
+    unreadable directories are skipped.
+    """
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        try:
+            it = os.scandir(os.path.join(root, rel_dir) if rel_dir else root)
+        except OSError:
+            continue
+        if _io_counter is not None:
+            _io_counter('walk', 'scandir', 0)
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            pending.append(os.path.join(rel_dir, entry.name) if rel_dir else entry.name)
+                    elif entry.is_file():
+                        yield rel_dir, entry
+                except OSError:
+                    continue
+
+
+class _DirCache:
+    """Create destination directories at most once per run."""
+
+    def __init__(self) -> None:
+        self._made: Set[str] = set()
+
+    def ensure(self, path: str) -> None:
+        if path in self._made:
+            return
+        # makedirs(exist_ok=True) is safe when copy workers race on a parent
+        os.makedirs(path, exist_ok=True)
+        self._made.add(path)
+
+
+class _VersionStore:
+    """Keep old destination files as versions in one per-run folder.
+
+    The run timestamp is taken once when the store is created; the run
+    folder is claimed with ``os.mkdir`` so two runs started in the same
+    second never share one, and an existing version is never overwritten.
+    ``preserve`` moves versions with an O(1) rename when the versions folder
+    is on the same filesystem as the destination; otherwise they are copied
+    with ``copy_file`` (which prefers a reflink) and the fresh copy
+    overwrites the original afterwards. ``clone`` keeps a version only if it
+    can be a reflink and leaves the original in place, so a block delta or
+    rsync can patch it without rewriting unchanged blocks; after the first
+    failed reflink it stops trying for the rest of the run. ``created`` and
+    ``bytes`` count the versions kept by this run, so callers never have to
+    scan the versions tree.
+    """
+
+    def __init__(self, versions_dir: Path, dirs: _DirCache) -> None:
+        self.dirs = dirs
+        self.run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.run_dir = str(versions_dir / self.run_ts)
+        # only pick a non-clashing folder once the first version is needed
+        self._ready = False
+        self._can_clone = True
+        self.created = 0
+        self.bytes = 0
+
+    def _ensure_run_dir(self) -> None:
+        if self._ready:
+            return
+        base = self.run_dir
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        n = 0
+        while True:
+            try:
+                os.mkdir(self.run_dir)
+                break
+            except FileExistsError:
+                n += 1
+                self.run_dir = f"{base}_{n}"
+        self.dirs.ensure(self.run_dir)
+        self._ready = True
+
+    def _version_path(self, rel_dir: str, name: str) -> str:
+        self._ensure_run_dir()
+        target_dir = os.path.join(self.run_dir, rel_dir) if rel_dir else self.run_dir
+        self.dirs.ensure(target_dir)
+        version = os.path.join(target_dir, name)
+        if os.path.lexists(version):
+            raise FileExistsError(f"version already exists: {version}")
+        return version
+
+    def clone(self, path: str, rel_dir: str, name: str, size: int = 0) -> Optional[str]:
+        """Reflink ``path`` into the run folder; None when the filesystem cannot clone it."""
+        if not self._can_clone:
+            return None
+        version = self._version_path(rel_dir, name)
+        with open(path, 'rb') as fsrc, open(version, 'xb') as fdst:
+            _tls.io_phase = 'versions'
+            cloned = _reflink(fsrc.fileno(), fdst.fileno())
+        if not cloned:
+            os.unlink(version)
+            self._can_clone = False
+            return None
+        shutil.copystat(path, version)
+        self.created += 1
+        self.bytes += size
+        return version
+
+    def preserve(self, path: str, rel_dir: str, name: str, size: int = 0) -> Tuple[str, str]:
+        """Move ``path`` into the run folder; return ``(version_path, method)``."""
+        version = self._version_path(rel_dir, name)
+        try:
+            os.rename(path, version)
+            method = 'rename'
+            if _io_counter is not None:
+                _io_counter('versions', 'rename', 0)
+        except OSError:
+            # another filesystem: copy it, the fresh copy replaces the original
+            method, _ = copy_file(path, version, phase='versions')
+        self.created += 1
+        self.bytes += size
+        return version, method
 
 
-def perform_backup(source: str | Path, dest: str | Path, log_file: Optional[str] = None, run_rsync: bool = True) -> Dict[str, Any]:
+class _CopyPipeline:
+    """Producer/consumer copy stage fed by the tree walker.
+
+    With ``workers <= 1`` copies run inline on the walker thread. Otherwise a
+    pool of worker threads consumes ``(kind, src, dst, target_dir)`` items from
+    a bounded queue so the walker never holds more than ``queue_depth``
+    pending copies in memory while the destination is kept busy.
+    """
+
+    def __init__(self, dirs: _DirCache, workers: int = DEFAULT_WORKERS, queue_depth: int = DEFAULT_QUEUE_DEPTH, index: Optional[FileIndex] = None, signatures: Optional[SignatureStore] = None, control: Any = None, spans: Optional[Spans] = None) -> None:
+        self.dirs = dirs
+        self.control = control
+        # each copy is charged to the 'copy' phase with its thread's CPU time
+        self.spans = spans if spans is not None else Spans()
+        self.index = index
+        self.signatures = signatures
+        self.workers = max(1, int(workers or 1))
+        self.results: Dict[str, List[str]] = {'copied_new': [], 'updated': []}
+        # bytes and files per copy method, see copy_file()
+        self.copy_stats: Dict[str, Dict[str, int]] = {}
+        # block delta totals for large modified files, see delta.sync_file()
+        self.delta_stats: Dict[str, int] = {'files': 0, 'matched': 0, 'literal': 0, 'written': 0}
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._threads: List[threading.Thread] = []
+        if self.workers > 1:
+            self._queue = queue.Queue(maxsize=max(1, int(queue_depth or DEFAULT_QUEUE_DEPTH)))
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f'pcopy-copy-{i}', daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, kind: str, src: str, dst: str, target_dir: Optional[str] = None, state: Optional[Tuple[str, os.stat_result, Optional[str]]] = None, basis: Optional[Tuple[str, str, os.stat_result]] = None) -> None:
+        """Queue a copy.
+
+        ``state`` is recorded in the file index once the copy succeeds.
+        ``basis`` is ``(rel, old_copy, old_stat)`` for a large modified file
+        that should be updated with a block delta instead of a full copy.
+        """
+        if self._queue is None:
+            self._copy(kind, src, dst, target_dir, state, basis)
+        else:
+            # blocks when the queue is full, throttling the walker
+            self._queue.put((kind, src, dst, target_dir, state, basis))
+
+    def close(self) -> None:
+        """Wait for all queued copies to finish and stop the workers."""
+        if self._queue is None:
+            return
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+
+    def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._copy(*item)
+
+    def totals(self) -> Dict[str, int]:
+        with self._lock:
+            return {'files': sum(st['files'] for st in self.copy_stats.values()), 'bytes': sum(st['bytes'] for st in self.copy_stats.values())}
+
+    def _copy(self, kind: str, src: str, dst: str, target_dir: Optional[str], state: Optional[Tuple[str, os.stat_result, Optional[str]]] = None, basis: Optional[Tuple[str, str, os.stat_result]] = None) -> None:
+        if self.control is not None:
+            try:
+                self.control.checkpoint()
+            except Cancelled:
+                if kind == 'copied_new' or basis is not None:
+                    # drain the queue without copying; the walker raises
+                    return
+                # the old file was already moved into the versions folder:
+                # finish this copy so the destination keeps the file
+        delta = None
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            if target_dir is not None:
+                self.dirs.ensure(target_dir)
+            if basis is not None:
+                try:
+                    delta = self._delta(src, dst, *basis)
+                except Exception:
+                    # the destination may be half patched: rewrite it in full
+                    logging.getLogger('pcopy').debug('delta %s -> %s failed, copying', src, dst, exc_info=True)
+            if delta is not None:
+                method, nbytes = 'delta', delta['written']
+            else:
+                method, nbytes = copy_file(src, dst)
+        except Exception:
+            # ignore per-file errors and continue
+            self.spans.add('copy', time.perf_counter() - wall, time.thread_time() - cpu)
+            return
+        self.spans.add('copy', time.perf_counter() - wall, time.thread_time() - cpu, items=1)
+        with self._lock:
+            if delta is not None:
+                self.delta_stats['files'] += 1
+                for key in ('matched', 'literal', 'written'):
+                    self.delta_stats[key] += delta[key]
+            self.results[kind].append(dst)
+            stats = self.copy_stats.setdefault(method, {'files': 0, 'bytes': 0})
+            stats['files'] += 1
+            stats['bytes'] += nbytes
+        if self.index is not None and state is not None:
+            self.index.record(*state)
+
+    def _delta(self, src: str, dst: str, rel: str, old_copy: str, old_stat: os.stat_result) -> Dict[str, int]:
+        # inline copies share the walker thread, which just cloned the old
+        # copy under 'versions'; the patch itself is part of the copy
+        _tls.io_phase = 'copy'
+        sig = self.signatures.get(rel, old_stat, DEFAULT_BLOCK_SIZE) if self.signatures is not None else None
+        stats, new_sig = sync_file(src, dst, old_copy, sig=sig)
+        if _io_counter is not None:
+            _io_counter(_tls.io_phase, 'delta', stats['written'])
+        if self.signatures is not None:
+            self.signatures.put(rel, os.stat(dst), new_sig)
+        logging.getLogger('pcopy').debug('delta %s -> %s: %s', src, dst, stats)
+        return stats
+
+
+def _dest_stat(path: str) -> Optional[os.stat_result]:
+    """Return the stat of ``path`` or None if it does not exist (one syscall)."""
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return st if stat_mod.S_ISREG(st.st_mode) else None
+
+
+def perform_backup(source: str | Path, dest: str | Path, log_file: Optional[str] = None, run_rsync: bool = True, workers: int = DEFAULT_WORKERS, queue_depth: int = DEFAULT_QUEUE_DEPTH, versions_dir: str | Path | None = None, index_path: str | Path | None = None, reindex: bool = False, index_hash: bool = False, delta_threshold: Optional[int] = DEFAULT_DELTA_THRESHOLD, signatures_path: str | Path | None = None, on_rsync_line: Optional[Callable[[str], None]] = None, stall_timeout: Optional[float] = DEFAULT_STALL_TIMEOUT, deadline: Optional[float] = None, control: Any = None, dry_run: bool = False) -> Dict[str, Any]:
+    """Back up ``source`` into ``dest``.
+
+    Old copies of changed files are kept under ``versions_dir`` (default
+    ``<dest>/versions``) in a folder named after the run timestamp; their
+    paths, count and old sizes are returned in ``timestamped``,
+    ``versions_created`` and ``versions_bytes``. When rsync does the transfer
+    the old copy is reflinked where the filesystem allows it, so rsync keeps
+    its delta basis and only changed blocks are written; otherwise it is
+    moved like in a Python run and rsync writes the whole new file
+    (``--whole-file``). Either way the new data is written once. A moved old
+    copy is only in the versions folder until rsync has written the new one.
+    ``workers`` and ``queue_depth`` configure the copy pipeline used (without
+    rsync) for new and changed files; see ``_CopyPipeline``.
+
+    With ``index_path`` a ``FileIndex`` remembers the source state of the last
+    successful run: files whose size, mtime and inode still match are skipped
+    without statting the destination. ``reindex`` rebuilds it from scratch and
+    ``index_hash`` also stores content hashes so touched-but-identical files
+    are skipped too. Files removed from the destination by hand are only
+    restored by rsync or after a reindex.
+
+    Without rsync, modified files of at least ``delta_threshold`` bytes
+    (``None`` disables it) are patched in place with a block delta (see
+    ``pcopy.delta``) when the old copy can be kept as a reflink; otherwise
+    they are copied in full. Block signatures are kept in ``signatures_path``.
+
+    rsync output is streamed line by line to ``on_rsync_line``; only a
+    bounded tail is returned in ``rsync_output``. rsync is killed when its
+    output stalls for ``stall_timeout`` seconds or the run passes
+    ``deadline`` seconds; such events are returned in ``stall_events``.
+
+    ``control`` (a ``pcopy.control.RunControl``) pauses the walker, the copy
+    workers and rsync on request; a cancel raises ``Cancelled`` from the
+    walk or terminates rsync. Queued copies are dropped, except those whose
+    old destination file was already moved into the versions folder.
+
+    ``dry_run`` changes nothing: no versions are kept, no files are copied,
+    rsync runs with ``--dry-run`` and the index is not updated.
+    ``copied_new`` and ``updated`` list the files a real run would write.
+
+    ``phases`` holds ``pcopy.spans`` timings for ``walk`` (scanning and
+    comparing only), ``versions``, ``copy`` (summed over workers) and
+    ``rsync``.
+    """
     src = Path(source)
     dst = Path(dest)
     if not src.exists():
         raise FileNotFoundError(f"source not found: {src}")
     dst.mkdir(parents=True, exist_ok=True)
 
+    # Decide up front whether rsync will do the transfer so a single walk can
+    # serve both the version pass and the Python copy of new/changed files.
+    rsync_avail = shutil.which('rsync') is not None
+    use_rsync = run_rsync and rsync_avail
+
+    dirs = _DirCache()
+    dirs.ensure(str(dst))
+    index = open_index(index_path, reindex=reindex, hash_files=index_hash) if index_path else None
+    signatures = SignatureStore(signatures_path) if (signatures_path and not use_rsync and not dry_run and delta_threshold is not None) else None
+    spans = Spans()
+    pipeline = _CopyPipeline(dirs, workers=workers, queue_depth=queue_depth, index=index, signatures=signatures, control=control, spans=spans)
+    if control is not None:
+        control.counters = pipeline.totals
+    versions = _VersionStore(Path(versions_dir) if versions_dir else dst / 'versions', dirs)
     timestamped: List[str] = []
-    copied_new: List[str] = []
-
-    # PART 1: Timestamp changed files (source newer than destination)
-    for root, _dirs, files in os.walk(src):
-        rootp = Path(root)
-        rel_root = rootp.relative_to(src)
-        target_root = dst.joinpath(rel_root)
-        for fname in files:
-            sfn = rootp / fname
-            tfn = target_root / fname
-            if tfn.exists():
+    # what a dry run would copy, as ``(kind, destination)``
+    planned: List[Tuple[str, str]] = []
+    version_methods: Dict[str, int] = {}
+    src_root = str(src)
+    dst_root = str(dst)
+    files_scanned = 0
+    files_skipped = 0
+    # the walk's own time excludes keeping versions and, with one worker,
+    # the copies that run inline on this thread
+    walk_wall, walk_cpu = time.perf_counter(), time.thread_time()
+
+    try:
+        for rel_dir, entry in _iter_files(src_root):
+            if control is not None:
+                control.checkpoint()
+            files_scanned += 1
+            rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            try:
+                sst = entry.stat()
+            except OSError:
+                continue
+            if _io_counter is not None:
+                _io_counter('walk', 'stat', 0)
+            state: Optional[Tuple[str, os.stat_result, Optional[str]]] = None
+            if index is not None:
+                # one source stat against the index; the destination is only
+                # looked at for files that changed since the last good run
+                if index.is_unchanged(rel, sst):
+                    files_skipped += 1
+                    continue
+                digest = None
+                if index.hash_files:
+                    try:
+                        digest = file_digest(entry.path)
+                        if _io_counter is not None:
+                            _io_counter('walk', 'hash', sst.st_size)
+                    except OSError:
+                        digest = None
+                state = (rel, sst, digest)
+                if index.content_unchanged(rel, sst, digest):
+                    index.record(*state)
+                    files_skipped += 1
+                    continue
+                index.flush()
+            target_dir = os.path.join(dst_root, rel_dir) if rel_dir else dst_root
+            tfn = os.path.join(target_dir, entry.name)
+            tst = _dest_stat(tfn)
+            if _io_counter is not None:
+                _io_counter('walk', 'stat', 0)
+            if tst is not None:
+                # PART 1: Preserve the old copy of changed files (source newer
+                # than destination) so the new data is written exactly once.
                 try:
-                    if sfn.stat().st_mtime > tfn.stat().st_mtime:
-                        tfn.parent.mkdir(parents=True, exist_ok=True)
-                        ts_dest = _timestamped_name(tfn)
-                        shutil.copy2(sfn, ts_dest)
-                        timestamped.append(str(ts_dest))
+                    if sst.st_mtime <= tst.st_mtime:
+                        if index is not None and state is not None:
+                            index.record(*state)
+                        continue
+                    if dry_run:
+                        planned.append(('updated', tfn))
+                        continue
+                    kept_at, kept_cpu = time.perf_counter(), time.thread_time()
+                    # a block delta only pays off when the old copy can be
+                    # cloned and the destination patched in place; rsync
+                    # patches a cloned original the same way
+                    patch = not use_rsync and delta_threshold is not None and sst.st_size >= delta_threshold and tst.st_size >= DEFAULT_BLOCK_SIZE
+                    try:
+                        version = versions.clone(tfn, rel_dir, entry.name, tst.st_size) if (patch or use_rsync) else None
+                        if version is not None:
+                            method = 'reflink'
+                        else:
+                            patch = False
+                            version, method = versions.preserve(tfn, rel_dir, entry.name, tst.st_size)
+                    finally:
+                        spans.add('versions', time.perf_counter() - kept_at, time.thread_time() - kept_cpu)
                 except Exception:
                     # ignore per-file errors and continue
                     continue
+                timestamped.append(version)
+                version_methods[method] = version_methods.get(method, 0) + 1
+                if not use_rsync:
+                    basis = (rel, version, tst) if patch else None
+                    pipeline.submit('updated', entry.path, tfn, state=state, basis=basis)
+                elif index is not None and state is not None:
+                    index.record(*state)
+            elif dry_run:
+                planned.append(('copied_new', tfn))
+            elif not use_rsync:
+                # PART 2 (no rsync): copy files that are new in the destination
+                pipeline.submit('copied_new', entry.path, tfn, target_dir, state=state)
+            elif index is not None and state is not None:
+                index.record(*state)
+    except BaseException:
+        pipeline.close()
+        if signatures is not None:
+            signatures.close(commit=False)
+        if index is not None:
+            index.discard()
+            index.close()
+        raise
+    walk_wall, walk_cpu = time.perf_counter() - walk_wall, time.thread_time() - walk_cpu
+    span_boundary('walk')
+    pipeline.close()
+    if signatures is not None:
+        signatures.close()
+    inline = spans.as_dict()
+    for phase in ('versions', 'copy') if pipeline.workers <= 1 else ('versions',):
+        walk_wall -= inline.get(phase, {}).get('wall_seconds', 0.0)
+        walk_cpu -= inline.get(phase, {}).get('cpu_seconds', 0.0)
+    spans.add('walk', max(0.0, walk_wall), max(0.0, walk_cpu), items=files_scanned)
+    spans.count('versions', versions.created)
+    span_boundary('copy')
+
+    for kind, path in planned:
+        pipeline.results[kind].append(path)
+    copied_new = pipeline.results['copied_new']
 
     # PART 2: Copy new/updated files — if rsync is available and requested, use it
-    rsync_avail = shutil.which('rsync') is not None
     rsync_used = False
     rsync_output = None
-    if run_rsync and rsync_avail:
+    rsync_returncode = None
+    stall_events: List[Dict[str, Any]] = []
+    if use_rsync:
+        # without a cloned original in place there is no basis to diff against
+        whole_file = '--no-whole-file' if 'reflink' in version_methods else '--whole-file'
         cmd = [
-            'rsync', '-avh', '--progress2', '--partial', '--no-whole-file', '--inplace', '--update'
-        ]
+            'rsync', '-a', '--info=progress2', '--partial', whole_file, '--inplace', '--update'
+        ] + RSYNC_OUTPUT_ARGS
         if log_file:
             cmd += ['--log-file', str(log_file)]
         # Ensure we copy contents of source into dest (trailing slash semantics)
+        if dry_run:
+            cmd.append('--dry-run')
         cmd += [str(src) + os.path.sep, str(dst)]
-        try:
-            proc = subprocess.run(cmd, capture_output=True, text=True, check=False, timeout=600)
-            rsync_used = True
-            rsync_output = proc.stdout + '\n' + proc.stderr
-        except Exception as e:
-            rsync_output = f"rsync failed: {e}"
-
+        rsync_ok = False
+        out = RsyncOutput(on_line=on_rsync_line)
+        with spans.span('rsync'):
+            try:
+                rsync_returncode = run_streaming(cmd, out, stall_timeout=stall_timeout, deadline=deadline, control=control)
+                rsync_used = True
+                rsync_ok = rsync_returncode == 0
+                rsync_output = out.tail_text()
+            except Exception as e:
+                rsync_output = f"rsync failed: {e}\n{out.tail_text()}".rstrip()
+        stall_events = out.events
     else:
-        # Perform a simple copy of new files when rsync is not used
-        for root, _dirs, files in os.walk(src):
-            rootp = Path(root)
-            rel_root = rootp.relative_to(src)
-            target_root = dst.joinpath(rel_root)
-            for fname in files:
-                sfn = rootp / fname
-                tfn = target_root / fname
-                if not tfn.exists():
-                    tfn.parent.mkdir(parents=True, exist_ok=True)
-                    try:
-                        shutil.copy2(sfn, tfn)
-                        copied_new.append(str(tfn))
-                    except Exception:
-                        continue
+        rsync_ok = True
+
+    # Index rows queued for rsync-handled files only describe a good state
+    # once rsync finished cleanly; otherwise retry everything next run.
+    if index is not None:
+        try:
+            if rsync_ok and not dry_run:
+                index.commit()
+            else:
+                index.discard()
+        finally:
+            index.close()
 
+    phases = spans.as_dict()
     return {
         'timestamped': timestamped,
         'copied_new': copied_new,
+        'updated': pipeline.results['updated'],
+        'versions_dir': versions.run_dir if timestamped else None,
+        'version_methods': version_methods,
+        'versions_created': versions.created,
+        'versions_bytes': versions.bytes,
+        'files_scanned': files_scanned,
+        'files_skipped': files_skipped,
+        'index_path': str(index_path) if index_path else None,
+        'copy_stats': pipeline.copy_stats,
+        'delta_stats': pipeline.delta_stats,
         'rsync_used': rsync_used,
         'rsync_output': rsync_output,
+        'rsync_returncode': rsync_returncode,
+        'stall_events': stall_events,
+        'phases': {name: phases[name] for name in ('walk', 'versions', 'copy', 'rsync') if name in phases},
+        'transferred_bytes': None if rsync_used else sum(st['bytes'] for st in pipeline.copy_stats.values()),
     }
@@ -0,0 +1,104 @@
+"""Cron-style schedules for ``pcopy daemon``.
+
+``CronSchedule`` understands the classic five fields (minute, hour, day of
+month, month, day of week) with ``*``, ``a-b``, ``*/n``, ``a-b/n``, lists,
+month and weekday names, and the ``@hourly``/``@daily``/``@weekly``/
+``@monthly``/``@yearly`` shortcuts. As in cron, when both day fields are
+restricted a day matches if either of them does. Times are naive local
+datetimes with minute resolution.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import FrozenSet, Optional, Sequence
+
+ALIASES = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+_MONTHS = ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec')
+_DAYS = ('sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat')
+# give up looking for a match after this long (e.g. "0 0 30 2 *")
+_HORIZON = timedelta(days=366 * 5)
+
+
+def _value(text: str, names: Sequence[str], offset: int) -> int:
+    low = text.lower()
+    if low in names:
+        return names.index(low) + offset
+    return int(text)
+
+
+def _parse_field(text: str, lo: int, hi: int, names: Sequence[str] = (), offset: int = 0) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(','):
+        rng, _, step_text = part.partition('/')
+        step = int(step_text) if step_text else 1
+        if step < 1:
+            raise ValueError(f'bad step in {text!r}')
+        if rng == '*':
+            start, end = lo, hi
+        elif '-' in rng:
+            a, b = rng.split('-', 1)
+            start, end = _value(a, names, offset), _value(b, names, offset)
+        else:
+            start = _value(rng, names, offset)
+            end = hi if step_text else start
+        if not (lo <= start <= hi and lo <= end <= hi) or start > end:
+            raise ValueError(f'{part!r} is outside {lo}-{hi}')
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """A parsed cron expression; ``next_after`` gives the next matching minute."""
+
+    def __init__(self, expr: str) -> None:
+        self.expr = expr.strip()
+        fields = ALIASES.get(self.expr.lower(), self.expr).split()
+        if len(fields) != 5:
+            raise ValueError(f'cron expression needs 5 fields: {expr!r}')
+        minute, hour, dom, month, dow = fields
+        self.minutes = _parse_field(minute, 0, 59)
+        self.hours = _parse_field(hour, 0, 23)
+        self.days = _parse_field(dom, 1, 31)
+        self.months = _parse_field(month, 1, 12, _MONTHS, 1)
+        # 0 and 7 are both Sunday
+        self.weekdays = frozenset(d % 7 for d in _parse_field(dow, 0, 7, _DAYS, 0))
+        self._any_day = dom == '*'
+        self._any_weekday = dow == '*'
+
+    def __repr__(self) -> str:
+        return f'CronSchedule({self.expr!r})'
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def matches(self, dt: datetime) -> bool:
+        return dt.month in self.months and self._day_matches(dt) and dt.hour in self.hours and dt.minute in self.minutes
+
+    def next_after(self, dt: datetime) -> Optional[datetime]:
+        """First matching minute strictly after ``dt`` (``None`` if it never matches)."""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        end = dt + _HORIZON
+        while t <= end:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        return None
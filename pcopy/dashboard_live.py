@@ -2,18 +2,21 @@
 
 Provides a Live-driven multi-panel UI with demo and test modes for safe
 rendering during tests/CI.
+
+Parsing and rendering are decoupled: ``update_from_rsync_line`` only updates
+plain state attributes, and a render thread redraws the layout at ``fps``
+frames per second, so a fast rsync is never throttled by Rich.
 """
 from __future__ import annotations
 
 import os
 import random
-import re
-import subprocess
+import threading
 import time
 from datetime import datetime
 import sys
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional
 import logging
 
 from rich.console import Console
@@ -24,12 +27,17 @@ from rich.progress import Progress, BarColumn, TextColumn
 from rich.table import Table
 from rich.text import Text
 
+from . import control, cowfile, jobs, rsync_parse
 from .config import SLOGANS_DATA, SLOGANS, CAT_FACTS, STAGES
-from .cowsay_helper import cowsay_art
+from .cowsay_helper import cache_stats as cow_cache_stats, cowsay_art
+from .spans import Spans, format_phases
+
+# Frames per second drawn by the render thread
+DEFAULT_FPS = 8.0
 
 
 class LiveDashboard:
-    def __init__(self, dry_run: bool = False, boring: bool = False, test_mode: bool = False, demo_mode: bool = False, cow_hold_seconds: int = 7, logger: Optional[logging.Logger] = None):
+    def __init__(self, dry_run: bool = False, boring: bool = False, test_mode: bool = False, demo_mode: bool = False, cow_hold_seconds: int = 7, logger: Optional[logging.Logger] = None, fps: float = DEFAULT_FPS):
         self.dry_run = dry_run
         self.boring = boring
         self.test_mode = test_mode
@@ -41,6 +49,8 @@ class LiveDashboard:
         self.files_moved_count = 0
         self.total_files: Optional[int] = None
         self.start_time: Optional[datetime] = None
+        # set by JobRow when its run ends so the elapsed time stops there
+        self.end_time: Optional[datetime] = None
         self.progress = 0
         self.cow_character = "datakitten"
         self.cow_quote = ""
@@ -48,10 +58,26 @@ class LiveDashboard:
         self.last_moved_file = ""
         self.speed = ""
         self.transferred = ""
+        # exact byte count from --out-format lengths / the stats2 summary
+        self.transferred_bytes: Optional[int] = None
         self.errors: List[str] = []
+        self.rsync_stats: Dict[str, str] = {}
+        self._parser = rsync_parse.RsyncParser()
         # duplicate detection
         self._seen_files: set[str] = set()
         self.duplicates: int = 0
+        # bytes/files per copy path reported by the Python copy engine
+        self.copy_stats: Dict[str, Dict[str, int]] = {}
+        # old copies kept in the run's versions folder, and their size
+        self.versions_created: int = 0
+        self.versions_bytes: int = 0
+        # rsync runs killed by the stall watchdog (see rsync_stream.Watchdog)
+        self.stall_events: List[Dict[str, object]] = []
+        # published through pcopy.control between start() and finish()
+        self.name = ""
+        self.control = control.RunControl(self)
+        # per-phase timings of the run (config, walk, rsync, teardown, ...)
+        self.spans = Spans()
 
         # cowsay caching
         self.cow_hold_seconds = cow_hold_seconds
@@ -66,10 +92,24 @@ class LiveDashboard:
         )
         self.task_id = self.progress_bar.add_task("Overall Progress", total=100)
         self.layout = self._create_layout()
+        # last inputs each layout region was built from (see _set_panel)
+        self._panel_keys: Dict[str, object] = {}
+        self.render_stats: Dict[str, float] = {"updates": 0, "built": 0, "skipped": 0, "seconds": 0.0}
+        # (stage, tall console, STAGES, CAT_FACTS) -> (animals, quote pool)
+        self._stage_pools: Dict[tuple, tuple] = {}
 
         # For test/demo mode we may not create Live screen
         self._live: Optional[Live] = None
 
+        # render loop: the parser bumps _changes, the render thread draws
+        self.fps = fps or DEFAULT_FPS
+        self.frames = 0
+        self._changes = 0
+        self._rendered_changes = -1
+        self._last_frame = 0.0
+        self._render_stop = threading.Event()
+        self._render_thread: Optional[threading.Thread] = None
+
     def _create_layout(self) -> Layout:
         layout = Layout(name="root")
         layout.split(
@@ -106,14 +146,16 @@ class LiveDashboard:
         bar = "█" * filled + "░" * empty
         return Text(f"{bar} {label}", style="bold green")
 
-    def _update_layout_panels(self) -> None:
-        # header
-        self.layout["header"].update(Panel(Text("Purrfect Backup 🐾", justify="center", style="bold magenta"), border_style="green"))
-
-        # cowsay
-        self.layout["cowsay"].update(Panel(Text(self._get_cowsay_art(), justify="center"), border_style="blue", title="Backup Mascot"))
+    def _set_panel(self, name: str, key: object, build) -> None:
+        """Update layout region ``name`` only when its input ``key`` changed."""
+        if name in self._panel_keys and self._panel_keys[name] == key:
+            self.render_stats["skipped"] += 1
+            return
+        self._panel_keys[name] = key
+        self.layout[name].update(build())
+        self.render_stats["built"] += 1
 
-        # stats table
+    def _stats_panel(self, elapsed: str) -> Panel:
         stats_table = Table.grid(expand=True)
         stats_table.add_column(justify="right", ratio=1)
         stats_table.add_column(justify="left", ratio=4)
@@ -122,16 +164,29 @@ class LiveDashboard:
         stats_table.add_row("📂 Last Moved:", Text(self.last_moved_file, overflow="ellipsis", no_wrap=True))
         stats_table.add_row("📦 Speed:", Text(str(self.speed)))
         stats_table.add_row("📦 Transferred:", Text(str(self.transferred)))
-        stats_table.add_row("⏱️ Elapsed:", Text(self._format_elapsed()))
+        stats_table.add_row("⏱️ Elapsed:", Text(elapsed))
         stats_table.add_row("📁 Files:", self._files_bar())
+        return Panel(stats_table, border_style="yellow", title="Live Stats")
 
-        self.layout["stats"].update(Panel(stats_table, border_style="yellow", title="Live Stats"))
-        self.layout["footer"].update(self.progress_bar)
+    def _update_layout_panels(self) -> None:
+        started = time.perf_counter()
+        # header and footer never change; the progress bar renders itself
+        self._set_panel("header", None, lambda: Panel(Text("Purrfect Backup 🐾", justify="center", style="bold magenta"), border_style="green"))
+        self._set_panel("footer", None, lambda: self.progress_bar)
+
+        art = self._get_cowsay_art()
+        self._set_panel("cowsay", art, lambda: Panel(Text(art, justify="center"), border_style="blue", title="Backup Mascot"))
+
+        elapsed = self._format_elapsed()
+        key = (self.current_file, self.last_moved_file, self.speed, self.transferred, elapsed, self.files_moved_count, self.total_files, self.progress)
+        self._set_panel("stats", key, lambda: self._stats_panel(elapsed))
+        self.render_stats["updates"] += 1
+        self.render_stats["seconds"] += time.perf_counter() - started
 
     def _format_elapsed(self) -> str:
         if not self.start_time:
             return "0s"
-        delta = datetime.now() - self.start_time
+        delta = (self.end_time or datetime.now()) - self.start_time
         total_seconds = int(delta.total_seconds())
         hours, remainder = divmod(total_seconds, 3600)
         minutes, seconds = divmod(remainder, 60)
@@ -141,19 +196,85 @@ class LiveDashboard:
             return f"{minutes}m {seconds}s"
         return f"{seconds}s"
 
+    def render(self, force: bool = False) -> bool:
+        """Draw one frame from the current state; return whether anything was redrawn.
+
+        Frames are skipped while nothing changed, except for a once-a-second
+        redraw that keeps the elapsed time ticking.
+        """
+        changes = self._changes
+        now = time.monotonic()
+        if not force and changes == self._rendered_changes and now - self._last_frame < 1.0:
+            return False
+        if changes != self._rendered_changes:
+            self._update_slogan()
+            try:
+                self.progress_bar.update(self.task_id, completed=self.progress)
+            except Exception:
+                pass
+        self._update_layout_panels()
+        self._rendered_changes = changes
+        self._last_frame = now
+        self.frames += 1
+        return True
+
+    def _render_loop(self) -> None:
+        interval = 1.0 / max(0.1, float(self.fps))
+        while not self._render_stop.wait(interval):
+            try:
+                if self.render() and self._live is not None:
+                    self._live.refresh()
+            except Exception:
+                pass
+
+    def _stop_render_thread(self) -> None:
+        self._render_stop.set()
+        if self._render_thread is not None:
+            self._render_thread.join()
+            self._render_thread = None
+
+    def _preload_cows(self) -> None:
+        # parse every cowfile the stages can pick so frames never touch disk
+        names = [self.cow_character]
+        if isinstance(STAGES, dict):
+            for stage in STAGES.values():
+                if isinstance(stage, dict):
+                    names += list(stage.get("animals", []))
+        try:
+            from . import config
+            if isinstance(config.SETTINGS, dict) and config.SETTINGS.get("cow_cache"):
+                cowfile.use_disk_cache(config.STATE_DIR / "cow-cache.json")
+            cowfile.preload(names)
+        except Exception:
+            pass
+
     def start(self) -> None:
         self.start_time = datetime.now()
+        self.control.name = self.name
+        control.register(self.control)
+        self._preload_cows()
         if not self.test_mode and not self.demo_mode:
             try:
-                self._live = Live(self.layout, console=self.console, screen=True, redirect_stderr=False, vertical_overflow="visible")
+                self._live = Live(self.layout, console=self.console, screen=True, redirect_stderr=False, vertical_overflow="visible", auto_refresh=False)
                 self._live.__enter__()
             except Exception:
                 self._live = None
+            self.render(force=True)
+            if self._live is not None:
+                self._render_stop.clear()
+                self._render_thread = threading.Thread(target=self._render_loop, name='pcopy-render', daemon=True)
+                self._render_thread.start()
         else:
             # In test/demo mode we just update layout without entering Live
             self._update_layout_panels()
 
-    def finish(self, exit_code: int = 0) -> None:
+    def finish(self, exit_code: int = 0, before_summary: Optional[Callable[[], None]] = None) -> None:
+        """Close the live view and print the summary.
+
+        ``before_summary`` runs once the view is torn down and before the
+        summary is built, so phases it records (saving the run entry) are
+        listed in it.
+        """
         # Print completion status
         if exit_code == 0 and not self.errors:
             status_panel = Panel(f"[bold green]✅ Purrfect Success! {random.choice(SLOGANS_DATA.get('goodbyes', ['Goodbye']))}", title="Complete")
@@ -163,12 +284,22 @@ class LiveDashboard:
                 title="Failure",
             )
 
+        control.unregister(self.control)
         # Teardown Live if we entered it (close the live render)
-        if self._live:
-            try:
-                self._live.__exit__(None, None, None)
-            except Exception:
-                pass
+        with self.spans.span('teardown'):
+            self._stop_render_thread()
+            if self._live:
+                try:
+                    self.render(force=True)
+                    self._live.refresh()
+                except Exception:
+                    pass
+                try:
+                    self._live.__exit__(None, None, None)
+                except Exception:
+                    pass
+        if before_summary is not None:
+            before_summary()
 
         # Always print a final summary panel so the user sees stats in the normal
         # terminal buffer (this avoids the UI vanishing silently).
@@ -178,10 +309,29 @@ class LiveDashboard:
         summary.add_row("Files moved:", str(self.files_moved_count))
         summary.add_row("Total files:", str(self.total_files or "unknown"))
         summary.add_row("Elapsed:", self._format_elapsed())
-        summary.add_row("Transferred:", str(self.transferred))
+        transferred = self.transferred
+        if not transferred and self.transferred_bytes is not None:
+            transferred = f"{self.transferred_bytes} bytes"
+        summary.add_row("Transferred:", str(transferred))
         if self.errors:
             summary.add_row("Errors:", "\n".join(self.errors[:5]))
         summary.add_row("Duplicate transfers:", str(self.duplicates))
+        if self.render_stats["updates"]:
+            rs = self.render_stats
+            summary.add_row("Render:", f"{self.frames} frames, {int(rs['built'])} panel builds, {int(rs['skipped'])} skipped, {rs['seconds'] * 1000:.1f} ms")
+            cs = cow_cache_stats()
+            summary.add_row("Cow art cache:", f"{cs['hits']} hits, {cs['misses']} misses, {cs['evictions']} evictions")
+        if self.stall_events:
+            summary.add_row("Stalls:", "\n".join(
+                f"{ev.get('kind')} after {ev.get('elapsed_seconds')}s (idle {ev.get('idle_seconds')}s)" for ev in self.stall_events
+            ))
+        if self.copy_stats:
+            summary.add_row("Copy paths:", "\n".join(
+                f"{method}: {st.get('files', 0)} files, {st.get('bytes', 0)} bytes" for method, st in self.copy_stats.items()
+            ))
+        phases = self.spans.as_dict()
+        if phases:
+            summary.add_row("Phases:", "\n".join(format_phases(phases)))
 
         # Print the main status and the summary table
         self.console.print(status_panel)
@@ -216,21 +366,22 @@ class LiveDashboard:
                 pass
 
     def update_from_rsync_line(self, line: str) -> None:
-        # percent
-        if m := re.search(r"(\d+)%", line):
-            try:
-                self.progress = int(m.group(1))
-            except Exception:
-                pass
-            # detect speed
-            if sp := re.search(r"([0-9.]+[A-Z]?B/s)", line):
-                self.speed = sp.group(1)
-
-        # file transfer line (rsync style)
-        elif m := re.search(r"^>f\S+\s+(.*)", line):
-            self.current_file = m.group(1).strip()
+        event = self._parser.parse(line)
+        if event is None:
+            return
+        kind = event[0]
+
+        if kind == rsync_parse.PROGRESS:
+            self.progress = event[1]
+            if event[2]:
+                self.speed = event[2]
+
+        elif kind == rsync_parse.FILE:
+            self.current_file = event[1]
             self.files_moved_count += 1
             self.last_moved_file = self.current_file
+            if event[2] is not None:
+                self.transferred_bytes = (self.transferred_bytes or 0) + event[2]
             # Duplicate detection: if we've seen this file before, record it
             if self.current_file in self._seen_files:
                 self.duplicates += 1
@@ -242,23 +393,18 @@ class LiveDashboard:
             else:
                 self._seen_files.add(self.current_file)
 
-        elif "Total transferred file size" in line:
-            try:
-                self.transferred = line.split(":", 1)[1].strip()
-            except Exception:
-                pass
+        elif kind == rsync_parse.ERROR:
+            self.errors.append(event[1])
 
-        # update slogan/animal selection heuristics
-        self._update_slogan()
+        elif kind == rsync_parse.STATS:
+            self.rsync_stats[event[1]] = event[2]
+            if event[1] == "Total transferred file size":
+                self.transferred = event[2]
+                if event[3] is not None:
+                    self.transferred_bytes = event[3]
 
-        # update the progress bar
-        try:
-            self.progress_bar.update(self.task_id, completed=self.progress)
-        except Exception:
-            pass
-
-        # refresh panels
-        self._update_layout_panels()
+        # picked up by the render thread on its next frame
+        self._changes += 1
 
     def _update_slogan(self) -> None:
         # Determine stage from progress
@@ -268,21 +414,24 @@ class LiveDashboard:
         elif self.progress > 75:
             stage_key = "stage3"
 
-        stage = STAGES.get(stage_key, {}) if isinstance(STAGES, dict) else {}
-        animals = stage.get("animals", [])
-        quotes = stage.get("quotes", [])
-
-        if animals:
-            self.cow_character = random.choice(animals)
-
-        quotes_pool = list(quotes)
         try:
             console_height = getattr(self.console, "size").height
         except Exception:
             console_height = 0
+        tall = bool(console_height and console_height > 45)
+
+        pool_key = (stage_key, tall, id(STAGES), id(CAT_FACTS))
+        pools = self._stage_pools.get(pool_key)
+        if pools is None:
+            stage = STAGES.get(stage_key, {}) if isinstance(STAGES, dict) else {}
+            quotes_pool = list(stage.get("quotes", []))
+            if tall:
+                quotes_pool.extend(CAT_FACTS)
+            pools = self._stage_pools[pool_key] = (tuple(stage.get("animals", [])), tuple(quotes_pool))
+        animals, quotes_pool = pools
 
-        if console_height and console_height > 45:
-            quotes_pool.extend(CAT_FACTS)
+        if animals:
+            self.cow_character = random.choice(animals)
 
         if quotes_pool:
             self.cow_quote = random.choice(quotes_pool)
@@ -326,3 +475,133 @@ class LiveDashboard:
             self._update_layout_panels()
             time.sleep(max(0.001, duration / max(1, steps)))
         self.finish(0)
+
+
+class JobRow(LiveDashboard):
+    """Per-job state for ``JobBoard``: parses rsync output but never draws.
+
+    It stands in for a ``LiveDashboard`` in ``run_backup`` so each concurrent
+    job keeps its own counters while the board draws all of them in one table.
+    """
+
+    def __init__(self, name: str, dest: str = '', dry_run: bool = False, logger: Optional[logging.Logger] = None):
+        super().__init__(dry_run=dry_run, test_mode=True, logger=logger)
+        self.name = name
+        self.dest = dest
+        self.state = jobs.QUEUED
+        self.exit_code: Optional[int] = None
+        # per-job messages ("Running: rsync ...") would interleave; drop them
+        self.console = Console(quiet=True)
+
+    def start(self) -> None:
+        self.start_time = datetime.now()
+        self.end_time = None
+        self.control.name = self.name
+        control.register(self.control)
+
+    def finish(self, exit_code: int = 0, before_summary: Optional[Callable[[], None]] = None) -> None:
+        self.exit_code = exit_code
+        self.end_time = datetime.now()
+        control.unregister(self.control)
+        if before_summary is not None:
+            before_summary()
+
+
+class JobBoard:
+    """One Live table with a row per job, used by ``pcopy --jobs N``."""
+
+    def __init__(self, dry_run: bool = False, test_mode: bool = False, fps: Optional[float] = None, logger: Optional[logging.Logger] = None):
+        self.dry_run = dry_run
+        self.test_mode = test_mode
+        self.fps = fps or DEFAULT_FPS
+        self.logger = logger
+        self.console = Console()
+        self.rows: Dict[str, JobRow] = {}
+        # a jobs.Scheduler: its device placement is shown per row and its
+        # decisions are printed with the summary
+        self.scheduler: Optional[jobs.Scheduler] = None
+        self.start_time: Optional[datetime] = None
+        self._live: Optional[Live] = None
+
+    def add_job(self, name: str, dest: str = '') -> JobRow:
+        row = self.rows[name] = JobRow(name, dest, dry_run=self.dry_run, logger=self.logger)
+        return row
+
+    def set_state(self, name: str, state: str) -> None:
+        row = self.rows.get(name)
+        if row is not None:
+            row.state = state
+
+    def table(self) -> Table:
+        title = "Purrfect Backup 🐾 — " + ("dry run, " if self.dry_run else "") + f"{len(self.rows)} jobs"
+        table = Table(title=title, expand=True, header_style="bold magenta")
+        table.add_column("Job")
+        table.add_column("Dest", overflow="ellipsis", no_wrap=True)
+        devices = self.scheduler.devices if self.scheduler is not None else None
+        if devices is not None:
+            table.add_column("Disks", overflow="ellipsis", no_wrap=True)
+        table.add_column("State")
+        table.add_column("%", justify="right")
+        table.add_column("Files", justify="right")
+        table.add_column("Transferred", justify="right")
+        table.add_column("Speed", justify="right")
+        table.add_column("Elapsed", justify="right")
+        table.add_column("Current file", overflow="ellipsis", no_wrap=True, ratio=1)
+        styles = {jobs.PASS: "green", jobs.FAILED: "bold red", jobs.RUNNING: "cyan"}
+        for row in list(self.rows.values()):
+            transferred = row.transferred or (f"{row.transferred_bytes} bytes" if row.transferred_bytes is not None else "")
+            errors = f" ({len(row.errors)} errors)" if row.errors else ""
+            cells = [row.name, row.dest]
+            if devices is not None:
+                cells.append("+".join(devices.get(row.name, ())))
+            table.add_row(
+                *cells,
+                Text(row.state + errors, style=styles.get(row.state, "yellow")),
+                f"{row.progress}%",
+                str(row.files_moved_count),
+                str(transferred),
+                str(row.speed),
+                row._format_elapsed(),
+                row.current_file,
+            )
+        return table
+
+    def __rich__(self) -> Table:
+        return self.table()
+
+    def start(self) -> None:
+        self.start_time = datetime.now()
+        if self.test_mode:
+            return
+        try:
+            # rich redraws the table at a fixed rate on its own thread
+            self._live = Live(self, console=self.console, auto_refresh=True, refresh_per_second=self.fps, redirect_stderr=False)
+            self._live.__enter__()
+        except Exception:
+            self._live = None
+
+    def finish(self) -> None:
+        if self._live is not None:
+            try:
+                self._live.__exit__(None, None, None)
+            except Exception:
+                pass
+            self._live = None
+        else:
+            self.console.print(self.table())
+        passed = sum(1 for row in self.rows.values() if row.state == jobs.PASS)
+        failed = len(self.rows) - passed
+        elapsed = (datetime.now() - self.start_time).total_seconds() if self.start_time else 0.0
+        style = "bold green" if not failed else "bold red"
+        decisions = list(self.scheduler.decisions) if self.scheduler is not None else []
+        if decisions:
+            self.console.print(Panel("\n".join(decisions), title="Scheduler", border_style="blue"))
+        self.console.print(f"[{style}]{passed} passed, {failed} failed in {elapsed:.1f}s[/]")
+        if self.logger:
+            try:
+                for row in self.rows.values():
+                    self.logger.info("Job %s: state=%s exit_code=%s files_moved=%s errors=%s", row.name, row.state, row.exit_code, row.files_moved_count, len(row.errors))
+                for decision in decisions:
+                    self.logger.info("Scheduler: %s", decision)
+            except Exception:
+                pass
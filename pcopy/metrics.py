@@ -0,0 +1,133 @@
+"""Run metrics in the Prometheus text exposition format.
+
+``render()`` turns the latest finished run of each named job (from the run
+history) and, in long-running modes, the runs that are in progress (from
+``pcopy.control``) into gauges labelled by job. The same text is written to
+a node-exporter textfile at the end of each run (``write_textfile``) and
+served on ``GET /metrics`` by the control HTTP server.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# (metric, help, entry key) for the last finished run of each job
+_LAST_RUN = (
+    ('pcopy_last_run_duration_seconds', 'Wall time of the last run.', 'elapsed_seconds'),
+    ('pcopy_last_run_exit_code', 'Exit status of the last run.', 'status'),
+    ('pcopy_last_run_transferred_bytes', 'Bytes transferred by the last run.', 'transferred_bytes'),
+    ('pcopy_last_run_files_moved', 'Files copied or updated by the last run.', 'files_moved'),
+    ('pcopy_last_run_duplicates', 'Files rsync reported more than once in the last run.', 'duplicates'),
+    ('pcopy_last_run_errors', 'Errors reported by the last run.', 'errors_count'),
+    ('pcopy_last_run_versions_created', 'Old copies kept as versions by the last run.', 'versions_created'),
+    ('pcopy_last_run_versions_bytes', 'Bytes kept as versions by the last run.', 'versions_bytes'),
+)
+# (metric, help, snapshot key) for runs in progress, see control.RunControl.snapshot()
+_ACTIVE = (
+    ('pcopy_run_elapsed_seconds', 'Time since the run started.', 'elapsed_seconds'),
+    ('pcopy_run_transferred_bytes', 'Bytes transferred so far.', 'bytes'),
+    ('pcopy_run_files_moved', 'Files copied so far.', 'files'),
+    ('pcopy_run_progress_percent', 'Progress reported by rsync.', 'progress'),
+    ('pcopy_run_errors', 'Errors so far.', 'errors_count'),
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels: str) -> str:
+    return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + '}'
+
+
+def _number(value: Any) -> Optional[str]:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (int, float)):
+        return repr(float(value)) if isinstance(value, float) else str(value)
+    return None
+
+
+def _timestamp(entry: Dict[str, Any]) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(str(entry.get('timestamp'))).timestamp()
+    except ValueError:
+        return None
+
+
+class _Family:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help = help_text
+        self.samples: List[Tuple[str, str]] = []
+
+    def add(self, value: Any, **labels: str) -> None:
+        text = _number(value)
+        if text is not None:
+            self.samples.append((_labels(**labels), text))
+
+    def lines(self) -> Iterable[str]:
+        if not self.samples:
+            return
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} gauge'
+        for labels, value in self.samples:
+            yield f'{self.name}{labels} {value}'
+
+
+def render(last_runs: Dict[str, Dict[str, Any]], active: Iterable[Dict[str, Any]] = ()) -> str:
+    """Exposition text for ``{job: last finished entry}`` and active run snapshots."""
+    families: Dict[str, _Family] = {}
+
+    def family(name: str, help_text: str) -> _Family:
+        if name not in families:
+            families[name] = _Family(name, help_text)
+        return families[name]
+
+    for job, entry in sorted(last_runs.items()):
+        family('pcopy_last_run_timestamp_seconds', 'When the last run finished (Unix time).').add(_timestamp(entry), job=job)
+        family('pcopy_last_run_success', '1 if the last run passed.').add(entry.get('status') == 0, job=job)
+        for name, help_text, key in _LAST_RUN:
+            family(name, help_text).add(entry.get(key), job=job)
+        phases = entry.get('phases')
+        if not isinstance(phases, dict):
+            phases = {}
+        for phase, span in phases.items():
+            span = span if isinstance(span, dict) else {'wall_seconds': span}
+            family('pcopy_last_run_phase_seconds', 'Wall time of each phase of the last run.').add(span.get('wall_seconds'), job=job, phase=phase)
+            family('pcopy_last_run_phase_cpu_seconds', 'CPU time of each phase of the last run.').add(span.get('cpu_seconds'), job=job, phase=phase)
+            family('pcopy_last_run_phase_items', 'Items (files, versions) handled in each phase of the last run.').add(span.get('items'), job=job, phase=phase)
+    for snap in active:
+        family('pcopy_run_active', '1 while a run is in progress.').add(1, job=snap.get('name', ''), state=snap.get('state', ''))
+        for name, help_text, key in _ACTIVE:
+            family(name, help_text).add(snap.get(key), job=snap.get('name', ''))
+    return ''.join(line + '\n' for fam in families.values() for line in fam.lines())
+
+
+def textfile_path(setting: Any = None) -> Optional[Path]:
+    """Node-exporter textfile to write after each run; ``PCOPY_METRICS_TEXTFILE`` overrides the setting."""
+    value = os.environ.get('PCOPY_METRICS_TEXTFILE') or setting
+    return Path(str(value)).expanduser() if value else None
+
+
+def write_textfile(path: str | Path, text: str) -> None:
+    """Replace ``path`` atomically so the collector never reads half a file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix='.' + path.name, dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf8') as fh:
+            fh.write(text)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
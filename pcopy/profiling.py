@@ -0,0 +1,173 @@
+"""``pcopy --profile cpu|mem|io``: profile a run without editing the code.
+
+* ``cpu`` runs cProfile on the main thread and writes a ``.pstats`` file.
+  A sampling thread also reads every thread's stack every few milliseconds
+  and writes them as ``.collapsed`` lines (``frame;frame;frame count``),
+  which flamegraph.pl, speedscope and inferno all read. The samples include
+  the copy workers and ``--jobs`` threads that cProfile does not see.
+* ``mem`` runs tracemalloc. At each phase boundary it records the top
+  allocation changes since the previous boundary (``.mem.txt``), and it
+  dumps the final snapshot (``.tracemalloc``, for ``tracemalloc.Snapshot.load``).
+* ``io`` counts the stat, open, rename and copy calls of the Python copy
+  engine, and the bytes they move, per phase (``.io.txt``). rsync's own
+  system calls happen in the child process and are not counted.
+
+Phase boundaries come from ``pcopy.spans``.
+"""
+from __future__ import annotations
+
+import cProfile
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from . import spans
+
+MODES = ('cpu', 'mem', 'io')
+# seconds between stack samples in cpu mode
+SAMPLE_INTERVAL = 0.005
+# allocation sites listed per phase in mem mode
+TOP_ALLOCATIONS = 10
+
+
+class IOCounter:
+    """Calls and bytes per ``(phase, operation)``, fed by ``copy_logic``."""
+
+    def __init__(self) -> None:
+        self.counts: Dict[Tuple[str, str], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, phase: str, op: str, nbytes: int = 0) -> None:
+        with self._lock:
+            entry = self.counts.setdefault((phase, op), [0, 0])
+            entry[0] += 1
+            entry[1] += nbytes
+
+    def report(self) -> str:
+        lines = [f"{'phase':<10} {'operation':<16} {'calls':>10} {'bytes':>14}"]
+        for (phase, op), (calls, nbytes) in sorted(self.counts.items()):
+            lines.append(f'{phase:<10} {op:<16} {calls:>10} {nbytes:>14}')
+        return '\n'.join(lines) + '\n'
+
+
+class _Sampler(threading.Thread):
+    """Collect collapsed stacks of every other thread at a fixed interval."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        super().__init__(name='pcopy-profile-sampler', daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """Profile everything between ``start()`` and ``stop()`` in one ``mode``."""
+
+    def __init__(self, mode: str, out_dir: str | Path) -> None:
+        if mode not in MODES:
+            raise ValueError(f"unknown profile mode {mode!r} (one of {', '.join(MODES)})")
+        self.mode = mode
+        self.out_dir = Path(out_dir)
+        self.base = self.out_dir / f"pcopy-{datetime.now().strftime('%Y%m%d_%H%M%S')}-{mode}"
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_Sampler] = None
+        self._io: Optional[IOCounter] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._mem_report: List[str] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> 'Profiler':
+        if self.mode == 'cpu':
+            self._sampler = _Sampler()
+            self._sampler.start()
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self.mode == 'mem':
+            tracemalloc.start(25)
+            self._snapshot = self._take_snapshot()
+            spans.observe(self.phase)
+        else:
+            from . import copy_logic
+            self._io = IOCounter()
+            copy_logic.set_io_counter(self._io)
+        return self
+
+    @staticmethod
+    def _take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ))
+
+    def phase(self, name: str) -> None:
+        """Phase boundary (mem mode): list what was allocated since the last one."""
+        with self._lock:
+            if self._snapshot is None or not tracemalloc.is_tracing():
+                return
+            snapshot = self._take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            self._mem_report.append(f'== after {name}: {current} bytes traced, peak {peak}')
+            for stat in snapshot.compare_to(self._snapshot, 'lineno')[:TOP_ALLOCATIONS]:
+                self._mem_report.append(f'  {stat}')
+            self._snapshot = snapshot
+
+    def stop(self) -> List[Path]:
+        """Stop profiling and write the result files; return their paths."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        written: List[Path] = []
+        if self.mode == 'cpu':
+            assert self._profile is not None and self._sampler is not None
+            self._profile.disable()
+            self._sampler.stop()
+            path = self.base.with_suffix('.pstats')
+            self._profile.dump_stats(str(path))
+            written.append(path)
+            path = self.base.with_suffix('.collapsed')
+            path.write_text(self._sampler.collapsed(), encoding='utf8')
+            written.append(path)
+        elif self.mode == 'mem':
+            spans.unobserve(self.phase)
+            self.phase('run')
+            path = self.base.with_suffix('.tracemalloc')
+            assert self._snapshot is not None
+            self._snapshot.dump(str(path))
+            tracemalloc.stop()
+            written.append(path)
+            path = self.base.with_suffix('.mem.txt')
+            path.write_text('\n'.join(self._mem_report) + '\n', encoding='utf8')
+            written.append(path)
+        else:
+            from . import copy_logic
+            copy_logic.set_io_counter(None)
+            assert self._io is not None
+            path = self.base.with_suffix('.io.txt')
+            path.write_text(self._io.report(), encoding='utf8')
+            written.append(path)
+        return written
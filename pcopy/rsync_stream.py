@@ -0,0 +1,234 @@
+"""Bounded-memory capture of rsync output.
+
+Every rsync invocation feeds its output through one ``RsyncOutput`` sink.
+Lines are handed to an optional per-line callback as they arrive; only a
+bounded tail is kept for error reporting, so a verbose run over millions of
+files never holds the whole log in memory.
+
+Pipes are read in binary chunks with ``os.read`` behind a selector and split
+on both ``\r`` and ``\n``, so ``--info=progress2`` updates (which rsync ends
+with a carriage return) are delivered as soon as they are written. Lines are
+only decoded when a consumer needs text.
+
+A ``Watchdog`` kills the process only when the output stops moving for a
+stall window (or an optional overall deadline passes), so long healthy runs
+are never cut short while hung mounts are noticed quickly.
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+import selectors
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+DEFAULT_TAIL_LINES = 200
+# Seconds without any new rsync output before the run is considered hung
+DEFAULT_STALL_TIMEOUT = 300.0
+_READ_CHUNK = 64 * 1024
+_POLL_SECONDS = 0.25
+_LINE_SEP = re.compile(rb'[\r\n]+')
+
+
+def _decode(line: Union[str, bytes]) -> str:
+    return line.decode('utf8', errors='replace') if isinstance(line, bytes) else line
+
+
+class RsyncOutput:
+    """Line sink with a tail ring buffer and a per-line callback."""
+
+    def __init__(self, on_line: Optional[Callable[[str], None]] = None, tail_lines: int = DEFAULT_TAIL_LINES) -> None:
+        self.on_line = on_line
+        # raw lines (bytes from fd reads); decoded only when reported
+        self.tail: deque[Union[str, bytes]] = deque(maxlen=max(1, tail_lines))
+        self.lines = 0
+        self.bytes = 0
+        # stall/deadline events recorded by a Watchdog
+        self.events: List[Dict[str, Any]] = []
+
+    def feed(self, line: Union[str, bytes]) -> None:
+        if isinstance(line, bytes):
+            line = line.rstrip(b'\r\n')
+        else:
+            line = line.rstrip('\r\n')
+        self.lines += 1
+        self.bytes += len(line) + 1
+        self.tail.append(line)
+        if self.on_line is not None:
+            self.on_line(_decode(line))
+
+    def feed_stream(self, stream: Iterable[Union[str, bytes]]) -> None:
+        for line in stream:
+            self.feed(line)
+
+    def feed_fd(self, fd: int) -> None:
+        """Read ``fd`` to EOF without blocking on partial lines.
+
+        Chunks from ``os.read`` are split on runs of ``\r``/``\n``; a trailing
+        partial line is carried over to the next chunk.
+        """
+        os.set_blocking(fd, False)
+        sel = selectors.DefaultSelector()
+        sel.register(fd, selectors.EVENT_READ)
+        pending = b''
+        try:
+            while True:
+                if not sel.select(_POLL_SECONDS):
+                    continue
+                try:
+                    data = os.read(fd, _READ_CHUNK)
+                except BlockingIOError:
+                    continue
+                if not data:
+                    break
+                parts = _LINE_SEP.split(pending + data)
+                pending = parts.pop()
+                for part in parts:
+                    if part:
+                        self.feed(part)
+        finally:
+            sel.close()
+        if pending:
+            self.feed(pending)
+
+    def feed_pipe(self, pipe: Any) -> None:
+        """Consume a subprocess pipe, using ``feed_fd`` when it has a real fd."""
+        fd = None
+        if os.name != 'nt':
+            try:
+                fd = pipe.fileno()
+            except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+                fd = None
+        if isinstance(fd, int):
+            self.feed_fd(fd)
+        else:
+            self.feed_stream(pipe)
+
+    def feed_text(self, text: str) -> None:
+        # iterate without materialising a list of every line
+        self.feed_stream(io.StringIO(text))
+
+    def tail_text(self, max_chars: Optional[int] = None) -> str:
+        text = '\n'.join(_decode(line) for line in self.tail)
+        return text[-max_chars:] if max_chars else text
+
+
+class Watchdog:
+    """Kill ``proc`` when ``output`` stops progressing.
+
+    Progress is any change in the number of lines or bytes fed into
+    ``output``. ``stall_timeout`` is the idle window; ``deadline`` an optional
+    cap on the total run time. Each kill is appended to ``output.events``.
+    While ``is_paused()`` is true (a run paused through ``pcopy.control``)
+    silence is expected and does not count as a stall.
+    """
+
+    def __init__(self, proc: Any, output: RsyncOutput, stall_timeout: Optional[float] = DEFAULT_STALL_TIMEOUT, deadline: Optional[float] = None, clock: Callable[[], float] = time.monotonic, is_paused: Optional[Callable[[], bool]] = None) -> None:
+        self.proc = proc
+        self.output = output
+        self.is_paused = is_paused
+        self.stall_timeout = stall_timeout or None
+        self.deadline = deadline or None
+        self.clock = clock
+        self.fired = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'Watchdog':
+        if self.stall_timeout is None and self.deadline is None:
+            return self
+        self._thread = threading.Thread(target=self._run, name='pcopy-watchdog', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        windows = [w for w in (self.stall_timeout, self.deadline) if w]
+        interval = min(1.0, min(windows) / 4)
+        started = last_change = self.clock()
+        last = (self.output.lines, self.output.bytes)
+        while not self._stop.wait(interval):
+            now = self.clock()
+            current = (self.output.lines, self.output.bytes)
+            if current != last or (self.is_paused is not None and self.is_paused()):
+                last = current
+                last_change = now
+            elif self.stall_timeout and now - last_change >= self.stall_timeout:
+                self._fire('stall', now - started, now - last_change)
+                return
+            if self.deadline and now - started >= self.deadline:
+                self._fire('deadline', now - started, now - last_change)
+                return
+
+    def _fire(self, kind: str, elapsed: float, idle: float) -> None:
+        self.fired = True
+        self.output.events.append({
+            'kind': kind,
+            'timestamp': datetime.now().isoformat(),
+            'elapsed_seconds': round(elapsed, 3),
+            'idle_seconds': round(idle, 3),
+            'lines': self.output.lines,
+            'bytes': self.output.bytes,
+            'last_line': _decode(self.output.tail[-1]) if self.output.tail else '',
+        })
+        try:
+            self.proc.kill()
+        except Exception:
+            pass
+
+
+def run_streaming(cmd: List[str], output: RsyncOutput, stall_timeout: Optional[float] = DEFAULT_STALL_TIMEOUT, deadline: Optional[float] = None, control: Any = None) -> int:
+    """Run ``cmd`` with stdout+stderr streamed line by line into ``output``.
+
+    The process is watched by a ``Watchdog``; if it is killed for stalling or
+    for passing ``deadline`` the (negative) return code is returned and the
+    event is available in ``output.events``. With a ``control.RunControl``
+    the process can be paused, resumed and cancelled while it runs.
+    """
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0)
+    if control is not None:
+        control.attach(proc)
+    watchdog = Watchdog(proc, output, stall_timeout=stall_timeout, deadline=deadline, is_paused=(lambda: control.paused) if control is not None else None).start()
+    try:
+        assert proc.stdout is not None
+        output.feed_pipe(proc.stdout)
+        return proc.wait()
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        watchdog.stop()
+        if control is not None:
+            control.detach(proc)
+
+
+def run_spooled(cmd: List[str], output: RsyncOutput) -> int:
+    """Run ``cmd`` synchronously via ``subprocess.run`` and replay its output.
+
+    Output is spooled to an anonymous temporary file instead of a pipe string
+    and then streamed through ``output``. Callers (and tests) that substitute
+    ``subprocess.run`` with an object whose ``stdout`` is a string are replayed
+    the same way.
+    """
+    with tempfile.TemporaryFile() as spool:
+        proc = subprocess.run(cmd, check=False, stdout=spool, stderr=subprocess.STDOUT)
+        captured = getattr(proc, 'stdout', None)
+        if isinstance(captured, str):
+            output.feed_text(captured)
+        elif isinstance(captured, bytes):
+            output.feed_text(captured.decode('utf8', errors='replace'))
+        else:
+            spool.seek(0)
+            output.feed_stream(io.TextIOWrapper(spool, encoding='utf8', errors='replace'))
+        return proc.returncode
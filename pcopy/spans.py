@@ -0,0 +1,105 @@
+"""Lightweight timing spans for the phases of a run.
+
+A ``Spans`` collects wall time, CPU time and an item count per phase name.
+``span()`` times one block; ``add()`` accumulates a measurement taken
+elsewhere, so a step repeated per file (keeping a version) costs a few clock
+reads per call and ends up as one phase. ``span()`` charges the process's
+CPU time (``time.process_time``), which includes other threads and, with
+``--jobs``, other jobs running at the same time; the copy engine measures
+its phases per thread with ``time.thread_time`` instead.
+
+``as_dict()`` is what run entries store under ``phases``::
+
+    {'walk': {'wall_seconds': 1.2, 'cpu_seconds': 0.9, 'items': 5000, 'calls': 1}, ...}
+
+Callbacks registered with ``observe()`` hear about each phase boundary (the
+end of a ``span()`` block or an explicit ``boundary()``); the memory
+profiler takes its snapshots there.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+_observers: List[Callable[[str], None]] = []
+
+
+def observe(callback: Callable[[str], None]) -> None:
+    _observers.append(callback)
+
+
+def unobserve(callback: Callable[[str], None]) -> None:
+    if callback in _observers:
+        _observers.remove(callback)
+
+
+def boundary(name: str) -> None:
+    """Tell observers that phase ``name`` just ended."""
+    for callback in list(_observers):
+        callback(name)
+
+
+class _Timer:
+    """Handle yielded by ``Spans.span``; set ``items`` while the block runs."""
+
+    __slots__ = ('items',)
+
+    def __init__(self, items: int = 0) -> None:
+        self.items = items
+
+
+class Spans:
+    """Per-phase wall/CPU/item totals, safe to update from several threads."""
+
+    def __init__(self) -> None:
+        self._phases: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, wall: float, cpu: float = 0.0, items: int = 0, calls: int = 1) -> None:
+        with self._lock:
+            phase = self._phases.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'items': 0, 'calls': 0})
+            phase['wall_seconds'] += wall
+            phase['cpu_seconds'] += cpu
+            phase['items'] += int(items)
+            phase['calls'] += calls
+
+    def count(self, name: str, items: int) -> None:
+        """Set the item count of ``name`` (known only after the phase ran)."""
+        with self._lock:
+            if name in self._phases:
+                self._phases[name]['items'] = int(items)
+
+    @contextmanager
+    def span(self, name: str, items: int = 0) -> Iterator[_Timer]:
+        timer = _Timer(items)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield timer
+        finally:
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu, timer.items)
+            if _observers:
+                boundary(name)
+
+    def update(self, phases: Optional[Dict[str, Dict[str, Any]]]) -> None:
+        """Fold in ``as_dict()`` output from elsewhere (the copy engine's phases)."""
+        for name, phase in (phases or {}).items():
+            if isinstance(phase, dict):
+                self.add(name, float(phase.get('wall_seconds') or 0.0), float(phase.get('cpu_seconds') or 0.0), int(phase.get('items') or 0), int(phase.get('calls') or 1))
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: {'wall_seconds': round(p['wall_seconds'], 6), 'cpu_seconds': round(p['cpu_seconds'], 6), 'items': p['items'], 'calls': p['calls']}
+                    for name, p in self._phases.items()}
+
+
+def format_phases(phases: Dict[str, Dict[str, Any]]) -> List[str]:
+    """One summary line per phase, e.g. ``walk: 1.20s wall, 0.90s cpu, 5000 items``."""
+    lines = []
+    for name, phase in phases.items():
+        line = f"{name}: {phase.get('wall_seconds', 0.0):.2f}s wall, {phase.get('cpu_seconds', 0.0):.2f}s cpu"
+        if phase.get('items'):
+            line += f", {phase['items']} items"
+        lines.append(line)
+    return lines
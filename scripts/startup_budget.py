@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Measure pcopy CLI startup with ``python -X importtime`` and check the budget.
+
+The budget lives in ``scripts/startup_budget.json``: the module to import, the
+maximum cumulative import time in milliseconds (best of ``--runs``), and
+modules that must not be loaded on that path (rich, yaml, the copy engine).
+Each run gets a throwaway HOME. It is measured twice: once with no settings
+file, and once with a typical settings file whose parse is already in the
+marshal cache, which is the usual state on a user's machine.
+
+Usage: python scripts/startup_budget.py [--runs N] [--top N]
+Exit status is 1 when the budget is exceeded or a forbidden module loads.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().with_name('startup_budget.json')
+SETTINGS_TEXT = '''\
+source: ~/Pictures
+dest: /mnt/backup/pictures
+dashboard_fps: 8
+jobs: 2
+photos:
+  source: ~/Pictures
+  dest: /mnt/backup/pictures
+  schedule: '30 2 * * *'
+  priority: 1
+documents:
+  source: ~/Documents
+  dest: /mnt/backup/documents
+  schedule: '@hourly'
+  stall_timeout: 600
+'''
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """Map module name -> (self_us, cumulative_us) from ``-X importtime`` output."""
+    out: Dict[str, Tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue
+        out[parts[2].strip()] = (self_us, cumulative_us)
+    return out
+
+
+def measure(module: str, home: str) -> Dict[str, Tuple[int, int]]:
+    env = dict(os.environ, HOME=home, PYTHONPATH=str(ROOT))
+    for name in ('PCOPY_SLOGANS', 'PCOPY_CACHE_DIR', 'XDG_CACHE_HOME'):
+        env.pop(name, None)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], env=env, capture_output=True, text=True, check=True)
+    return parse_importtime(proc.stderr)
+
+
+def empty_home(module: str, home: str) -> None:
+    """No settings file: the first run on a new machine."""
+
+
+def cached_settings(module: str, home: str) -> None:
+    """A settings file whose parse one earlier run has cached."""
+    path = Path(home) / '.pcopy-main-backup.yml'
+    path.write_text(SETTINGS_TEXT, encoding='utf8')
+    # files modified in the last couple of seconds are not cached
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime - 3600))
+    measure(module, home)
+
+
+SCENARIOS: List[Tuple[str, Callable[[str, str], None]]] = [
+    ('empty HOME', empty_home),
+    ('cached settings', cached_settings),
+]
+
+
+def check(budget: dict, runs: List[Dict[str, Tuple[int, int]]]) -> Tuple[float, List[str]]:
+    """Return the best cumulative time in ms and any forbidden modules seen."""
+    module = budget['module']
+    best_ms = min(run[module][1] for run in runs) / 1000.0
+    loaded = set().union(*runs)
+    forbidden = sorted(m for m in loaded if any(m == f or m.startswith(f + '.') for f in budget.get('forbidden', [])))
+    return best_ms, forbidden
+
+
+def main(argv: List[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description='Check the pcopy startup import budget')
+    p.add_argument('--runs', type=int, default=5)
+    p.add_argument('--top', type=int, default=10, help='Show the N slowest modules (self time)')
+    args = p.parse_args(argv)
+
+    budget = json.loads(BUDGET_FILE.read_text(encoding='utf8'))
+    ok = True
+    for label, prepare in SCENARIOS:
+        with tempfile.TemporaryDirectory() as home:
+            prepare(budget['module'], home)
+            runs = [measure(budget['module'], home) for _ in range(max(1, args.runs))]
+        best_ms, forbidden = check(budget, runs)
+
+        fastest = min(runs, key=lambda r: r[budget['module']][1])
+        print(f"{budget['module']} ({label}): {best_ms:.1f} ms (budget {budget['budget_ms']} ms, best of {len(runs)})")
+        for name, (self_us, _) in sorted(fastest.items(), key=lambda kv: -kv[1][0])[:args.top]:
+            print(f'  {self_us / 1000.0:7.2f} ms  {name}')
+        if forbidden:
+            print('forbidden modules loaded: ' + ', '.join(forbidden))
+            ok = False
+        if best_ms > budget['budget_ms']:
+            print('startup budget exceeded')
+            ok = False
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
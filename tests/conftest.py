@@ -5,3 +5,16 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_run_history(tmp_path, monkeypatch):
+    # keep run history written by runner tests out of the real state dir
+    monkeypatch.setenv('PCOPY_HISTORY_PATH', str(tmp_path / 'history.sqlite'))
+    # and don't serve the control socket in the real state dir either
+    monkeypatch.setenv('PCOPY_CONTROL_SOCKET', 'off')
+    # destination locks and indexes go to a per-test state dir
+    import pcopy.config as config
+    monkeypatch.setattr(config, 'STATE_DIR', tmp_path / 'state')
@@ -21,3 +21,22 @@ def test_main_boring_alias(monkeypatch):
     rc = runner.main(['--quiet'])
     assert rc == 0
     assert called['args']['boring'] is True
+
+
+def test_main_workers_from_cli_and_job_settings(monkeypatch):
+    import pcopy.config as config
+
+    calls = []
+
+    def fake_run_backup(source=None, dest=None, workers=None, queue_depth=None):
+        calls.append((source, workers, queue_depth))
+        return 0
+
+    monkeypatch.setattr(runner, 'run_backup', fake_run_backup)
+    monkeypatch.setattr(config, 'reload_settings', lambda: None)
+    monkeypatch.setattr(config, 'SETTINGS', {'jobA': {'source': 's', 'dest': 'd', 'workers': 8, 'queue_depth': 64}})
+
+    assert runner.main(['do', 'jobA']) == 0
+    assert runner.main(['--workers', '2', 'do', 'jobA']) == 0
+    assert runner.main(['--workers', '3', '--queue-depth', '10', '--source', 'x', '--dest', 'y']) == 0
+    assert calls == [('s', 8, 64), ('s', 2, 64), ('x', 3, 10)]
@@ -24,3 +24,5 @@ def test_import_time_inprocess(tmp_path, monkeypatch):
         # restore original module to avoid breaking other tests
         if orig is not None:
             sys.modules['pcopy.config'] = orig
+            # the fresh import also rebound the package attribute
+            setattr(sys.modules['pcopy'], 'config', orig)
@@ -125,3 +125,33 @@ def test_load_settings_yaml_raises(monkeypatch, tmp_path):
     monkeypatch.setattr(config, 'SETTINGS_PATH', tmp_path / '.pcopy-main-backup.yml')
     s = config._load_settings()
     assert s == {}
+
+
+def test_settings_cache_skips_parse_until_file_changes(tmp_path, monkeypatch):
+    import os
+    import time as _time
+
+    settings = tmp_path / 'settings.yml'
+    settings.write_text('job:\n  source: /a\n', encoding='utf8')
+    old = _time.time() - 60
+    os.utime(settings, (old, old))
+    monkeypatch.setattr(config, 'CACHE_DIR', tmp_path / 'cache')
+    monkeypatch.setattr(config, 'SETTINGS_PATH', settings)
+
+    assert config._load_settings() == {'job': {'source': '/a'}}
+    assert list((tmp_path / 'cache').glob('*.marshal'))
+
+    def no_parse(fh):
+        raise AssertionError('settings re-parsed')
+
+    monkeypatch.setattr(config, 'yaml_load', no_parse)
+    assert config._load_settings() == {'job': {'source': '/a'}}
+
+    # a changed file is parsed again; a just-written file is not cached
+    monkeypatch.undo()
+    monkeypatch.setattr(config, 'CACHE_DIR', tmp_path / 'cache')
+    monkeypatch.setattr(config, 'SETTINGS_PATH', settings)
+    settings.write_text('job:\n  source: /changed\n', encoding='utf8')
+    assert config._load_settings() == {'job': {'source': '/changed'}}
+    monkeypatch.setattr(config, 'yaml_load', no_parse)
+    assert config._load_settings() == {}
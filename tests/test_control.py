@@ -0,0 +1,244 @@
+import json
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from pcopy import control, runner
+from pcopy.copy_logic import perform_backup
+
+
+class FakeDash:
+    start_time = None
+    files_moved_count = 3
+    transferred_bytes = 2048
+    progress = 50
+    total_files = 6
+    speed = '1.00MB/s'
+    current_file = 'a/b.jpg'
+    errors = ['oops']
+
+
+class FakeProc:
+    def __init__(self):
+        self.signals = []
+
+    def send_signal(self, sig):
+        self.signals.append(sig)
+
+
+@pytest.fixture
+def sock_dir():
+    # AF_UNIX paths are limited to ~100 bytes; pytest's tmp_path can be longer
+    d = Path(tempfile.mkdtemp(prefix='pc-'))
+    yield d
+    shutil.rmtree(d, ignore_errors=True)
+
+
+@pytest.fixture
+def registered():
+    made = []
+
+    def make(name, dash=None):
+        ctl = control.RunControl(dash or FakeDash(), name)
+        control.register(ctl)
+        made.append(ctl)
+        return ctl
+
+    yield make
+    for ctl in made:
+        control.unregister(ctl)
+
+
+def test_pause_blocks_checkpoint_until_resume():
+    ctl = control.RunControl(name='a')
+    ctl.pause()
+    passed = threading.Event()
+
+    def worker():
+        ctl.checkpoint()
+        passed.set()
+
+    t = threading.Thread(target=worker)
+    t.start()
+    assert not passed.wait(0.2)
+    ctl.resume()
+    assert passed.wait(2)
+    t.join()
+
+
+def test_cancel_raises_and_signals_procs():
+    ctl = control.RunControl(name='a')
+    proc = FakeProc()
+    ctl.attach(proc)
+    ctl.pause()
+    ctl.cancel()
+    assert proc.signals == [signal.SIGSTOP, signal.SIGTERM, signal.SIGCONT]
+    with pytest.raises(control.Cancelled):
+        ctl.checkpoint()
+    # a process started after the cancel is terminated straight away
+    late = FakeProc()
+    ctl.attach(late)
+    assert late.signals == [signal.SIGTERM]
+
+
+def test_snapshot_prefers_engine_counters():
+    ctl = control.RunControl(FakeDash(), 'photos')
+    ctl.counters = lambda: {'files': 5, 'bytes': 1000}
+    snap = ctl.snapshot()
+    assert snap['name'] == 'photos' and snap['state'] == control.RUNNING
+    assert snap['files'] == 5 and snap['bytes'] == 2048
+    assert snap['errors_count'] == 1 and snap['current_file'] == 'a/b.jpg'
+
+
+def test_register_suffixes_clashing_names(registered):
+    a = registered('photos')
+    b = registered('photos')
+    assert (a.name, b.name) == ('photos', 'photos#2')
+    assert set(control.runs()) >= {'photos', 'photos#2'}
+    assert control.handle({'cmd': 'pause', 'run': 'missing'})['ok'] is False
+
+
+def test_socket_round_trip(sock_dir, registered):
+    ctl = registered('photos')
+    server = control.ControlServer(sock_dir / 'c.sock').start()
+    try:
+        assert (sock_dir / 'c.sock').stat().st_mode & 0o777 == 0o600
+        status = control.request(sock_dir / 'c.sock', {'cmd': 'status'})
+        assert [r['name'] for r in status['runs'] if r['name'] == 'photos'] == ['photos']
+        reply = control.request(sock_dir / 'c.sock', {'cmd': 'pause', 'run': 'photos'})
+        assert reply['run']['state'] == control.PAUSED and ctl.paused
+        # a second server refuses to steal a live socket
+        with pytest.raises(OSError):
+            control.ControlServer(sock_dir / 'c.sock').start()
+    finally:
+        server.close()
+        ctl.resume()
+    assert not (sock_dir / 'c.sock').exists()
+
+
+def test_http_is_read_only(registered):
+    ctl = registered('photos')
+    server = control.ControlServer(http_port=0).start()
+    base = f'http://127.0.0.1:{server.http_port}'
+    try:
+        with urllib.request.urlopen(base + '/runs', timeout=5) as resp:
+            assert 'photos' in [r['name'] for r in json.load(resp)['runs']]
+        with urllib.request.urlopen(base + '/events', timeout=5) as resp:
+            assert resp.readline() == b'event: status\n'
+            assert b'"photos"' in resp.readline()
+        # a page in the user's browser must not be able to cancel a run
+        req = urllib.request.Request(base + '/runs/photos/cancel', method='POST')
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(req, timeout=5)
+        assert err.value.code == 405
+        # nor read status through a rebound DNS name
+        req = urllib.request.Request(base + '/runs', headers={'Host': f'evil.example:{server.http_port}'})
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(req, timeout=5)
+        assert err.value.code == 403
+        req = urllib.request.Request(base + '/nope', headers={'Host': f'localhost:{server.http_port}'})
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(req, timeout=5)
+        assert err.value.code == 404
+    finally:
+        server.close()
+    assert not ctl.cancelled.is_set()
+
+
+def test_cancelled_backup_stops_the_walk(tmp_path):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i in range(5):
+        (src / f'{i}.txt').write_text('x')
+    ctl = control.RunControl(name='t')
+    ctl.cancel()
+    with pytest.raises(control.Cancelled):
+        perform_backup(src, tmp_path / 'dst', run_rsync=False, control=ctl)
+    assert not list((tmp_path / 'dst').glob('*.txt'))
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_cancel_after_moving_the_old_copy_still_writes_the_new_one(tmp_path, monkeypatch, workers):
+    from pcopy import copy_logic
+
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    src.mkdir()
+    dst.mkdir()
+    (dst / 'a.txt').write_text('old')
+    (src / 'a.txt').write_text('new')
+    os.utime(dst / 'a.txt', (1_000, 1_000))
+    ctl = control.RunControl(name='t')
+    preserve = copy_logic._VersionStore.preserve
+
+    def preserve_then_cancel(self, *args, **kwargs):
+        kept = preserve(self, *args, **kwargs)
+        ctl.cancel()
+        return kept
+
+    monkeypatch.setattr(copy_logic._VersionStore, 'preserve', preserve_then_cancel)
+    res = perform_backup(src, dst, run_rsync=False, workers=workers, control=ctl)
+    assert ctl.cancelled.is_set()
+    assert (dst / 'a.txt').read_text() == 'new'
+    assert Path(res['timestamped'][0]).read_text() == 'old'
+
+
+def test_paused_backup_resumes(tmp_path):
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'a.txt').write_text('x')
+    ctl = control.RunControl(name='t')
+    ctl.pause()
+    result = {}
+    t = threading.Thread(target=lambda: result.update(perform_backup(src, tmp_path / 'dst', run_rsync=False, workers=2, control=ctl)))
+    t.start()
+    time.sleep(0.2)
+    assert not result
+    ctl.resume()
+    t.join(5)
+    assert result['copied_new'] and ctl.counters()['files'] == 1
+
+
+def test_ctl_status_command(sock_dir, registered, monkeypatch, capsys):
+    registered('photos')
+    server = control.ControlServer(sock_dir / 'c.sock').start()
+    monkeypatch.setenv('PCOPY_CONTROL_SOCKET', str(sock_dir / 'c.sock'))
+    try:
+        assert runner.main(['ctl', 'status']) == 0
+        assert runner.main(['ctl', 'resume', 'nope']) == 1
+    finally:
+        server.close()
+    out = capsys.readouterr().out
+    assert 'photos: running 50% files=3' in out
+    assert "no running job 'nope'" in out
+    assert runner.main(['ctl', 'status']) == 1
+
+
+def test_socket_rejects_bad_requests_and_streams_watch(sock_dir, registered):
+    import socket as socket_mod
+
+    registered('photos')
+    server = control.ControlServer(sock_dir / 'c.sock').start()
+    try:
+        with socket_mod.socket(socket_mod.AF_UNIX, socket_mod.SOCK_STREAM) as conn:
+            conn.settimeout(5)
+            conn.connect(str(sock_dir / 'c.sock'))
+            fh = conn.makefile('rwb')
+            fh.write(b'not json\n{"cmd": "reboot"}\n{"cmd": "watch", "interval": 0.1}\n')
+            fh.flush()
+            assert json.loads(fh.readline()) == {'ok': False, 'error': 'invalid JSON'}
+            assert json.loads(fh.readline()) == {'ok': False, 'error': "unknown command 'reboot'"}
+            # watch keeps sending status lines until the client hangs up
+            for _ in range(2):
+                assert 'photos' in [r['name'] for r in json.loads(fh.readline())['runs']]
+            fh.close()
+    finally:
+        server.close()
@@ -2,6 +2,8 @@ from pathlib import Path
 import time
 import os
 
+import pytest
+
 from pcopy.copy_logic import perform_backup
 
 
@@ -45,3 +47,200 @@ def test_perform_backup_skips_when_source_missing(tmp_path: Path):
         assert True
     else:
         assert False, 'expected FileNotFoundError'
+
+
+def test_perform_backup_single_pass_copies_nested_tree(tmp_path: Path):
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    (src / 'a' / 'b').mkdir(parents=True)
+    (src / 'top.txt').write_text('top')
+    (src / 'a' / 'mid.txt').write_text('mid')
+    (src / 'a' / 'b' / 'deep.txt').write_text('deep')
+    # symlinked directories are not descended into (matches os.walk)
+    (src / 'link').symlink_to(src / 'a', target_is_directory=True)
+
+    res = perform_backup(src, dst, run_rsync=False)
+    assert res['files_scanned'] == 3
+    assert sorted(Path(p).relative_to(dst).as_posix() for p in res['copied_new']) == ['a/b/deep.txt', 'a/mid.txt', 'top.txt']
+    assert (dst / 'a' / 'b' / 'deep.txt').read_text() == 'deep'
+    assert not (dst / 'link').exists()
+
+
+def test_perform_backup_pipelined_workers(tmp_path: Path):
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    for d in range(5):
+        (src / f'd{d}').mkdir(parents=True)
+        for i in range(20):
+            (src / f'd{d}' / f'f{i}.txt').write_text(f'{d}-{i}')
+
+    # a tiny queue forces the walker to block on the copy workers
+    res = perform_backup(src, dst, run_rsync=False, workers=4, queue_depth=2)
+    assert len(res['copied_new']) == 100
+    assert (dst / 'd3' / 'f7.txt').read_text() == '3-7'
+
+
+def test_copy_file_fallback_chain(tmp_path: Path, monkeypatch):
+    from pcopy import copy_logic
+
+    src = tmp_path / 'big.bin'
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    src.write_bytes(data)
+    os.utime(src, (1_000_000, 1_000_000))
+
+    method, nbytes = copy_logic.copy_file(src, tmp_path / 'a.bin')
+    assert method in copy_logic.COPY_METHODS
+    assert nbytes == len(data)
+    assert (tmp_path / 'a.bin').read_bytes() == data
+    assert (tmp_path / 'a.bin').stat().st_mtime == 1_000_000
+
+    # force each kernel path off in turn and check the next one takes over
+    monkeypatch.setattr(copy_logic, '_reflink', lambda s, d: False)
+    monkeypatch.setattr(copy_logic, '_copy_file_range', lambda s, d: False)
+    method, _ = copy_logic.copy_file(src, tmp_path / 'b.bin')
+    assert method in ('sendfile', 'readinto')
+    monkeypatch.setattr(copy_logic, '_sendfile', lambda s, d: False)
+    method, _ = copy_logic.copy_file(src, tmp_path / 'c.bin')
+    assert method == 'readinto'
+    assert (tmp_path / 'c.bin').read_bytes() == data
+
+
+def test_perform_backup_reports_copy_stats(tmp_path: Path):
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'a.txt').write_text('aaaa')
+    (src / 'b.txt').write_text('bb')
+    res = perform_backup(src, tmp_path / 'dst', run_rsync=False)
+    stats = res['copy_stats']
+    assert sum(s['files'] for s in stats.values()) == 2
+    assert sum(s['bytes'] for s in stats.values()) == 6
+
+
+def test_changed_files_are_versioned_by_rename(tmp_path: Path):
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    (src / 'sub').mkdir(parents=True)
+    (dst / 'sub').mkdir(parents=True)
+    for rel in ('a.txt', 'sub/b.txt'):
+        (dst / rel).write_text('old ' + rel)
+        (src / rel).write_text('new ' + rel)
+        os.utime(dst / rel, (1_000, 1_000))
+        os.utime(src / rel, (2_000, 2_000))
+    old_inode = (dst / 'sub' / 'b.txt').stat().st_ino
+
+    res = perform_backup(src, dst, run_rsync=False, versions_dir=tmp_path / 'versions')
+    run_dir = Path(res['versions_dir'])
+    # one folder per run, original layout kept inside it
+    assert run_dir.parent == tmp_path / 'versions'
+    assert sorted(res['timestamped']) == sorted([str(run_dir / 'a.txt'), str(run_dir / 'sub' / 'b.txt')])
+    assert (run_dir / 'sub' / 'b.txt').read_text() == 'old sub/b.txt'
+    assert (run_dir / 'sub' / 'b.txt').stat().st_ino == old_inode
+    assert res['version_methods'] == {'rename': 2}
+    assert res['versions_created'] == 2
+    assert res['versions_bytes'] == len('old a.txt') + len('old sub/b.txt')
+    # the fresh copy is written once into the destination
+    assert (dst / 'sub' / 'b.txt').read_text() == 'new sub/b.txt'
+    assert len(res['updated']) == 2
+
+
+def test_version_store_claims_a_fresh_run_dir(tmp_path: Path):
+    from pcopy.copy_logic import _DirCache, _VersionStore
+
+    first = _VersionStore(tmp_path / 'versions', _DirCache())
+    second = _VersionStore(tmp_path / 'versions', _DirCache())
+    second.run_dir = first.run_dir
+    (tmp_path / 'a.txt').write_text('a')
+    (tmp_path / 'b.txt').write_text('b')
+    first.preserve(str(tmp_path / 'a.txt'), '', 'x.txt')
+    version, _ = second.preserve(str(tmp_path / 'b.txt'), '', 'x.txt')
+    # same second, same timestamp: the second run gets its own folder
+    assert second.run_dir == first.run_dir + '_1'
+    assert Path(version).read_text() == 'b'
+
+    # an existing version is never overwritten
+    (tmp_path / 'c.txt').write_text('c')
+    with pytest.raises(FileExistsError):
+        first.preserve(str(tmp_path / 'c.txt'), '', 'x.txt')
+    assert (Path(first.run_dir) / 'x.txt').read_text() == 'a'
+    assert (tmp_path / 'c.txt').exists()
+
+
+def _rsync_tree(tmp_path: Path):
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    src.mkdir()
+    dst.mkdir()
+    (dst / 'a.txt').write_text('old')
+    (src / 'a.txt').write_text('new')
+    os.utime(dst / 'a.txt', (1_000, 1_000))
+    return src, dst
+
+
+def test_rsync_mode_clones_the_old_copy_in_place(tmp_path: Path, monkeypatch):
+    from pcopy import copy_logic
+
+    src, dst = _rsync_tree(tmp_path)
+    seen = {}
+
+    def failing_rsync(cmd, out, **kwargs):
+        seen['cmd'] = cmd
+        seen['dest'] = (dst / 'a.txt').read_text()
+        return 23
+
+    def fake_reflink(sfd, dfd):
+        os.pwrite(dfd, os.pread(sfd, os.fstat(sfd).st_size, 0), 0)
+        return True
+
+    monkeypatch.setattr(copy_logic, '_reflink', fake_reflink)
+    monkeypatch.setattr(copy_logic.shutil, 'which', lambda name: '/usr/bin/rsync')
+    monkeypatch.setattr(copy_logic, 'run_streaming', failing_rsync)
+    res = perform_backup(src, dst)
+    # rsync still had the old file as its basis, and it survives the failure
+    assert seen['dest'] == 'old' and '--no-whole-file' in seen['cmd']
+    assert (dst / 'a.txt').read_text() == 'old'
+    assert Path(res['timestamped'][0]).read_text() == 'old'
+    assert res['version_methods'] == {'reflink': 1}
+    assert res['rsync_returncode'] == 23
+
+
+def test_rsync_mode_renames_without_reflinks(tmp_path: Path, monkeypatch):
+    from pcopy import copy_logic
+
+    src, dst = _rsync_tree(tmp_path)
+    seen = {}
+
+    def fake_rsync(cmd, out, **kwargs):
+        seen['cmd'] = cmd
+        seen['dest_exists'] = (dst / 'a.txt').exists()
+        return 0
+
+    monkeypatch.setattr(copy_logic, '_reflink', lambda sfd, dfd: False)
+    monkeypatch.setattr(copy_logic.shutil, 'which', lambda name: '/usr/bin/rsync')
+    monkeypatch.setattr(copy_logic, 'run_streaming', fake_rsync)
+    res = perform_backup(src, dst)
+    # the old file is moved, not copied, and rsync writes the new one once
+    assert res['version_methods'] == {'rename': 1}
+    assert not seen['dest_exists'] and '--whole-file' in seen['cmd']
+    assert Path(res['timestamped'][0]).read_text() == 'old'
+
+
+def test_dry_run_changes_nothing(tmp_path: Path):
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    src.mkdir()
+    dst.mkdir()
+    (dst / 'a.txt').write_text('old')
+    (src / 'a.txt').write_text('new')
+    (src / 'b.txt').write_text('b')
+    os.utime(dst / 'a.txt', (1_000, 1_000))
+
+    res = perform_backup(src, dst, run_rsync=False, dry_run=True, index_path=tmp_path / 'idx.sqlite')
+    assert res['updated'] == [str(dst / 'a.txt')]
+    assert res['copied_new'] == [str(dst / 'b.txt')]
+    assert res['timestamped'] == [] and res['versions_dir'] is None
+    assert (dst / 'a.txt').read_text() == 'old'
+    assert not (dst / 'b.txt').exists()
+    assert not (dst / 'versions').exists()
+    # the index only remembers real runs
+    again = perform_backup(src, dst, run_rsync=False, dry_run=True, index_path=tmp_path / 'idx.sqlite')
+    assert again['files_skipped'] == 0
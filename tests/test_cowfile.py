@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from pcopy import cowfile
+from pcopy.dashboard_live import LiveDashboard
+
+
+def _write(tmp_path: Path, name: str, text: str) -> Path:
+    p = tmp_path / f'{name}.cow'
+    p.write_text(text, encoding='utf8')
+    return p
+
+
+def test_parse_heredoc_escapes_and_variables(tmp_path):
+    p = _write(tmp_path, 'moo', '##\n$eyes = "^^";\n$the_cow = <<"EOC";\n $thoughts  {x}\n  (${eyes})\\\\_\n   $tongue \\$5 \\@home\nEOC\n')
+    cow = cowfile.parse_cowfile(p)
+    assert cow is not None
+    drawn = cow.draw(tongue='U ')
+    assert drawn == ' \\  {x}\n  (^^)\\_\n   U  $5 @home\n'
+
+
+def test_single_quoted_heredoc_is_literal(tmp_path):
+    p = _write(tmp_path, 'lit', "$the_cow = <<'EOC';\n$thoughts {}\nEOC\n")
+    assert cowfile.parse_cowfile(p).draw() == '$thoughts {}\n'
+
+
+def test_balloon_shapes():
+    assert cowfile.balloon('hi') == ' ____\n< hi >\n ----\n'
+    wrapped = cowfile.balloon('word ' * 20).splitlines()
+    assert wrapped[1].startswith('/ ') and wrapped[-2].startswith('\\ ')
+    assert all(len(line) == len(wrapped[1]) for line in wrapped[1:-1])
+    assert cowfile.balloon('a\nb', think=True).splitlines()[1] == '( a )'
+
+
+def test_render_bundled_cow_and_cowpath(tmp_path, monkeypatch):
+    art = cowfile.render('purr', cowfile.load_cowfile('guardkitten'))
+    assert art.startswith(' ______\n< purr >\n')
+    assert '   \\\n    \\\n' in art
+
+    _write(tmp_path, 'pathcow', '$the_cow = <<EOC;\n$thoughts\nEOC\n')
+    monkeypatch.setenv('COWPATH', str(tmp_path))
+    assert cowfile.find_cowfile('pathcow') == tmp_path / 'pathcow.cow'
+    assert cowfile.find_cowfile('no-such-cow') is None
+
+
+def test_dashboard_start_preloads_cows(monkeypatch):
+    monkeypatch.setattr(cowfile, '_COWFILES', {})
+    dash = LiveDashboard(test_mode=True)
+    dash.start()
+    assert 'datakitten' in cowfile._COWFILES
+
+
+def test_disk_cache_reused_until_cowfile_changes(tmp_path, monkeypatch):
+    cow_dir = tmp_path / 'cows'
+    cow_dir.mkdir()
+    p = _write(cow_dir, 'disky', '$the_cow = <<EOC;\n$thoughts v1\nEOC\n')
+    monkeypatch.setenv('COWPATH', str(cow_dir))
+    monkeypatch.setattr(cowfile, '_COWFILES', {})
+    cache_file = tmp_path / 'state' / 'cow-cache.json'
+    try:
+        cowfile.use_disk_cache(cache_file)
+        assert cowfile.preload(['disky']) == 1
+        assert cache_file.exists()
+
+        # a new process: served from disk without parsing
+        monkeypatch.setattr(cowfile, '_COWFILES', {})
+        cowfile.use_disk_cache(cache_file)
+        monkeypatch.setattr(cowfile, 'parse_cowfile', lambda *a, **k: (_ for _ in ()).throw(AssertionError('parsed')))
+        assert cowfile.load_cowfile('disky').draw() == '\\ v1\n'
+
+        # touching the cowfile invalidates the entry
+        monkeypatch.undo()
+        monkeypatch.setenv('COWPATH', str(cow_dir))
+        monkeypatch.setattr(cowfile, '_COWFILES', {})
+        p.write_text('$the_cow = <<EOC;\n$thoughts version2\nEOC\n', encoding='utf8')
+        cowfile.use_disk_cache(cache_file)
+        assert cowfile.load_cowfile('disky').draw() == '\\ version2\n'
+    finally:
+        cowfile.use_disk_cache(None)
@@ -16,12 +16,50 @@ def test_cowsay_cache_behavior(monkeypatch):
 
 
 def test_cowsay_system_invocation(monkeypatch):
-    # simulate system cowsay available and subprocess returning output
+    # simulate system cowsay available and subprocess returning output; it
+    # is only used for cows the in-process renderer cannot find
     monkeypatch.setattr(shutil, 'which', lambda name: '/usr/bin/cowsay')
 
     def fake_check_output(cmd, stderr=None, text=False):
         return 'SYSTEM ART'
 
     monkeypatch.setattr(subprocess, 'check_output', fake_check_output)
-    art = cowsay_helper.cowsay_art('yo', cow='datakitten')
+    art = cowsay_helper.cowsay_art('yo', cow='system-only-cow')
     assert 'SYSTEM ART' in art
+
+
+def test_cowsay_local_cow_renders_without_subprocess(monkeypatch):
+    monkeypatch.setattr(shutil, 'which', lambda name: '/usr/bin/cowsay')
+
+    def fail_check_output(*a, **k):
+        raise AssertionError('cowsay should not be spawned')
+
+    monkeypatch.setattr(subprocess, 'check_output', fail_check_output)
+    art = cowsay_helper.cowsay_art('no spawn', cow='datakitten')
+    assert '< no spawn >' in art
+    assert '( o.o )' in art
+
+
+def test_art_cache_is_bounded_lru():
+    cache = cowsay_helper.ArtCache(maxsize=2)
+    cache.put(('c', '1'), 'one')
+    cache.put(('c', '2'), 'two')
+    assert cache.get(('c', '1')) == 'one'
+    cache.put(('c', '3'), 'three')
+    # '2' was least recently used
+    assert cache.get(('c', '2')) is None
+    assert cache.get(('c', '1')) == 'one'
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'evictions': 1, 'size': 2, 'maxsize': 2}
+
+
+def test_percentage_changes_reuse_cow_body():
+    from pcopy import cowfile
+    cowsay_helper._CACHE.clear()
+    cow = cowfile.load_cowfile('rsyncat')
+    cow._drawn.clear()
+    body = cow.draw()
+    arts = [cowsay_helper.cowsay_art(f'({pct}%) purr', cow='rsyncat') for pct in range(100)]
+    # one body per character; only the balloon differs between percentages
+    assert len(cow._drawn) == 1
+    assert all(art.endswith(body) for art in arts)
+    assert cowsay_helper.cache_stats()['misses'] == 100
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytest
+
+from pcopy.cron import CronSchedule
+
+
+def test_next_after_basic_fields():
+    s = CronSchedule('30 2 * * *')
+    assert s.next_after(datetime(2026, 1, 1, 1, 0)) == datetime(2026, 1, 1, 2, 30)
+    assert s.next_after(datetime(2026, 1, 1, 2, 30)) == datetime(2026, 1, 2, 2, 30)
+    assert s.next_after(datetime(2026, 12, 31, 3, 0)) == datetime(2027, 1, 1, 2, 30)
+
+
+def test_steps_ranges_lists_and_names():
+    s = CronSchedule('*/15 9-17 * jan,jul mon-fri')
+    assert s.next_after(datetime(2026, 1, 2, 17, 50)) == datetime(2026, 1, 5, 9, 0)  # Fri evening -> Mon
+    assert s.next_after(datetime(2026, 1, 5, 9, 1)) == datetime(2026, 1, 5, 9, 15)
+    assert s.next_after(datetime(2026, 2, 1, 0, 0)) == datetime(2026, 7, 1, 9, 0)
+    assert CronSchedule('5/20 * * * *').minutes == frozenset({5, 25, 45})
+
+
+def test_sunday_is_zero_or_seven_and_day_fields_or_together():
+    assert CronSchedule('0 0 * * 7').weekdays == CronSchedule('0 0 * * sun').weekdays == frozenset({0})
+    # the 1st of the month or any Monday
+    s = CronSchedule('0 0 1 * mon')
+    assert s.next_after(datetime(2026, 3, 1, 0, 0)) == datetime(2026, 3, 2, 0, 0)
+    assert s.next_after(datetime(2026, 3, 30, 0, 0)) == datetime(2026, 4, 1, 0, 0)
+
+
+def test_aliases_and_impossible_dates():
+    assert CronSchedule('@daily').next_after(datetime(2026, 5, 5, 12, 0)) == datetime(2026, 5, 6, 0, 0)
+    assert CronSchedule('@hourly').matches(datetime(2026, 5, 5, 12, 0))
+    assert CronSchedule('0 0 30 2 *').next_after(datetime(2026, 1, 1)) is None
+
+
+@pytest.mark.parametrize('expr', ['* * * *', '60 * * * *', '* * 0 * *', '*/0 * * * *', '5-1 * * * *', '* * * foo *'])
+def test_invalid_expressions(expr):
+    with pytest.raises(ValueError):
+        CronSchedule(expr)
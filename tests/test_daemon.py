@@ -0,0 +1,234 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import yaml
+
+from pcopy import config, daemon as daemon_mod, file_index, runner
+from pcopy.daemon import Daemon
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _settings(tmp_path, monkeypatch, data):
+    path = tmp_path / 'settings.yml'
+    path.write_text(yaml.safe_dump(data), encoding='utf8')
+    monkeypatch.setattr(config, 'SETTINGS_PATH', path)
+    monkeypatch.setattr(config, 'SETTINGS', data)
+    monkeypatch.setattr(config, 'CACHE_DIR', tmp_path / 'cache')
+    return path
+
+
+def test_runs_due_jobs_and_skips_missed_slots(tmp_path, monkeypatch):
+    _settings(tmp_path, monkeypatch, {
+        'a': {'source': 's', 'dest': 'd', 'schedule': '*/10 * * * *'},
+        'b': {'source': 's', 'dest': 'e', 'schedule': '0 3 * * *'},
+        'c': {'source': 's', 'dest': 'f'},
+    })
+    clock = Clock(datetime(2026, 1, 1, 2, 55))
+    ran = []
+
+    def run_jobs(names):
+        ran.append(list(names))
+        clock.now += timedelta(minutes=25)  # a long run
+        return 0
+
+    d = Daemon(run_jobs, clock=clock)
+    assert d.tick() == []
+    assert set(d.schedules) == {'a', 'b'}
+    assert d.seconds_until_next(clock.now) == 5 * 60
+
+    clock.now = datetime(2026, 1, 1, 3, 0)
+    assert d.tick() == ['a', 'b']
+    # 03:10 and 03:20 passed during the run and are not queued up
+    assert d.next_run['a'] == datetime(2026, 1, 1, 3, 30)
+    assert d.next_run['b'] == datetime(2026, 1, 2, 3, 0)
+    assert ran == [['a', 'b']]
+
+
+def test_slots_of_other_jobs_missed_during_a_run_are_skipped(tmp_path, monkeypatch):
+    _settings(tmp_path, monkeypatch, {
+        'a': {'source': 's', 'dest': 'd', 'schedule': '0 3 * * *'},
+        'b': {'source': 's', 'dest': 'e', 'schedule': '15 3 * * *'},
+    })
+    clock = Clock(datetime(2026, 1, 1, 2, 59))
+    ran = []
+
+    def run_jobs(names):
+        ran.append(list(names))
+        clock.now += timedelta(minutes=30)
+        return 0
+
+    d = Daemon(run_jobs, clock=clock)
+    d.tick()
+    clock.now = datetime(2026, 1, 1, 3, 0)
+    assert d.tick() == ['a']
+    # b's 03:15 slot passed while a was running: skipped, not run late
+    assert d.next_run['b'] == datetime(2026, 1, 2, 3, 15)
+    assert d.tick() == []
+    assert ran == [['a']]
+
+
+def test_reloads_only_when_settings_change(tmp_path, monkeypatch):
+    path = _settings(tmp_path, monkeypatch, {'a': {'source': 's', 'dest': 'd', 'schedule': '@hourly'}})
+    reloads = []
+    real_reload = config.reload_settings
+
+    def counting_reload():
+        reloads.append(1)
+        real_reload()
+
+    monkeypatch.setattr(config, 'reload_settings', counting_reload)
+    clock = Clock(datetime(2026, 1, 1, 0, 30))
+    d = Daemon(lambda names: 0, clock=clock)
+    d.tick()
+    d.tick()
+    assert reloads == []
+
+    path.write_text(yaml.safe_dump({'a': {'source': 's', 'dest': 'd', 'schedule': '45 * * * *'}, 'z': {'source': 's', 'dest': 'z', 'schedule': 'bad'}}), encoding='utf8')
+    os.utime(path, ns=(1, 1))
+    d.tick()
+    assert reloads == [1]
+    assert d.next_run == {'a': datetime(2026, 1, 1, 0, 45)}
+    d.tick()
+    assert reloads == [1]
+
+    d.request_reload()
+    d.tick()
+    assert reloads == [1, 1]
+
+
+def test_serve_keeps_indexes_open_until_stopped(tmp_path, monkeypatch):
+    _settings(tmp_path, monkeypatch, {})
+    d = Daemon(lambda names: 0, poll_seconds=0.01)
+    seen = []
+    monkeypatch.setattr(d, 'tick', lambda now=None: seen.append(file_index._OPEN is not None) or d.stop())
+    t = threading.Thread(target=d.serve)
+    t.start()
+    t.join(5)
+    assert not t.is_alive()
+    assert seen == [True]
+    assert file_index._OPEN is None
+
+
+def test_open_index_reuses_connection_while_kept_open(tmp_path):
+    path = tmp_path / 'idx.sqlite'
+    file_index.keep_open(True)
+    try:
+        first = file_index.open_index(path)
+        first.close()
+        assert file_index.open_index(path, hash_files=True) is first
+        assert first.hash_files
+    finally:
+        file_index.keep_open(False)
+    assert file_index.open_index(path) is not first
+
+
+def test_main_daemon_runs_scheduled_job(tmp_path, monkeypatch, capsys):
+    _settings(tmp_path, monkeypatch, {'nightly': {'source': 's', 'dest': str(tmp_path / 'd'), 'schedule': '* * * * *'}})
+    monkeypatch.setattr(config, 'STATE_DIR', tmp_path / 'state')
+    monkeypatch.setattr(config, 'reload_settings', lambda: None)
+    calls = []
+
+    def fake_run_backup(source=None, dest=None, name=None, dashboard=None):
+        calls.append(name)
+        return 0
+
+    monkeypatch.setattr(runner, 'run_backup', fake_run_backup)
+
+    def serve(self):
+        self.next_run['nightly'] = datetime.now() - timedelta(seconds=1)
+        self.tick()
+        return 0
+
+    monkeypatch.setattr(daemon_mod.Daemon, 'serve', serve)
+    assert runner.main(['daemon']) == 0
+    assert calls == ['nightly']
+    assert 'nightly: * * * * *' in capsys.readouterr().out
+
+
+def test_tick_follows_config_changes(tmp_path, monkeypatch, caplog):
+    path = _settings(tmp_path, monkeypatch, {
+        'keep': {'source': 's', 'dest': 'd', 'schedule': '0 * * * *'},
+        'drop': {'source': 's', 'dest': 'e', 'schedule': '*/5 * * * *'},
+        'other': {'source': 's', 'dest': 'f', 'schedule': '* * * * *'},
+    })
+    monkeypatch.setattr(config, 'reload_settings', lambda: monkeypatch.setattr(config, 'SETTINGS', yaml.safe_load(path.read_text(encoding='utf8'))))
+    clock = Clock(datetime(2026, 1, 1, 0, 2))
+
+    def run_jobs(names):
+        raise RuntimeError('disk gone')
+
+    # 'other' is not one of the daemon's jobs
+    d = Daemon(run_jobs, names=['keep', 'drop', 'new'], clock=clock)
+    d.tick()
+    assert d.next_run == {'keep': datetime(2026, 1, 1, 1, 0), 'drop': datetime(2026, 1, 1, 0, 5)}
+    kept = d.schedules['keep']
+
+    # the file changes: 'drop' loses its schedule, 'new' gains one
+    path.write_text(yaml.safe_dump({
+        'keep': {'source': 's', 'dest': 'd', 'schedule': '0 * * * *'},
+        'drop': {'source': 's', 'dest': 'e'},
+        'new': {'source': 's', 'dest': 'g', 'schedule': '10 0 * * *'},
+    }), encoding='utf8')
+    os.utime(path, ns=(1, 1))
+    clock.now = datetime(2026, 1, 1, 0, 9)
+    assert d.tick() == []
+    assert d.reloads == 1
+    clock.now = datetime(2026, 1, 1, 0, 10)
+    assert d.tick() == ['new']
+    assert d.reloads == 1
+    # an unchanged schedule keeps its object and next run
+    assert d.schedules['keep'] is kept
+    assert set(d.schedules) == {'keep', 'new'}
+    # the failed run is logged and the job is scheduled again
+    assert 'Scheduled run of new failed' in caplog.text
+    assert d.next_run['new'] == datetime(2026, 1, 2, 0, 10)
+
+    # a deleted settings file counts as a change too
+    path.unlink()
+    monkeypatch.setattr(config, 'reload_settings', lambda: monkeypatch.setattr(config, 'SETTINGS', {}))
+    d.tick()
+    assert d.reloads == 2 and d.next_run == {}
+    assert d.seconds_until_next(clock.now) is None
+
+
+def test_serve_warms_up_and_reuses_indexes_between_runs(tmp_path, monkeypatch):
+    from pcopy import cowfile
+
+    _settings(tmp_path, monkeypatch, {'a': {'source': 's', 'dest': 'd', 'schedule': '* * * * *'}})
+    monkeypatch.setattr(config, 'STAGES', {'copy': {'animals': ['rsyncat']}, 'odd': 'not a stage'})
+    preloaded = []
+    monkeypatch.setattr(cowfile, 'preload', lambda names: preloaded.extend(names))
+
+    class Stepping(Clock):
+        # every read moves a minute on, so a job is due on each tick
+        def __call__(self):
+            self.now += timedelta(minutes=1)
+            return self.now
+
+    indexes = []
+    d = Daemon(lambda names: 0, poll_seconds=0.01, clock=Stepping(datetime(2026, 1, 1, 0, 0, 30)))
+
+    def run_jobs(names):
+        indexes.append(file_index.open_index(tmp_path / 'a.sqlite'))
+        indexes[-1].close()
+        if len(indexes) == 2:
+            d.stop()
+        return 0
+
+    d.run_jobs = run_jobs
+    t = threading.Thread(target=d.serve)
+    t.start()
+    t.join(10)
+    assert not t.is_alive()
+    assert preloaded == ['datakitten', 'rsyncat']
+    # both runs got the one connection kept open by the daemon
+    assert len(indexes) == 2 and indexes[0] is indexes[1]
+    assert file_index._OPEN is None and not indexes[0].kept_open
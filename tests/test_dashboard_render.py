@@ -0,0 +1,77 @@
+import time
+import types
+
+from pcopy import dashboard_live
+from pcopy.dashboard_live import LiveDashboard
+
+
+def test_parsing_does_not_render(monkeypatch):
+    dash = LiveDashboard(test_mode=True, cow_hold_seconds=0)
+    calls = {'panels': 0}
+    monkeypatch.setattr(dash, '_update_layout_panels', lambda: calls.__setitem__('panels', calls['panels'] + 1))
+    for i in range(1000):
+        dash.update_from_rsync_line(f'PCOPY >f+++++++++ 10 f{i}.txt')
+    assert calls['panels'] == 0
+    assert dash.files_moved_count == 1000
+    # one frame covers every line parsed since the last one
+    assert dash.render() is True
+    assert dash.render() is False
+    assert calls['panels'] == 1 and dash.frames == 1
+
+
+def test_render_thread_draws_at_fps(monkeypatch):
+    class DummyLive:
+        def __init__(self, *a, **k):
+            self.refreshes = 0
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def refresh(self):
+            self.refreshes += 1
+
+    monkeypatch.setattr(dashboard_live, 'Live', DummyLive)
+    dash = LiveDashboard(test_mode=False, cow_hold_seconds=0, fps=50)
+    dash.start()
+    try:
+        assert dash._render_thread is not None
+        dash.update_from_rsync_line(' 40% 1.00MB/s 0:00:01')
+        deadline = time.time() + 2
+        while dash._rendered_changes != dash._changes and time.time() < deadline:
+            time.sleep(0.01)
+        assert dash._rendered_changes == dash._changes
+        assert dash._live.refreshes >= 1
+    finally:
+        dash.finish(0)
+    assert dash._render_thread is None
+
+
+def test_unchanged_panels_are_not_rebuilt(monkeypatch):
+    monkeypatch.setattr(dashboard_live, 'cowsay_art', lambda text, cow: f'cow:{text}')
+    dash = LiveDashboard(test_mode=True, cow_hold_seconds=60)
+    dash._update_layout_panels()
+    assert dash.render_stats['built'] == 4
+    header = dash.layout['header'].renderable
+    # same inputs: nothing is rebuilt
+    dash._update_layout_panels()
+    assert dash.render_stats['built'] == 4
+    # only the stats panel depends on the speed
+    dash.speed = '9.99MB/s'
+    dash._update_layout_panels()
+    assert dash.render_stats['built'] == 5
+    assert dash.layout['header'].renderable is header
+    assert dash.render_stats['skipped'] == 7
+
+
+def test_stage_pools_are_built_once(monkeypatch):
+    monkeypatch.setattr(dashboard_live, 'STAGES', {'stage1': {'animals': ['a'], 'quotes': ['q']}})
+    dash = LiveDashboard(test_mode=True)
+    dash.console = types.SimpleNamespace(size=types.SimpleNamespace(height=24))
+    dash.progress = 5
+    for _ in range(50):
+        dash._update_slogan()
+    assert len(dash._stage_pools) == 1
+    assert dash.cow_quote == 'q'
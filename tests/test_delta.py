@@ -0,0 +1,181 @@
+import io
+import os
+import shutil
+import time
+import zlib
+from pathlib import Path
+
+from pcopy import copy_logic, delta
+from pcopy.copy_logic import perform_backup
+
+
+def _fake_reflink(sfd, dfd):
+    # a plain copy standing in for FICLONE on filesystems without reflinks
+    os.pwrite(dfd, os.pread(sfd, os.fstat(sfd).st_size, 0), 0)
+    return True
+
+
+def _ops_literal_bytes(ops):
+    return sum(len(v) for k, v in ops if k == 'literal')
+
+
+def test_delta_roundtrip_with_edits_and_shift(tmp_path: Path):
+    bs = 1024
+    old = bytearray(os.urandom(bs * 40 + 100))
+    new = bytearray(old)
+    new[3000:3050] = os.urandom(50)
+    new[bs * 20:bs * 20] = b'inserted bytes shift the rest'
+    new += b'more'
+    basis = tmp_path / 'old.bin'
+    basis.write_bytes(old)
+
+    sig = delta.signature_of(basis, bs)
+    ops = list(delta.compute_delta(io.BytesIO(bytes(new)), sig))
+    # only the edited block, the insertion point and the tail are literal
+    assert _ops_literal_bytes(ops) < 4 * bs
+    out = io.BytesIO()
+    with basis.open('rb') as fb:
+        stats = delta.apply_delta(iter(ops), fb, out, sig)
+    assert out.getvalue() == bytes(new)
+    assert stats['matched'] + stats['literal'] == len(new)
+
+
+def test_in_place_apply_skips_unchanged_blocks(tmp_path: Path):
+    bs = 1024
+    old = os.urandom(bs * 10)
+    new = bytearray(old)
+    new[5 * bs + 10] ^= 0xFF
+    basis = tmp_path / 'old.bin'
+    basis.write_bytes(old)
+    sig = delta.signature_of(basis, bs)
+    out = io.BytesIO(old)
+    with basis.open('rb') as fb:
+        stats = delta.apply_delta(delta.compute_delta(io.BytesIO(bytes(new)), sig), fb, out, sig, in_place=True)
+    assert out.getvalue() == bytes(new)
+    assert stats['written'] == bs
+
+
+def test_signature_pack_roundtrip():
+    data = os.urandom(5000)
+    sig = delta.Signature(len(data), 1024, [zlib.adler32(data[i:i + 1024]) for i in range(0, 5000, 1024)], [b'x' * 16] * 5)
+    back = delta.Signature.unpack(sig.size, 1024, sig.pack())
+    assert back.weak == sig.weak and back.strong == sig.strong and back.tail_len == 5000 % 1024
+
+
+def test_sync_file_patches_only_changed_blocks(tmp_path: Path):
+    bs = delta.DEFAULT_BLOCK_SIZE
+    old = os.urandom(bs * 16)
+    new = bytearray(old)
+    new[bs * 3 + 7:bs * 3 + 107] = os.urandom(100)
+    (tmp_path / 'old').write_bytes(old)
+    (tmp_path / 'new').write_bytes(bytes(new))
+    # dst is an ordinary copy of the basis, no reflink involved
+    shutil.copyfile(tmp_path / 'old', tmp_path / 'dst')
+    stats, sig = delta.sync_file(str(tmp_path / 'new'), str(tmp_path / 'dst'), str(tmp_path / 'old'))
+    assert (tmp_path / 'dst').read_bytes() == bytes(new)
+    assert stats['written'] == bs < len(new)
+    assert sig.size == len(new)
+
+
+def test_sync_file_signs_the_source_as_it_reads_it(tmp_path: Path, monkeypatch):
+    bs = 1024
+    old = os.urandom(bs * 20 + 300)
+    new = old[:5000] + os.urandom(50) + old[5000:]
+    (tmp_path / 'old').write_bytes(old)
+    (tmp_path / 'new').write_bytes(new)
+    shutil.copyfile(tmp_path / 'old', tmp_path / 'dst')
+    basis_sig = delta.signature_of(tmp_path / 'old', bs)
+
+    def no_reread(path, block_size=bs):
+        raise AssertionError(f'{path} read again')
+
+    monkeypatch.setattr(delta, 'signature_of', no_reread)
+    _, sig = delta.sync_file(str(tmp_path / 'new'), str(tmp_path / 'dst'), str(tmp_path / 'old'), sig=basis_sig, block_size=bs)
+    monkeypatch.undo()
+    expected = delta.signature_of(tmp_path / 'dst', bs)
+    assert (sig.size, sig.pack()) == (expected.size, expected.pack())
+
+
+def test_fully_changed_file_skips_byte_wise_search(tmp_path: Path):
+    bs = delta.DEFAULT_BLOCK_SIZE
+    (tmp_path / 'old').write_bytes(os.urandom(4 << 20))
+    new = os.urandom(4 << 20)
+    sig = delta.signature_of(tmp_path / 'old', bs)
+    started = time.perf_counter()
+    ops = list(delta.compute_delta(io.BytesIO(new), sig, roll_limit=bs))
+    assert time.perf_counter() - started < 2
+    assert b''.join(v for k, v in ops if k == 'literal') == new
+
+
+def test_perform_backup_copies_when_old_copy_cannot_be_cloned(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(copy_logic, '_reflink', lambda s, d: False)
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    src.mkdir()
+    dst.mkdir()
+    old = os.urandom(delta.DEFAULT_BLOCK_SIZE * 4)
+    (dst / 'vm.img').write_bytes(old)
+    (src / 'vm.img').write_bytes(old[:-1] + b'x')
+    os.utime(dst / 'vm.img', (1_000, 1_000))
+
+    res = perform_backup(src, dst, run_rsync=False, delta_threshold=1)
+    assert (dst / 'vm.img').read_bytes() == old[:-1] + b'x'
+    assert Path(res['timestamped'][0]).read_bytes() == old
+    assert res['delta_stats']['files'] == 0
+    assert 'delta' not in res['copy_stats']
+    assert res['version_methods'] == {'rename': 1}
+
+
+def test_perform_backup_updates_large_files_with_delta(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(copy_logic, '_reflink', _fake_reflink)
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    src.mkdir()
+    dst.mkdir()
+    old = os.urandom(delta.DEFAULT_BLOCK_SIZE * 8)
+    new = bytearray(old)
+    new[100:200] = os.urandom(100)
+    (dst / 'vm.img').write_bytes(old)
+    (src / 'vm.img').write_bytes(bytes(new))
+    os.utime(dst / 'vm.img', (1_000, 1_000))
+    sigs = tmp_path / 'state' / 'job.sigs.sqlite'
+
+    res = perform_backup(src, dst, run_rsync=False, delta_threshold=1, signatures_path=sigs)
+    assert (dst / 'vm.img').read_bytes() == bytes(new)
+    assert Path(res['timestamped'][0]).read_bytes() == old
+    assert res['delta_stats']['files'] == 1
+    assert res['delta_stats']['literal'] <= delta.DEFAULT_BLOCK_SIZE
+    assert res['delta_stats']['written'] == delta.DEFAULT_BLOCK_SIZE
+    assert res['copy_stats']['delta']['files'] == 1
+
+    # the stored signature describes the new destination for the next run
+    store = delta.SignatureStore(sigs)
+    try:
+        assert store.get('vm.img', (dst / 'vm.img').stat(), delta.DEFAULT_BLOCK_SIZE) is not None
+    finally:
+        store.close()
+
+
+def test_delta_io_is_counted_under_copy(tmp_path: Path, monkeypatch):
+    counted = []
+
+    def counting_reflink(sfd, dfd):
+        counted.append((copy_logic._tls.io_phase, 'reflink'))
+        return _fake_reflink(sfd, dfd)
+
+    monkeypatch.setattr(copy_logic, '_reflink', counting_reflink)
+    monkeypatch.setattr(copy_logic, '_io_counter', lambda phase, op, nbytes=0: counted.append((phase, op)))
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    src.mkdir()
+    dst.mkdir()
+    old = os.urandom(delta.DEFAULT_BLOCK_SIZE * 4)
+    (dst / 'vm.img').write_bytes(old)
+    (src / 'vm.img').write_bytes(old[:-1] + b'!')
+    os.utime(dst / 'vm.img', (1_000, 1_000))
+
+    # one worker: the clone and the patch run on the same thread
+    res = perform_backup(src, dst, run_rsync=False, workers=1, delta_threshold=1)
+    assert res['delta_stats']['files'] == 1
+    assert ('versions', 'reflink') in counted
+    assert ('copy', 'delta') in counted and ('versions', 'delta') not in counted
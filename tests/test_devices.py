@@ -0,0 +1,83 @@
+import os
+
+from pcopy import devices
+
+MOUNTINFO = """\
+28 1 254:0 / / rw,relatime - ext4 /dev/vda rw
+40 28 8:1 / /mnt/back\\040up rw,relatime shared:1 - ext4 /dev/sda1 rw
+41 28 0:52 /@home /home rw,relatime - btrfs /dev/nvme0n1p2 rw
+42 28 0:60 / /mnt/nas rw - nfs4 nas:/export rw
+43 28 0:24 / /dev/shm rw - tmpfs tmpfs rw
+bogus line
+"""
+
+
+def test_parse_mountinfo():
+    mounts = devices.parse_mountinfo(MOUNTINFO)
+    assert mounts[(8, 1)] == devices.Mount('/mnt/back up', 'ext4', '/dev/sda1')
+    assert mounts[(0, 52)].source == '/dev/nvme0n1p2'
+    assert mounts[(0, 60)] == devices.Mount('/mnt/nas', 'nfs4', 'nas:/export')
+    assert len(mounts) == 5
+
+
+def test_device_for_uses_mount_source_for_anonymous_devices(tmp_path, monkeypatch):
+    st_dev = os.stat(tmp_path).st_dev
+    major, minor = os.major(st_dev), os.minor(st_dev)
+    monkeypatch.setattr(devices, 'SYS_BLOCK', str(tmp_path / 'no-sysfs'))
+    monkeypatch.setattr(devices, 'SYS_CLASS_BLOCK', str(tmp_path / 'no-sysfs'))
+
+    nfs = {(major, minor): devices.Mount('/mnt/nas', 'nfs4', 'nas:/export')}
+    assert devices.device_for(str(tmp_path / 'missing' / 'dest'), nfs) == devices.Device('nas:/export', '/mnt/nas')
+    btrfs = {(major, minor): devices.Mount('/home', 'btrfs', '/dev/nvme0n1p2')}
+    assert devices.device_for(str(tmp_path), btrfs).key == 'nvme0n1p2'
+    assert devices.device_for(str(tmp_path), {}).key == f'{major}:{minor}'
+
+
+def test_partitions_collapse_onto_their_disk(tmp_path, monkeypatch):
+    disk = tmp_path / 'devices' / 'sda'
+    (disk / 'sda1').mkdir(parents=True)
+    (disk / 'sda1' / 'partition').write_text('1')
+    by_number = tmp_path / 'dev-block'
+    by_number.mkdir()
+    st_dev = os.stat(tmp_path).st_dev
+    (by_number / f'{os.major(st_dev)}:{os.minor(st_dev)}').symlink_to(disk / 'sda1')
+    monkeypatch.setattr(devices, 'SYS_BLOCK', str(by_number))
+    if os.major(st_dev):
+        assert devices.device_for(str(tmp_path), {}).key == 'sda'
+    assert devices._disk_of_sysfs(str(by_number / f'{os.major(st_dev)}:{os.minor(st_dev)}')) == 'sda'
+
+
+def test_read_mountinfo_file_and_missing(tmp_path):
+    (tmp_path / 'mountinfo').write_text(MOUNTINFO)
+    assert devices.read_mountinfo(str(tmp_path / 'mountinfo'))[(0, 60)].source == 'nas:/export'
+    assert devices.read_mountinfo(str(tmp_path / 'missing')) == {}
+
+
+def test_device_for_reads_mountinfo_and_survives_stat_errors(tmp_path, monkeypatch):
+    st_dev = os.stat(tmp_path).st_dev
+    major, minor = os.major(st_dev), os.minor(st_dev)
+    monkeypatch.setattr(devices, 'SYS_BLOCK', str(tmp_path / 'no-sysfs'))
+    monkeypatch.setattr(devices, 'SYS_CLASS_BLOCK', str(tmp_path / 'no-sysfs'))
+    # without a mounts table the live mountinfo is read
+    monkeypatch.setattr(devices, 'read_mountinfo', lambda: {(major, minor): devices.Mount('/srv', 'tmpfs', 'tmpfs')})
+    assert devices.device_for(str(tmp_path)) == devices.Device('tmpfs:/srv', '/srv')
+    # a path that cannot be statted (here: a name too long) is 'unknown'
+    monkeypatch.setattr(devices, '_existing', lambda path: path)
+    assert devices.device_for(str(tmp_path / ('x' * 5000)), {}) == devices.Device('unknown', '')
+
+
+def test_mount_source_partition_resolves_through_sys_class_block(tmp_path, monkeypatch):
+    st_dev = os.stat(tmp_path).st_dev
+    major, minor = os.major(st_dev), os.minor(st_dev)
+    disk = tmp_path / 'devices' / 'nvme0n1'
+    (disk / 'nvme0n1p2').mkdir(parents=True)
+    (disk / 'nvme0n1p2' / 'partition').write_text('2')
+    by_name = tmp_path / 'class-block'
+    by_name.mkdir()
+    (by_name / 'nvme0n1p2').symlink_to(disk / 'nvme0n1p2')
+    monkeypatch.setattr(devices, 'SYS_BLOCK', str(tmp_path / 'no-sysfs'))
+    monkeypatch.setattr(devices, 'SYS_CLASS_BLOCK', str(by_name))
+    btrfs = {(major, minor): devices.Mount('/home', 'btrfs', '/dev/nvme0n1p2')}
+    # both subvolumes of one partition land on the disk, not the partition
+    assert devices.device_for(str(tmp_path), btrfs) == devices.Device('nvme0n1', '/home')
+    assert devices._disk_of_sysfs(str(by_name / 'missing')) is None
@@ -0,0 +1,150 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from pcopy import copy_logic, control
+from pcopy.copy_logic import perform_backup
+from pcopy.file_index import FileIndex, index_path_for
+
+
+def _tree(root: Path, n: int = 5) -> None:
+    (root / 'sub').mkdir(parents=True)
+    for i in range(n):
+        (root / 'sub' / f'f{i}.txt').write_text(f'data {i}')
+
+
+def test_index_skips_unchanged_files_without_dest_stat(tmp_path: Path, monkeypatch):
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    idx = tmp_path / 'state' / 'job.sqlite'
+    _tree(src)
+
+    first = perform_backup(src, dst, run_rsync=False, index_path=idx)
+    assert len(first['copied_new']) == 5
+    assert first['files_skipped'] == 0
+
+    dest_stats = []
+    real_dest_stat = copy_logic._dest_stat
+    monkeypatch.setattr(copy_logic, '_dest_stat', lambda p: dest_stats.append(p) or real_dest_stat(p))
+
+    # nothing changed: every file is answered by the index alone
+    second = perform_backup(src, dst, run_rsync=False, index_path=idx)
+    assert second['files_skipped'] == 5
+    assert dest_stats == []
+
+    # one modified file is the only destination stat
+    (src / 'sub' / 'f2.txt').write_text('changed!')
+    os.utime(src / 'sub' / 'f2.txt', (4_000_000_000, 4_000_000_000))
+    third = perform_backup(src, dst, run_rsync=False, index_path=idx)
+    assert third['files_skipped'] == 4
+    assert dest_stats == [str(dst / 'sub' / 'f2.txt')]
+    assert (dst / 'sub' / 'f2.txt').read_text() == 'changed!'
+
+
+def test_reindex_rebuilds_the_index(tmp_path: Path):
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    idx = tmp_path / 'job.sqlite'
+    _tree(src, n=2)
+    perform_backup(src, dst, run_rsync=False, index_path=idx)
+    # a file removed from the destination by hand is restored after --reindex
+    (dst / 'sub' / 'f0.txt').unlink()
+    assert perform_backup(src, dst, run_rsync=False, index_path=idx)['files_skipped'] == 2
+    res = perform_backup(src, dst, run_rsync=False, index_path=idx, reindex=True)
+    assert res['files_skipped'] == 0
+    assert (dst / 'sub' / 'f0.txt').read_text() == 'data 0'
+
+
+def test_content_hash_skips_touched_files(tmp_path: Path):
+    src = tmp_path / 'src'
+    _tree(src, n=1)
+    idx = tmp_path / 'job.sqlite'
+    perform_backup(src, tmp_path / 'dst', run_rsync=False, index_path=idx, index_hash=True)
+    os.utime(src / 'sub' / 'f0.txt', (4_000_000_000, 4_000_000_000))
+    res = perform_backup(src, tmp_path / 'dst', run_rsync=False, index_path=idx, index_hash=True)
+    assert res['files_skipped'] == 1
+    assert res['updated'] == []
+
+
+def test_discard_keeps_previous_state(tmp_path: Path):
+    src = tmp_path / 'f.txt'
+    src.write_text('x')
+    index = FileIndex(tmp_path / 'i.sqlite')
+    index.record('f.txt', src.stat())
+    index.discard()
+    index.close()
+    index = FileIndex(tmp_path / 'i.sqlite')
+    assert index.lookup('f.txt') is None
+    index.close()
+
+
+def test_index_path_for_named_and_adhoc(tmp_path: Path):
+    assert index_path_for(tmp_path, 'my job', 's', 'd') == tmp_path / 'index' / 'my_job.sqlite'
+    a = index_path_for(tmp_path, None, 's', 'd')
+    assert a.name.startswith('adhoc-') and a != index_path_for(tmp_path, None, 's', 'other')
+
+
+def _fake_rsync(monkeypatch, rc):
+    calls = []
+
+    def run_streaming(cmd, out, **kwargs):
+        calls.append(cmd)
+        if isinstance(rc, Exception):
+            raise rc
+        return rc
+
+    monkeypatch.setattr(copy_logic.shutil, 'which', lambda name: '/usr/bin/rsync')
+    monkeypatch.setattr(copy_logic, 'run_streaming', run_streaming)
+    return calls
+
+
+def test_rsync_mode_commits_the_index_only_after_rsync_succeeds(tmp_path: Path, monkeypatch):
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    idx = tmp_path / 'job.sqlite'
+    _tree(src, n=2)
+    (dst / 'sub').mkdir(parents=True)
+    (dst / 'sub' / 'f0.txt').write_text('old')
+    os.utime(dst / 'sub' / 'f0.txt', (1_000, 1_000))
+
+    # rsync fails: the queued rows for the changed and the new file are dropped
+    _fake_rsync(monkeypatch, 23)
+    assert perform_backup(src, dst, index_path=idx)['rsync_returncode'] == 23
+    # rsync cannot start at all: same
+    res = perform_backup(src, dst, index_path=idx, log_file=str(tmp_path / 'rsync.log'))
+    assert res['files_skipped'] == 0
+    _fake_rsync(monkeypatch, OSError('no rsync'))
+    res = perform_backup(src, dst, index_path=idx)
+    assert res['files_skipped'] == 0 and res['rsync_output'].startswith('rsync failed: no rsync')
+
+    calls = _fake_rsync(monkeypatch, 0)
+    # a dry run passes --dry-run on and remembers nothing either
+    assert perform_backup(src, dst, index_path=idx, dry_run=True)['files_skipped'] == 0
+    assert '--dry-run' in calls.pop()
+    assert perform_backup(src, dst, index_path=idx, log_file=str(tmp_path / 'rsync.log'))['rsync_used']
+    assert '--log-file' in calls[0]
+    assert perform_backup(src, dst, index_path=idx)['files_skipped'] == 2
+
+
+def test_failed_walk_discards_index_and_signatures(tmp_path: Path):
+    src = tmp_path / 'src'
+    dst = tmp_path / 'dst'
+    idx = tmp_path / 'job.sqlite'
+    _tree(src, n=3)
+
+    class CancelAfter(control.RunControl):
+        def __init__(self, n):
+            super().__init__(name='t')
+            self.n = n
+
+        def checkpoint(self):
+            self.n -= 1
+            if self.n < 0:
+                raise control.Cancelled()
+
+    with pytest.raises(control.Cancelled):
+        perform_backup(src, dst, run_rsync=False, index_path=idx, signatures_path=tmp_path / 'sigs.sqlite', control=CancelAfter(2))
+    # nothing of the cancelled run was remembered
+    res = perform_backup(src, dst, run_rsync=False, index_path=idx)
+    assert res['files_skipped'] == 0
@@ -0,0 +1,77 @@
+import sqlite3
+import threading
+
+from pcopy import config, runner
+from pcopy.history import RunHistory, history_path
+
+
+def test_history_path_env_override(tmp_path, monkeypatch):
+    monkeypatch.delenv('PCOPY_HISTORY_PATH', raising=False)
+    assert history_path(tmp_path) == tmp_path / 'history.sqlite'
+    monkeypatch.setenv('PCOPY_HISTORY_PATH', str(tmp_path / 'h.db'))
+    assert history_path(tmp_path / 'other') == tmp_path / 'h.db'
+
+
+def test_start_then_finish_updates_same_row(tmp_path):
+    hist = RunHistory(tmp_path / 'h.sqlite')
+    run_id = hist.start('job', {'timestamp': 't0', 'status': None, 'status_str': 'RUNNING'})
+    assert hist.latest('job')['status_str'] == 'RUNNING'
+    assert hist.finish(run_id, 'job', {'timestamp': 't1', 'status': 0, 'status_str': 'PASS'}) == run_id
+    assert hist.runs('job') == [{'timestamp': 't1', 'status': 0, 'status_str': 'PASS'}]
+    # an unknown id records a fresh finished run
+    other = hist.finish(None, 'job', {'timestamp': 't2', 'status': 1, 'status_str': 'FAILED'})
+    assert other != run_id
+    assert [r['status_str'] for r in hist.runs('job')] == ['FAILED', 'PASS']
+    hist.close()
+
+
+def test_latest_per_job_and_wal(tmp_path):
+    path = tmp_path / 'h.sqlite'
+    hist = RunHistory(path)
+    for i in range(3):
+        hist.start('a', {'timestamp': str(i), 'status_str': 'PASS'})
+    hist.start('b', {'timestamp': 'x', 'status_str': 'FAILED'})
+    latest = hist.latest_per_job()
+    assert latest['a']['timestamp'] == '2'
+    assert latest['b']['status_str'] == 'FAILED'
+    assert hist.latest('missing') is None
+    hist.start('a', {'timestamp': '3', 'status_str': 'RUNNING'})
+    assert hist.latest_per_job()['a']['status_str'] == 'RUNNING'
+    assert hist.latest_per_job(finished=True)['a']['timestamp'] == '2'
+    mode = sqlite3.connect(str(path)).execute('PRAGMA journal_mode').fetchone()[0]
+    assert mode == 'wal'
+    hist.close()
+
+
+def test_concurrent_writers_keep_every_run(tmp_path):
+    path = tmp_path / 'h.sqlite'
+
+    def worker(job):
+        hist = RunHistory(path)
+        for i in range(10):
+            run_id = hist.start(job, {'timestamp': str(i), 'status_str': 'RUNNING'})
+            hist.finish(run_id, job, {'timestamp': str(i), 'status': 0, 'status_str': 'PASS'})
+        hist.close()
+
+    threads = [threading.Thread(target=worker, args=(f'job{n}',)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    hist = RunHistory(path)
+    for n in range(4):
+        runs = hist.runs(f'job{n}', limit=100)
+        assert len(runs) == 10
+        assert all(r['status_str'] == 'PASS' for r in runs)
+    hist.close()
+
+
+def test_menu_reads_last_run_from_history(monkeypatch, capsys):
+    monkeypatch.setattr(config, 'SETTINGS', {'job1': {'source': 'sx', 'dest': 'dx', 'last_run': {'status_str': 'FAILED'}}})
+    monkeypatch.setattr('rich.prompt.Prompt.ask', lambda *a, **k: 'q')
+    runner._record_run_ml('job1', {'timestamp': '2026-01-02T03:04:05', 'status': 0, 'status_str': 'PASS', 'transferred_bytes': 2048, 'elapsed_seconds': 5})
+
+    runner._show_menu()
+    out = capsys.readouterr().out
+    assert 'PASS' in out
+    assert 'FAILED' not in out
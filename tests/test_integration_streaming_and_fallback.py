@@ -71,8 +71,7 @@ def test_streaming_popen_persists(tmp_path, monkeypatch):
 
     rc = runner.run_backup(source='s', dest='d', name='jobA', persist_last_run=True)
     assert rc == 0
-    loaded = yaml.safe_load(yaml_path.read_text(encoding='utf8'))
-    lr = loaded['jobA']['last_run']
+    lr = runner._history_ml().latest('jobA')
     assert lr['status'] == 0
     assert lr['transferred_bytes'] == 12345
     assert lr['dupes_saved'] in (True, False)
@@ -95,13 +94,12 @@ def test_fallback_run_persists(tmp_path, monkeypatch):
     monkeypatch.delenv('PYTEST_CURRENT_TEST', raising=False)
     rc = runner.run_backup(source='s', dest='d', name='jobA', persist_last_run=True)
     assert rc == 0
-    loaded = yaml.safe_load(yaml_path.read_text(encoding='utf8'))
-    lr = loaded['jobA']['last_run']
+    lr = runner._history_ml().latest('jobA')
     assert lr['status'] == 0
     assert lr['transferred_bytes'] == 9999
 
 
-def test_yaml_write_failure_is_handled(tmp_path, monkeypatch):
+def test_history_write_failure_is_handled(tmp_path, monkeypatch):
     yaml_path = _write_tmp_settings(tmp_path)
     monkeypatch.setattr(config, 'SETTINGS_PATH', yaml_path)
     monkeypatch.setenv('PCOPY_SETTINGS_PATH', str(yaml_path))
@@ -109,13 +107,12 @@ def test_yaml_write_failure_is_handled(tmp_path, monkeypatch):
     # Monkeypatch the writer to raise
     def broken_writer(name, entry):
         raise OSError('disk full')
-    monkeypatch.setattr(runner, '_write_last_run_yaml_ml', broken_writer)
+    monkeypatch.setattr(runner, '_record_run_ml', broken_writer)
 
     # Ensure we don't call real rsync: stub subprocess.run
     monkeypatch.setattr(runner.subprocess, 'run', lambda *a, **k: SimpleNamespace(returncode=0, stdout=''))
 
     rc = runner.run_backup(source='s', dest='d', name='jobA', persist_last_run=True)
     assert rc == 0
-    # file should be unchanged because writer raised
-    loaded = yaml.safe_load(yaml_path.read_text(encoding='utf8'))
-    assert 'last_run' not in loaded['jobA']
+    # nothing recorded because writer raised
+    assert runner._history_ml().latest('jobA') is None
@@ -0,0 +1,200 @@
+import threading
+import time
+
+import pytest
+
+from pcopy import jobs, runner
+import pcopy.config as config
+from pcopy.dashboard_live import JobBoard
+from pcopy.devices import Device
+
+
+def test_lock_path_resolves_aliases(tmp_path):
+    (tmp_path / 'dest').mkdir()
+    (tmp_path / 'alias').symlink_to(tmp_path / 'dest')
+    locks = tmp_path / 'locks'
+    assert jobs.lock_path(tmp_path / 'dest', locks) == jobs.lock_path(tmp_path / 'alias', locks)
+    assert jobs.lock_path(tmp_path / 'dest', locks) != jobs.lock_path(tmp_path / 'other', locks)
+
+
+def test_dest_lock_is_exclusive(tmp_path):
+    first = jobs.DestLock(tmp_path / 'd', tmp_path / 'locks', owner='a')
+    second = jobs.DestLock(tmp_path / 'd', tmp_path / 'locks', owner='b')
+    assert first.acquire()
+    assert not second.acquire(blocking=False)
+    assert 'a' in first.path.read_text()
+    first.release()
+    assert second.acquire(blocking=False)
+    second.release()
+
+
+def test_run_jobs_overlaps_different_dests(tmp_path):
+    barrier = threading.Barrier(2, timeout=5)
+    states = []
+
+    def task():
+        barrier.wait()
+        return 0
+
+    disks = {str(tmp_path / 'da'): 'sda', str(tmp_path / 'db'): 'sdb'}
+    rcs = jobs.run_jobs([('a', str(tmp_path / 'da'), task), ('b', str(tmp_path / 'db'), task)], 2, tmp_path / 'locks',
+                        on_state=lambda name, state: states.append((name, state)), resolve=lambda p: Device(disks[p], '/'))
+    assert rcs == {'a': 0, 'b': 0}
+    assert ('a', jobs.PASS) in states and ('b', jobs.RUNNING) in states
+
+
+def test_run_jobs_serializes_same_dest(tmp_path):
+    active = []
+    overlap = []
+
+    def task():
+        active.append(1)
+        if len(active) > 1:
+            overlap.append(True)
+        time.sleep(0.05)
+        active.pop()
+        return 0
+
+    dest = str(tmp_path / 'shared')
+    rcs = jobs.run_jobs([(n, dest, task) for n in 'abc'], 3, tmp_path / 'locks')
+    assert rcs == {'a': 0, 'b': 0, 'c': 0}
+    assert not overlap
+
+
+def _disk_of(path):
+    # '/sda/x' lives on disk 'sda'
+    return Device(path.split('/')[1], '/' + path.split('/')[1])
+
+
+def _tracking(name, log, active, hold=0.05):
+    def run():
+        active.append(name)
+        log.append(tuple(sorted(active)))
+        time.sleep(hold)
+        active.remove(name)
+        return 0
+    return run
+
+
+def test_scheduler_overlaps_disks_and_serializes_shared_ones(tmp_path):
+    log, active = [], []
+    tasks = [
+        jobs.Job('a', '/sdb/a', _tracking('a', log, active), source='/sda/a'),
+        jobs.Job('b', '/sdb/b', _tracking('b', log, active), source='/sdc/b'),
+        jobs.Job('c', '/sdd/c', _tracking('c', log, active), source='/sde/c'),
+    ]
+    sched = jobs.Scheduler(4, tmp_path / 'locks', resolve=_disk_of)
+    assert sched.run(tasks) == {'a': 0, 'b': 0, 'c': 0}
+    # a and b share sdb and never overlap; c runs next to either of them
+    assert not any({'a', 'b'} <= set(snapshot) for snapshot in log)
+    assert any('c' in snapshot and len(snapshot) > 1 for snapshot in log)
+    assert sched.devices['a'] == ('sda', 'sdb')
+    assert 'b waits: sdb busy with a' in sched.decisions
+    assert 'a: source on sda, dest on sdb' in sched.decisions
+
+
+def test_scheduler_device_limit_weight_and_priority(tmp_path):
+    log, active = [], []
+    tasks = [
+        jobs.Job('low', '/sda/1', _tracking('low', log, active)),
+        jobs.Job('heavy', '/sda/2', _tracking('heavy', log, active), weight=2, priority=5),
+        jobs.Job('light', '/sda/3', _tracking('light', log, active)),
+    ]
+    sched = jobs.Scheduler(3, tmp_path / 'locks', device_limit=2, resolve=_disk_of)
+    assert sched.run(tasks) == {'low': 0, 'heavy': 0, 'light': 0}
+    # the high-priority job fills both sda slots on its own, then two light ones share them
+    assert log[0] == ('heavy',)
+    assert ('light', 'low') in log
+    assert 'heavy: dest on sda, priority 5, weight 2' in sched.decisions
+
+
+def test_run_jobs_reports_failures(tmp_path):
+    def boom():
+        raise RuntimeError('nope')
+
+    rcs = jobs.run_jobs([('ok', 'd1', lambda: 0), ('bad', 'd2', boom), ('rc', 'd3', lambda: 23)], 2, tmp_path / 'locks')
+    assert rcs == {'ok': 0, 'bad': 1, 'rc': 23}
+
+
+def test_main_jobs_runs_named_backups_on_one_board(tmp_path, monkeypatch):
+    monkeypatch.setenv('PCOPY_TEST_MODE', '1')
+    monkeypatch.setattr(config, 'STATE_DIR', tmp_path / 'state')
+    monkeypatch.setattr(config, 'reload_settings', lambda: None)
+    monkeypatch.setattr(config, 'SETTINGS', {n: {'source': f's{n}', 'dest': str(tmp_path / n)} for n in ('a', 'b', 'c')})
+    boards = []
+    finish = JobBoard.finish
+
+    def spy_finish(self):
+        boards.append(self)
+        finish(self)
+
+    monkeypatch.setattr(JobBoard, 'finish', spy_finish)
+
+    assert runner.main(['--jobs', '2', 'do', 'a', 'b', 'c']) == 0
+    board, = boards
+    assert [row.state for row in board.rows.values()] == [jobs.PASS] * 3
+    assert all(row.files_moved_count == 2 for row in board.rows.values())
+    assert runner._history_ml().latest('b')['status_str'] == 'PASS'
+
+
+def test_main_without_jobs_stays_sequential(monkeypatch):
+    calls = []
+
+    def fake_run_backup(source=None, dest=None, name=None):
+        calls.append(name)
+        return 0
+
+    monkeypatch.setattr(runner, 'run_backup', fake_run_backup)
+    monkeypatch.setattr(config, 'reload_settings', lambda: None)
+    monkeypatch.setattr(config, 'SETTINGS', {'a': {'source': 's', 'dest': 'd'}, 'b': {'source': 's', 'dest': 'e'}})
+    monkeypatch.setattr(runner, '_run_concurrent_ml', lambda *a, **k: pytest.fail('ran concurrently'))
+    assert runner.main(['do', 'a', 'b']) == 0
+    assert calls == ['a', 'b']
+
+
+def test_overlapping_sequential_invocations_share_the_dest_lock(tmp_path, monkeypatch, capsys):
+    active = []
+    overlap = []
+    started = threading.Event()
+
+    def fake_run_backup(source=None, dest=None, name=None):
+        active.append(name)
+        if len(active) > 1:
+            overlap.append(tuple(active))
+        started.set()
+        time.sleep(0.2)
+        active.remove(name)
+        return 0
+
+    monkeypatch.setattr(runner, 'run_backup', fake_run_backup)
+    monkeypatch.setattr(config, 'reload_settings', lambda: None)
+    # two job names, one destination: e.g. a manual `pcopy run` while cron runs the other
+    monkeypatch.setattr(config, 'SETTINGS', {'a': {'source': 's', 'dest': str(tmp_path / 'd')}, 'b': {'source': 't', 'dest': str(tmp_path / 'd')}})
+    rcs = []
+    first = threading.Thread(target=lambda: rcs.append(runner.main(['run', 'a'])))
+    first.start()
+    assert started.wait(5)
+    assert runner.main(['run', 'b']) == 0
+    first.join(5)
+    assert rcs == [0]
+    assert not overlap
+    assert 'Waiting for' in capsys.readouterr().out
+
+
+def test_run_concurrent_uses_job_settings_and_reports_failures(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(config, 'SETTINGS', {'device_jobs': 1, 'big': {'priority': 3, 'weight': 2}, 'scalar': 5})
+    started = []
+
+    def call(dashboard=None, **kwargs):
+        started.append((kwargs['name'], dashboard.name))
+        return 23 if kwargs['name'] == 'scalar' else 0
+
+    specs = [(n, dict(name=n, source=str(tmp_path / n), dest=str(tmp_path / 'd' / n))) for n in ('small', 'big', 'scalar', 'adhoc')]
+    rc = runner._run_concurrent_ml(specs, 2, call, live=False)
+    assert rc == 23
+    # the job with a priority starts first; names without a settings block get the defaults
+    assert started[0] == ('big', 'big')
+    assert sorted(n for n, _ in started) == ['adhoc', 'big', 'scalar', 'small']
+    out = capsys.readouterr().out
+    assert 'priority 3, weight 2' in out
+    assert '3 passed, 1 failed' in out
@@ -0,0 +1,97 @@
+import urllib.request
+
+import pytest
+
+from pcopy import config, control, metrics, runner
+
+
+ENTRY = {
+    'timestamp': '2026-01-02T03:04:05', 'status': 0, 'status_str': 'PASS', 'elapsed_seconds': 12.5,
+    'transferred_bytes': 4096, 'files_moved': 3, 'duplicates': 0, 'errors_count': 1,
+    'versions_created': 2, 'versions_bytes': 100, 'phases': {'walk': {'wall_seconds': 0.25, 'cpu_seconds': 0.5, 'items': 7}},
+}
+
+
+def test_render_labels_every_metric_by_job():
+    text = metrics.render({'photos': ENTRY, 'odd "job"': {'status': 23}})
+    lines = text.splitlines()
+    assert '# TYPE pcopy_last_run_duration_seconds gauge' in lines
+    assert 'pcopy_last_run_duration_seconds{job="photos"} 12.5' in lines
+    assert 'pcopy_last_run_transferred_bytes{job="photos"} 4096' in lines
+    assert 'pcopy_last_run_versions_created{job="photos"} 2' in lines
+    assert 'pcopy_last_run_phase_seconds{job="photos",phase="walk"} 0.25' in lines
+    assert 'pcopy_last_run_phase_items{job="photos",phase="walk"} 7' in lines
+    assert 'pcopy_last_run_success{job="photos"} 1' in lines
+    assert 'pcopy_last_run_success{job="odd \\"job\\""} 0' in lines
+    # missing values are left out rather than exported as 0
+    assert 'pcopy_last_run_duration_seconds{job="odd \\"job\\""}' not in text
+    # one HELP/TYPE header per family
+    assert text.count('# TYPE pcopy_last_run_success gauge') == 1
+
+
+def test_render_active_runs():
+    text = metrics.render({}, [{'name': 'photos', 'state': 'paused', 'bytes': 10, 'files': 1, 'progress': 40, 'elapsed_seconds': 2.0, 'errors_count': 0}])
+    assert 'pcopy_run_active{job="photos",state="paused"} 1' in text
+    assert 'pcopy_run_progress_percent{job="photos"} 40' in text
+
+
+def test_write_textfile_replaces_atomically(tmp_path):
+    path = tmp_path / 'collector' / 'pcopy.prom'
+    metrics.write_textfile(path, 'a 1\n')
+    metrics.write_textfile(path, 'a 2\n')
+    assert path.read_text() == 'a 2\n'
+    assert [p.name for p in path.parent.iterdir()] == ['pcopy.prom']
+
+
+def test_named_run_writes_textfile(tmp_path, monkeypatch):
+    monkeypatch.setenv('PCOPY_TEST_MODE', '1')
+    monkeypatch.setenv('PCOPY_METRICS_TEXTFILE', str(tmp_path / 'pcopy.prom'))
+    monkeypatch.setattr(config, 'reload_settings', lambda: None)
+    monkeypatch.setattr(config, 'SETTINGS', {'photos': {'source': 's', 'dest': str(tmp_path / 'd')}})
+    assert runner.main(['do', 'photos']) == 0
+    text = (tmp_path / 'pcopy.prom').read_text()
+    assert 'pcopy_last_run_exit_code{job="photos"} 0' in text
+    assert 'pcopy_last_run_files_moved{job="photos"} 2' in text
+
+
+def test_control_http_serves_metrics():
+    server = control.ControlServer(http_port=0, metrics=lambda: metrics.render({'photos': ENTRY})).start()
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.http_port}/metrics', timeout=5) as resp:
+            assert resp.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert b'pcopy_last_run_errors{job="photos"} 1' in resp.read()
+    finally:
+        server.close()
+
+
+def test_render_skips_families_without_samples():
+    # an unparsable timestamp leaves its family empty: no HELP/TYPE lines either
+    text = metrics.render({'photos': {'timestamp': 'yesterday', 'status': 0, 'phases': 'garbage'}})
+    assert 'pcopy_last_run_timestamp_seconds' not in text
+    assert 'pcopy_last_run_phase_seconds' not in text
+    assert 'pcopy_last_run_success{job="photos"} 1' in text
+
+
+def test_textfile_path_env_wins_over_setting(tmp_path, monkeypatch):
+    monkeypatch.delenv('PCOPY_METRICS_TEXTFILE', raising=False)
+    assert metrics.textfile_path(None) is None
+    assert metrics.textfile_path('~/x.prom').name == 'x.prom'
+    monkeypatch.setenv('PCOPY_METRICS_TEXTFILE', str(tmp_path / 'env.prom'))
+    assert metrics.textfile_path('~/x.prom') == tmp_path / 'env.prom'
+
+
+def test_failed_textfile_write_leaves_no_temp_file(tmp_path):
+    # the target is a non-empty directory, so the final rename fails
+    target = tmp_path / 'pcopy.prom'
+    target.mkdir()
+    (target / 'keep').write_text('x')
+    with pytest.raises(OSError):
+        metrics.write_textfile(target, 'a 1\n')
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['pcopy.prom']
+
+
+def test_export_metrics_logs_write_errors(tmp_path, monkeypatch, caplog):
+    (tmp_path / 'file').write_text('x')
+    monkeypatch.setenv('PCOPY_METRICS_TEXTFILE', str(tmp_path / 'file' / 'pcopy.prom'))
+    runner._export_metrics_ml()
+    assert 'Failed to write metrics textfile' in caplog.text
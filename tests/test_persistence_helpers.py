@@ -24,16 +24,15 @@ def test_mark_run_running_creates_entry(tmp_path):
     # should not raise
     runner._mark_run_running_ml('job_running')
 
-    loaded = yaml.safe_load(yaml_path.read_text(encoding='utf8'))
-    assert 'job_running' in loaded
-    lr = loaded['job_running']['last_run']
+    lr = runner._history_ml().latest('job_running')
     assert lr['status'] is None
     assert lr['status_str'] == 'RUNNING'
 
 
-def test_write_last_run_triggers_reload_settings(tmp_path, monkeypatch):
+def test_record_run_leaves_settings_untouched(tmp_path, monkeypatch):
     yaml_path = _write_tmp_settings(tmp_path, name='job_write')
     os.environ['PCOPY_SETTINGS_PATH'] = str(yaml_path)
+    before = yaml_path.read_bytes()
 
     called = {'flag': False}
 
@@ -42,12 +41,14 @@ def test_write_last_run_triggers_reload_settings(tmp_path, monkeypatch):
 
     monkeypatch.setattr(config, 'reload_settings', fake_reload_settings)
 
-    entry = {'timestamp': datetime.now().isoformat(), 'status': 0}
-    runner._write_last_run_yaml_ml('job_write', entry)
-    assert called['flag'] is True
+    runner._mark_run_running_ml('job_write')
+    entry = {'timestamp': datetime.now().isoformat(), 'status': 0, 'status_str': 'PASS'}
+    runner._record_run_ml('job_write', entry)
+    assert called['flag'] is False
+    assert yaml_path.read_bytes() == before
 
-    loaded = yaml.safe_load(yaml_path.read_text(encoding='utf8'))
-    assert 'last_run' in loaded['job_write']
+    runs = runner._history_ml().runs('job_write')
+    assert [r['status_str'] for r in runs] == ['PASS']
 
 
 def test_persist_last_run_dupes_saved_detection_false(tmp_path, monkeypatch):
@@ -57,14 +58,17 @@ def test_persist_last_run_dupes_saved_detection_false(tmp_path, monkeypatch):
     monkeypatch.setattr(config, 'BACKUP_VERSIONS_DIR', Path(tmp_path / 'missing_versions'))
 
     dash = SimpleNamespace()
+    dash.versions_created = 0
     dash.start_time = datetime.now()
     dash.transferred = 'Total transferred file size: 321 bytes'
     dash.errors = []
     dash.duplicates = 0
 
     runner._persist_last_run_entry_ml('job_no_dupes', 0, False, dash)
-    loaded = yaml.safe_load(yaml_path.read_text(encoding='utf8'))
-    assert loaded['job_no_dupes']['last_run']['dupes_saved'] is False
+    lr = runner._history_ml().latest('job_no_dupes')
+    assert lr['dupes_saved'] is False
+    assert lr['versions_created'] == 0
+    assert lr['versions_bytes'] == 0
 
 
 def test_persist_last_run_dupes_saved_detection_true(tmp_path, monkeypatch):
@@ -76,20 +80,25 @@ def test_persist_last_run_dupes_saved_detection_true(tmp_path, monkeypatch):
     monkeypatch.setattr(runner, 'BACKUP_VERSIONS_DIR', versions)
 
     dash = SimpleNamespace()
-    # set start_time sufficiently in the past so newly created file has mtime >= start_time
     dash.start_time = datetime.now() - timedelta(seconds=10)
     dash.transferred = 'Total transferred file size: 777 bytes'
     dash.errors = []
     dash.duplicates = 1
+    # counted by the copy engine during the run
+    dash.versions_created = 2
+    dash.versions_bytes = 300
 
-    # create a recent file in versions
+    # files already in the versions folder are not scanned
     p = versions / 'recent.dat'
     p.write_text('x')
     os.utime(str(p), None)
+    monkeypatch.setattr(Path, 'rglob', lambda *a, **k: pytest.fail('versions tree scanned'))
 
     runner._persist_last_run_entry_ml('job_dupes', 0, False, dash)
-    loaded = yaml.safe_load(yaml_path.read_text(encoding='utf8'))
-    assert loaded['job_dupes']['last_run']['dupes_saved'] is True
+    lr = runner._history_ml().latest('job_dupes')
+    assert lr['dupes_saved'] is True
+    assert lr['versions_created'] == 2
+    assert lr['versions_bytes'] == 300
 
 
 def test_mark_run_handles_writer_error_logs(tmp_path, monkeypatch, caplog):
@@ -99,10 +108,23 @@ def test_mark_run_handles_writer_error_logs(tmp_path, monkeypatch, caplog):
     def broken_write(name, entry):
         raise OSError('disk full')
 
-    monkeypatch.setattr(runner, '_write_last_run_yaml_ml', broken_write)
+    monkeypatch.setattr(runner, '_record_run_ml', broken_write)
 
     caplog.clear()
     caplog.set_level('ERROR')
     # Should not raise
     runner._mark_run_running_ml('job_err')
     assert any('Failed to mark running for job_err' in rec.getMessage() for rec in caplog.records)
+
+
+def test_persist_last_run_records_stall_events(tmp_path, monkeypatch):
+    yaml_path = _write_tmp_settings(tmp_path, name='job_stall')
+    monkeypatch.setenv('PCOPY_SETTINGS_PATH', str(yaml_path))
+
+    event = {'kind': 'stall', 'elapsed_seconds': 12.0, 'idle_seconds': 10.0, 'lines': 3, 'bytes': 40, 'last_line': 'x'}
+    dash = SimpleNamespace(start_time=datetime.now(), transferred='', errors=[], duplicates=0, stall_events=[event])
+    runner._persist_last_run_entry_ml('job_stall', -9, False, dash)
+
+    lr = runner._history_ml().latest('job_stall')
+    assert lr['stall_events'] == [event]
+    assert lr['status_str'] == 'FAILED'
@@ -0,0 +1,70 @@
+import pstats
+
+import pytest
+
+from pcopy import config, copy_logic, runner
+from pcopy.copy_logic import perform_backup
+from pcopy.profiling import IOCounter, Profiler
+
+
+def _tree(tmp_path, n=5):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i in range(n):
+        (src / f'{i}.bin').write_bytes(b'x' * 4096)
+    return src
+
+
+def test_cpu_profile_writes_pstats_and_collapsed_stacks(tmp_path):
+    src = _tree(tmp_path)
+    prof = Profiler('cpu', tmp_path / 'prof').start()
+    for i in range(3):
+        perform_backup(src, tmp_path / f'dst{i}', run_rsync=False, workers=2)
+    pstats_path, collapsed_path = prof.stop()
+    assert 'perform_backup' in str([fn for _, _, fn in pstats.Stats(str(pstats_path)).stats])
+    for line in collapsed_path.read_text().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0 and stack
+
+
+def test_mem_profile_reports_each_phase(tmp_path):
+    src = _tree(tmp_path)
+    prof = Profiler('mem', tmp_path / 'prof').start()
+    perform_backup(src, tmp_path / 'dst', run_rsync=False)
+    snapshot_path, report_path = prof.stop()
+    report = report_path.read_text()
+    assert '== after walk:' in report and '== after copy:' in report and '== after run:' in report
+    assert snapshot_path.stat().st_size > 0
+
+
+def test_io_profile_counts_calls_per_phase(tmp_path):
+    src = _tree(tmp_path)
+    prof = Profiler('io', tmp_path / 'prof').start()
+    perform_backup(src, tmp_path / 'dst', run_rsync=False)
+    counts = dict(prof._io.counts)
+    report_path, = prof.stop()
+    assert counts[('walk', 'stat')][0] == 10
+    assert counts[('walk', 'scandir')][0] == 1
+    assert counts[('copy', 'open')][0] == 10
+    assert sum(nbytes for (phase, op), (_, nbytes) in counts.items() if phase == 'copy' and op != 'read') >= 5 * 4096
+    assert 'copystat' in report_path.read_text()
+    # counting stops with the profiler
+    assert copy_logic._io_counter is None
+
+
+def test_io_counter_report_and_bad_mode(tmp_path):
+    counter = IOCounter()
+    counter('walk', 'stat')
+    counter('copy', 'sendfile', 10)
+    assert counter.report().splitlines()[1].split() == ['copy', 'sendfile', '1', '10']
+    with pytest.raises(ValueError):
+        Profiler('disk', tmp_path)
+
+
+def test_main_profile_flag(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('PCOPY_TEST_MODE', '1')
+    monkeypatch.setattr(config, 'reload_settings', lambda: None)
+    monkeypatch.setattr(config, 'SETTINGS', {'photos': {'source': 's', 'dest': str(tmp_path / 'd')}})
+    assert runner.main(['--profile', 'cpu', '--profile-dir', str(tmp_path / 'p'), 'do', 'photos']) == 0
+    assert 'Profile written to' in capsys.readouterr().out
+    assert sorted(p.suffix for p in (tmp_path / 'p').iterdir()) == ['.collapsed', '.pstats']
@@ -0,0 +1,72 @@
+from pcopy.dashboard_live import LiveDashboard
+from pcopy.rsync_parse import RSYNC_OUTPUT_ARGS, RsyncParser, parse_size
+from pcopy.runner import _build_rsync_cmd
+
+
+STRUCTURED_RUN = [
+    'sending incremental file list',
+    'PCOPY cd+++++++++ 0 sub/',
+    'PCOPY >f+++++++++ 100,003 a file.bin',
+    '        100,003  50%   95.37MB/s    0:00:00 (xfr#1, to-chk=1/3)',
+    'PCOPY >f+++++++++ 3 sub/b.txt',
+    'PCOPY .f..t...... 9 unchanged.txt',
+    'rsync: [sender] send_files failed to open "/src/locked": Permission denied (13)',
+    '',
+    'Number of files: 4 (reg: 3, dir: 1)',
+    'Number of regular files transferred: 2',
+    'Total file size: 100,015 bytes',
+    'Total transferred file size: 100,006 bytes',
+    'Literal data: 100,006 bytes',
+    '',
+    'sent 100,214 bytes  received 73 bytes  200,574.00 bytes/sec',
+    'total size is 100,015  speedup is 1.00',
+    'rsync error: some files/attrs were not transferred (see previous errors) (code 23) at main.c(1338) [sender=3.2.7]',
+]
+
+
+def test_parse_size_formats():
+    assert parse_size('12,345') == 12345
+    assert parse_size('12345 bytes') == 12345
+    assert parse_size('2K') == 2048
+    assert parse_size('1.5M bytes') == int(1.5 * 1024 ** 2)
+    assert parse_size('n/a') is None
+
+
+def test_parser_emits_typed_events():
+    parser = RsyncParser()
+    events = [e for e in map(parser.parse, STRUCTURED_RUN) if e]
+    kinds = [e[0] for e in events]
+    assert kinds[:4] == ['file', 'progress', 'file', 'error']
+    assert events[0] == ('file', 'a file.bin', 100003, '>f+++++++++')
+    assert events[1] == ('progress', 50, '95.37MB/s', 100003)
+    stats = {e[1]: e[3] for e in events if e[0] == 'stats'}
+    assert stats['Total transferred file size'] == 100006
+    assert stats['sent'] == 100214
+    assert events[-1][0] == 'error'
+    # the summary block ended with "total size is"
+    assert parser.in_stats is False
+
+
+def test_dashboard_collects_bytes_and_errors():
+    dash = LiveDashboard(test_mode=True, cow_hold_seconds=0)
+    for line in STRUCTURED_RUN[:7]:
+        dash.update_from_rsync_line(line)
+    # per-file lengths from --out-format before the summary arrives
+    assert dash.transferred_bytes == 100006
+    assert dash.files_moved_count == 2
+    assert dash.last_moved_file == 'sub/b.txt'
+    for line in STRUCTURED_RUN[7:]:
+        dash.update_from_rsync_line(line)
+    assert dash.transferred == '100,006 bytes'
+    assert dash.transferred_bytes == 100006
+    assert len(dash.errors) == 2
+    assert dash.errors[0].startswith('rsync: [sender]')
+
+
+def test_build_rsync_cmd_requests_structured_output():
+    cmd = _build_rsync_cmd('a', 'b', structured=True)
+    for arg in RSYNC_OUTPUT_ARGS:
+        assert arg in cmd
+    assert cmd[-2:] == ['a', 'b']
+    # menu previews stay the plain command users would type
+    assert RSYNC_OUTPUT_ARGS[0] not in _build_rsync_cmd('a', 'b')
@@ -0,0 +1,122 @@
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from pcopy.rsync_stream import RsyncOutput, run_spooled, run_streaming
+
+
+def _printer(n):
+    return [sys.executable, '-c', f'for i in range({n}): print("line", i)']
+
+
+def test_tail_is_bounded_and_callback_sees_every_line():
+    seen = []
+    out = RsyncOutput(on_line=seen.append, tail_lines=3)
+    out.feed_text('a\nb\r\nc\nd\n')
+    out.feed(b'e\n')
+    assert seen == ['a', 'b', 'c', 'd', 'e']
+    assert out.tail_text().splitlines() == ['c', 'd', 'e']
+    assert out.lines == 5
+    assert out.tail_text(3) == 'd\ne'
+
+
+def test_run_streaming_real_process():
+    seen = []
+    out = RsyncOutput(on_line=seen.append, tail_lines=10)
+    assert run_streaming(_printer(5000), out) == 0
+    assert len(seen) == 5000
+    assert out.tail_text().splitlines()[-1] == 'line 4999'
+    assert len(out.tail) == 10
+
+
+def test_carriage_return_progress_is_delivered_without_newline():
+    import time
+
+    seen = []
+    out = RsyncOutput(on_line=lambda line: seen.append((line, time.monotonic())))
+    # rsync --info=progress2 style: updates separated by \r, newline only at the end
+    code = (
+        'import sys, time\n'
+        'for p in (10, 50):\n'
+        '    sys.stdout.write(f"  {p}%  1.00MB/s\\r"); sys.stdout.flush(); time.sleep(0.6)\n'
+        'sys.stdout.write("done\\n")\n'
+    )
+    started = time.monotonic()
+    assert run_streaming([sys.executable, '-c', code], out) == 0
+    assert [line for line, _ in seen] == ['  10%  1.00MB/s', '  50%  1.00MB/s', 'done']
+    # the first progress record arrives long before the process finishes
+    assert seen[0][1] - started < 0.5
+    assert seen[-1][1] - seen[0][1] >= 1.0
+
+
+def test_watchdog_kills_only_on_stall():
+    out = RsyncOutput()
+    # keeps talking for longer than the stall window: must not be killed
+    busy = [sys.executable, '-c', 'import time\nfor i in range(8):\n    print(i, flush=True); time.sleep(0.1)']
+    assert run_streaming(busy, out, stall_timeout=0.5) == 0
+    assert out.events == []
+
+    out = RsyncOutput()
+    hung = [sys.executable, '-c', 'import time; print("hi", flush=True); time.sleep(30)']
+    rc = run_streaming(hung, out, stall_timeout=0.4)
+    assert rc != 0
+    assert [e['kind'] for e in out.events] == ['stall']
+    assert out.events[0]['last_line'] == 'hi'
+    assert out.events[0]['idle_seconds'] >= 0.4
+
+
+def test_watchdog_deadline():
+    out = RsyncOutput()
+    chatty = [sys.executable, '-c', 'import time\nwhile True:\n    print("x", flush=True); time.sleep(0.05)']
+    rc = run_streaming(chatty, out, stall_timeout=None, deadline=0.4)
+    assert rc != 0
+    assert out.events[0]['kind'] == 'deadline'
+
+
+def test_run_spooled_replays_file_and_string_output(monkeypatch):
+    out = RsyncOutput(tail_lines=2)
+    assert run_spooled(_printer(100), out) == 0
+    assert out.lines == 100 and out.tail_text().splitlines() == ['line 98', 'line 99']
+
+    monkeypatch.setattr(subprocess, 'run', lambda *a, **k: SimpleNamespace(returncode=4, stdout='x\ny'))
+    out = RsyncOutput()
+    assert run_spooled(['rsync'], out) == 4
+    assert out.tail_text().splitlines() == ['x', 'y']
+
+
+def test_feed_fd_rides_out_empty_polls_and_spurious_wakeups(monkeypatch):
+    import os
+    from pcopy import rsync_stream
+
+    r, w = os.pipe()
+
+    class ScriptedSelector:
+        # first poll times out, second wakes up with nothing to read, then data arrives
+        calls = 0
+
+        def register(self, fd, events):
+            pass
+
+        def select(self, timeout):
+            ScriptedSelector.calls += 1
+            if ScriptedSelector.calls == 1:
+                return []
+            if ScriptedSelector.calls == 3:
+                os.write(w, b'one\rtwo\npartial')
+                os.close(w)
+            return [('ready', 1)]
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(rsync_stream.selectors, 'DefaultSelector', ScriptedSelector)
+    seen = []
+    out = RsyncOutput(on_line=seen.append)
+    try:
+        out.feed_fd(r)
+    finally:
+        os.close(r)
+    assert seen == ['one', 'two', 'partial']
+    assert ScriptedSelector.calls >= 4
@@ -14,6 +14,8 @@ class DummyDash:
         self.transferred = 'Total transferred file size: 999 bytes'
         self.errors = ['err1', 'err2']
         self.duplicates = 3
+        self.versions_created = 1
+        self.versions_bytes = 42
 
 
 def test_parse_and_format_helpers():
@@ -47,25 +49,53 @@ def test_write_and_persist_last_run(tmp_path, monkeypatch):
     dash = DummyDash()
     runner._persist_last_run_entry_ml('jobX', 0, False, dash)
 
-    data = yaml.safe_load(sfile.read_text(encoding='utf8'))
-    assert 'jobX' in data
-    lr = data['jobX'].get('last_run')
+    assert yaml.safe_load(sfile.read_text(encoding='utf8')) == base
+    lr = runner._history_ml().latest('jobX')
     assert lr is not None
     assert lr['status_str'] == 'PASS'
     assert lr['transferred_bytes'] == 999
     assert lr['errors_count'] == 2
     assert lr['dupes_saved'] is True
+    assert lr['versions_created'] == 1
+    assert lr['versions_bytes'] == 42
 
 
-def test_write_last_run_handles_yaml_error(tmp_path, monkeypatch):
-    sfile = tmp_path / 'settings.yml'
-    sfile.write_text('{}', encoding='utf8')
-    monkeypatch.setenv('PCOPY_SETTINGS_PATH', str(sfile))
+def test_record_run_handles_history_error(tmp_path, monkeypatch):
+    # point the history at a directory so sqlite cannot open it
+    monkeypatch.setenv('PCOPY_HISTORY_PATH', str(tmp_path))
+    # Should not raise
+    runner._record_run_ml('nope', {'a': 1})
 
-    # force yaml.safe_dump to raise
-    def bad_dump(*a, **k):
-        raise RuntimeError('yaml fail')
 
-    monkeypatch.setattr('yaml.safe_dump', bad_dump)
-    # Should not raise
-    runner._write_last_run_yaml_ml('nope', {'a': 1})
+@pytest.mark.parametrize('given, expected', [(0, 0), (None, runner.DEFAULT_STALL_TIMEOUT), (12.5, 12.5)])
+def test_stall_timeout_zero_is_not_the_default(tmp_path, monkeypatch, given, expected):
+    from pcopy import copy_logic
+
+    seen = {}
+
+    def fake_perform_backup(src, dst, **kwargs):
+        seen.update(kwargs)
+        return {}
+
+    monkeypatch.setattr(copy_logic, 'perform_backup', fake_perform_backup)
+    (tmp_path / 's').mkdir()
+    assert runner.run_backup(source=str(tmp_path / 's'), dest=str(tmp_path / 'd'), boring=True, stall_timeout=given, persist_last_run=False) == 0
+    assert seen['stall_timeout'] == expected
+
+
+def test_job_delta_threshold_zero_reaches_perform_backup(tmp_path, monkeypatch):
+    from pcopy import config, copy_logic
+
+    seen = {}
+
+    def fake_perform_backup(src, dst, **kwargs):
+        seen.update(kwargs)
+        return {}
+
+    monkeypatch.setattr(copy_logic, 'perform_backup', fake_perform_backup)
+    monkeypatch.setattr(config, 'reload_settings', lambda: None)
+    (tmp_path / 's').mkdir()
+    monkeypatch.setattr(config, 'SETTINGS', {'vms': {'source': str(tmp_path / 's'), 'dest': str(tmp_path / 'd'), 'delta_threshold': 0}})
+    assert runner.main(['--boring', 'do', 'vms']) == 0
+    # 0 means "delta every changed file", not "use the default"
+    assert seen['delta_threshold'] == 0
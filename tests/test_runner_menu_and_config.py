@@ -42,6 +42,18 @@ def test_show_menu_named_run(monkeypatch):
     assert called['args']['source'] == 's'
 
 
+def test_show_menu_lists_only_job_blocks(monkeypatch, capsys):
+    # top-level scalars like `jobs: 2` or `state_dir` are settings, not jobs
+    monkeypatch.setattr(config, 'SETTINGS', {'jobs': 2, 'state_dir': '/tmp/s', 'rsync_options': ['-a'], 'job1': {'source': 's', 'dest': 'd'}})
+    called = []
+    monkeypatch.setattr(runner, 'run_backup', lambda source=None, dest=None, dry_run=False, boring=False: called.append(source) or 0)
+    monkeypatch.setattr('rich.prompt.Prompt.ask', _make_prompt_responder(['R']))
+    assert runner._show_menu() == 0
+    assert called == ['s']
+    out = capsys.readouterr().out
+    assert 'job1' in out and 'state_dir' not in out
+
+
 def test_show_menu_dryrun_named(monkeypatch):
     monkeypatch.setattr(config, 'SETTINGS', {'job1': {'source': 'sx', 'dest': 'dx'}})
     called = {}
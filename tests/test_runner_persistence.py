@@ -25,10 +25,10 @@ def test_persist_last_run_fields(tmp_path, monkeypatch):
     rc = runner.run_backup(source='s', dest='d', name='jobA', persist_last_run=True)
     assert rc == 0
 
-    # Read the settings file and assert last_run metadata saved
+    # last_run metadata goes to the run history; the settings file is left alone
     loaded = yaml.safe_load(yaml_path.read_text(encoding='utf8'))
-    assert 'jobA' in loaded
-    lr = loaded['jobA'].get('last_run')
+    assert loaded == settings
+    lr = runner._history_ml().latest('jobA')
     assert lr is not None
     # Required fields
     for key in ('timestamp', 'status', 'status_str', 'transferred_bytes', 'elapsed_seconds'):
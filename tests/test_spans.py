@@ -0,0 +1,75 @@
+import os
+import time
+
+from pcopy import config, runner
+from pcopy.copy_logic import perform_backup
+from pcopy.spans import Spans, format_phases
+
+
+def test_span_and_add_accumulate():
+    spans = Spans()
+    with spans.span('walk') as span:
+        time.sleep(0.01)
+        span.items = 3
+    spans.add('versions', 0.5, 0.25, items=1)
+    spans.add('versions', 0.5, 0.25, items=1)
+    phases = spans.as_dict()
+    assert list(phases) == ['walk', 'versions']
+    assert phases['walk']['wall_seconds'] >= 0.01 and phases['walk']['items'] == 3
+    assert phases['versions'] == {'wall_seconds': 1.0, 'cpu_seconds': 0.5, 'items': 2, 'calls': 2}
+    spans.count('versions', 5)
+    assert spans.as_dict()['versions']['items'] == 5
+
+
+def test_update_folds_in_other_phases():
+    spans = Spans()
+    spans.update({'copy': {'wall_seconds': 1.5, 'cpu_seconds': 0.5, 'items': 4, 'calls': 4}})
+    spans.update({'copy': {'wall_seconds': 0.5}})
+    assert spans.as_dict()['copy'] == {'wall_seconds': 2.0, 'cpu_seconds': 0.5, 'items': 4, 'calls': 5}
+    assert format_phases(spans.as_dict()) == ['copy: 2.00s wall, 0.50s cpu, 4 items']
+
+
+def test_perform_backup_reports_phases(tmp_path):
+    src, dst = tmp_path / 'src', tmp_path / 'dst'
+    src.mkdir()
+    dst.mkdir()
+    for i in range(4):
+        (src / f'{i}.txt').write_text('new')
+    (dst / '0.txt').write_text('old')
+    os.utime(dst / '0.txt', (1, 1))
+    phases = perform_backup(src, dst, run_rsync=False)['phases']
+    assert list(phases) == ['walk', 'versions', 'copy']
+    assert phases['walk']['items'] == 4
+    assert phases['versions']['items'] == 1
+    assert phases['copy']['items'] == 4 and phases['copy']['calls'] == 4
+
+
+def test_run_entry_records_phases(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('PCOPY_TEST_MODE', '1')
+    monkeypatch.setattr(config, 'reload_settings', lambda: None)
+    monkeypatch.setattr(config, 'SETTINGS', {'photos': {'source': 's', 'dest': str(tmp_path / 'd')}})
+    config.take_load_time()
+    assert runner.main(['do', 'photos']) == 0
+    phases = runner._history_ml().latest('photos')['phases']
+    assert list(phases) == ['rsync', 'teardown', 'persist']
+    assert phases['rsync']['items'] == 2
+    # the entry is saved before the summary, so the summary lists it too
+    out = capsys.readouterr().out
+    assert 'Phases:' in out and 'persist:' in out
+
+
+def test_config_phase_times_the_settings_load(tmp_path, monkeypatch):
+    monkeypatch.setenv('PCOPY_TEST_MODE', '1')
+    monkeypatch.setattr(config, 'SETTINGS_PATH', tmp_path / 'settings.yml')
+    monkeypatch.setattr(config, 'SETTINGS', config.SETTINGS)
+    config.take_load_time()
+    config.reload_settings()
+    monkeypatch.setattr(config, 'reload_settings', lambda: None)
+    monkeypatch.setattr(config, 'SETTINGS', {'photos': {'source': 's', 'dest': str(tmp_path / 'd')}})
+    assert runner.main(['do', 'photos']) == 0
+    entry = runner._history_ml().latest('photos')
+    assert entry is not None
+    phases = entry['phases']
+    assert list(phases)[0] == 'config' and phases['config']['calls'] == 1
+    # the load is charged to one run only
+    assert config.take_load_time() == (0.0, 0.0)
@@ -0,0 +1,71 @@
+import io
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BUDGET = json.loads((ROOT / 'scripts' / 'startup_budget.json').read_text(encoding='utf8'))
+
+
+def _loaded_modules(code: str, home: Path) -> set:
+    env = dict(os.environ, HOME=str(home), PYTHONPATH=str(ROOT))
+    for name in ('PCOPY_SLOGANS', 'PCOPY_CACHE_DIR', 'XDG_CACHE_HOME'):
+        env.pop(name, None)
+    out = subprocess.run([sys.executable, '-c', code + '\nimport sys; print("\\n".join(sys.modules))'], env=env, capture_output=True, text=True, check=True, cwd=str(ROOT))
+    return set(out.stdout.split())
+
+
+def _forbidden(modules: set) -> list:
+    return sorted(m for m in modules if any(m == f or m.startswith(f + '.') for f in BUDGET['forbidden']))
+
+
+def test_cli_import_and_help_stay_light(tmp_path):
+    assert _forbidden(_loaded_modules('import pcopy, pcopy.runner', tmp_path)) == []
+    code = 'from pcopy.runner import main\ntry:\n    main(["--help"])\nexcept SystemExit:\n    pass'
+    assert _forbidden(_loaded_modules(code, tmp_path)) == []
+
+
+def test_cached_settings_stay_light(tmp_path):
+    sys.path.insert(0, str(ROOT / 'scripts'))
+    try:
+        import startup_budget
+    finally:
+        sys.path.pop(0)
+    # the budgeted settings file must be one pcopy accepts
+    from pcopy.config import yaml_load
+    from pcopy.cron import CronSchedule
+    for job in yaml_load(io.StringIO(startup_budget.SETTINGS_TEXT)).values():
+        if isinstance(job, dict):
+            CronSchedule(job['schedule'])
+    startup_budget.cached_settings(BUDGET['module'], str(tmp_path))
+    # the settings come from the marshal cache, so YAML is not imported
+    assert _forbidden(_loaded_modules('import pcopy.runner', tmp_path)) == []
+
+
+def test_lazy_reexports_resolve():
+    import pcopy
+    from pcopy import runner
+    assert pcopy.main is runner.main
+    assert isinstance(pcopy.SETTINGS, dict)
+    assert 'BackupDashboard' in dir(pcopy)
+    assert runner.LiveDashboard.__name__ == 'LiveDashboard'
+
+
+def test_parse_importtime_and_check():
+    sys.path.insert(0, str(ROOT / 'scripts'))
+    try:
+        import startup_budget
+    finally:
+        sys.path.pop(0)
+    stderr = (
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:       100 |        100 |   rich.console\n'
+        'import time:       500 |      80000 | pcopy.runner\n'
+    )
+    parsed = startup_budget.parse_importtime(stderr)
+    assert parsed['pcopy.runner'] == (500, 80000)
+    best_ms, forbidden = startup_budget.check(BUDGET, [parsed])
+    assert best_ms == 80.0
+    assert forbidden == ['rich.console']